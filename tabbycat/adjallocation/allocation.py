@@ -1,7 +1,13 @@
 import logging
 from warnings import warn
 
+from django.db import transaction
+
 from adjallocation.models import DebateAdjudicator
+from draw.signals import get_debate_tournament_id
+from utils.cache import invalidate_tags, round_tag
+
+from .conflicts import bump_history_version
 
 logger = logging.getLogger(__name__)
 
@@ -49,23 +55,34 @@ class AdjudicatorAllocation:
             if not debateadjs._prefetch_done:
                 debateadjs = debateadjs.prefetch_related('adjudicator')
 
-            for a in debateadjs:
-                if a.type == DebateAdjudicator.TYPE_CHAIR:
-                    self.chair = a.adjudicator
-                elif a.type == DebateAdjudicator.TYPE_PANEL:
-                    self.panellists.append(a.adjudicator)
-                elif a.type == DebateAdjudicator.TYPE_TRAINEE:
-                    self.trainees.append(a.adjudicator)
-
-            # Sort panellists/trainees names for more consistent ballots/prints
-            self.panellists.sort(key=lambda adj: adj.name)
-            self.trainees.sort(key=lambda adj: adj.name)
+            self.set_from_debateadjs(debateadjs)
 
         else:
             self.chair = chair
             self.panellists = panellists or []
             self.trainees = trainees or []
 
+    def set_from_debateadjs(self, debateadjs):
+        """Sets the adjudicators from `debateadjs`, an iterable of instances of
+        the container's related adjudicator model (e.g. `DebateAdjudicator`)
+        that have their adjudicators already loaded. This is used by `from_db`,
+        and by callers that fetch the adjudicators of many containers at once."""
+        self.chair = None
+        self.panellists = []
+        self.trainees = []
+
+        for a in debateadjs:
+            if a.type == DebateAdjudicator.TYPE_CHAIR:
+                self.chair = a.adjudicator
+            elif a.type == DebateAdjudicator.TYPE_PANEL:
+                self.panellists.append(a.adjudicator)
+            elif a.type == DebateAdjudicator.TYPE_TRAINEE:
+                self.trainees.append(a.adjudicator)
+
+        # Sort panellists/trainees names for more consistent ballots/prints
+        self.panellists.sort(key=lambda adj: adj.name)
+        self.trainees.sort(key=lambda adj: adj.name)
+
     def __len__(self):
         return (0 if self.chair is None else 1) + len(self.panellists) + len(self.trainees)
 
@@ -203,3 +220,72 @@ class AdjudicatorAllocation:
             _, created = self.container.related_adjudicator_set.update_or_create(
                     adjudicator=adj, defaults={'type': t})
             logger.debug("%s: %s, %s, %s", "Created" if created else "Updated", self.container, adj, t)
+
+
+def save_allocations(allocations):
+    """Saves many allocations at once. This has the same effect as calling
+    `save()` on each allocation, but compares the allocations with existing
+    rows and applies the differences with one bulk delete, one bulk update and
+    one bulk create, in a single transaction. All allocations must have
+    containers of the same model (e.g. all debates or all preformed panels)."""
+
+    allocations = list(allocations)
+    types = {}
+    for alloc in allocations:
+        types[alloc.container.id] = {adj.id: t for adj, t in alloc.with_debateadj_types() if adj}
+    save_adjudicator_types([alloc.container for alloc in allocations], types)
+
+
+def save_adjudicator_types(containers, types):
+    """Sets the adjudicators of each container in `containers` to those in
+    `types`, a dict mapping container IDs to dicts mapping adjudicator IDs to
+    `DebateAdjudicator` types, as in `save_allocations()`. Returns the set of
+    IDs of containers whose adjudicators changed."""
+
+    if not containers:
+        return set()
+
+    related_manager = containers[0].related_adjudicator_set
+    model = related_manager.model
+    container_field = related_manager.field.name + '_id'
+
+    desired = {(container_id, adj_id): t
+               for container_id, adj_types in types.items() for adj_id, t in adj_types.items()}
+
+    with transaction.atomic():
+        existing = model.objects.filter(**{container_field + '__in': [container.id for container in containers]})
+
+        to_delete = []
+        to_update = []
+        changed = set()
+        for id, container_id, adj_id, existing_type in existing.values_list(
+                'id', container_field, 'adjudicator_id', 'type'):
+            key = (container_id, adj_id)
+            if key not in desired:
+                to_delete.append(id)
+                changed.add(container_id)
+                continue
+            t = desired.pop(key)
+            if existing_type != t:
+                to_update.append(model(id=id, type=t))
+                changed.add(container_id)
+
+        to_create = [model(**{container_field: container_id, 'adjudicator_id': adj_id, 'type': t})
+                     for (container_id, adj_id), t in desired.items()]
+        changed.update(container_id for container_id, _ in desired)
+
+        model.objects.filter(id__in=to_delete).delete()
+        model.objects.bulk_update(to_update, ['type'])
+        model.objects.bulk_create(to_create)
+
+    # Bulk updates and creates don't send signals, so invalidate the history
+    # index and the draw pages of the affected rounds directly
+    if model is DebateAdjudicator and (to_update or to_create):
+        tournament_id = get_debate_tournament_id(containers[0])
+        bump_history_version(tournament_id)
+        round_ids = {container.round_id for container in containers if container.id in changed}
+        invalidate_tags(tournament_id, 'draw', *[round_tag('draw', round_id) for round_id in round_ids])
+
+    logger.debug("Saved adjudicators for %d containers: deleted %d, updated %d, created %d %s instances",
+        len(containers), len(to_delete), len(to_update), len(to_create), model.__name__)
+    return changed
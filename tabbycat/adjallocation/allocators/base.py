@@ -43,7 +43,7 @@ class BaseAdjudicatorAllocator:
         else:
             teams = None
 
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators)
+        self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators, tournament=self.tournament)
         self.history = HistoryInfo(round=round)
 
     def allocate(self):
@@ -1,9 +1,12 @@
 import logging
 import random
+import time
 from math import exp
 
+import numpy as np
 from django.utils.translation import gettext as _, ngettext
-from munkres import Munkres
+
+from draw.generator.assignment import solve_assignment
 
 from .base import AdjudicatorAllocationError, BaseAdjudicatorAllocator, register
 from ..allocation import AdjudicatorAllocation
@@ -13,6 +16,19 @@ logger = logging.getLogger(__name__)
 
 class BaseHungarianAllocator(BaseAdjudicatorAllocator):
 
+    # Attempts after the first in a multi-restart allocation add noise of up to
+    # this much to each cost. This is about the cost of a one-point difference
+    # in (normalised) score, so it reorders similar adjudicators, but never
+    # outweighs a conflict, history or importance mismatch.
+    restart_perturbation = 1.0
+
+    # Weights of the panel strength spread and regional balance terms in the
+    # objective used to compare attempts (see `score_allocation()`)
+    strength_spread_weight = 100
+    region_clash_weight = 100
+
+    perturbation = 0.0
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -24,15 +40,80 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
         self.history_penalty = t.pref('adj_history_penalty')
         self.no_panellists = t.pref('no_panellist_position')
         self.no_trainees = t.pref('no_trainee_position')
+        self.assignment_solver = t.pref('assignment_solver')
+        self.restarts = t.pref('adj_allocation_restarts')
+        self.time_limit = t.pref('adj_allocation_time_limit')
         self.feedback_weight = self.round.feedback_weight
         self.user_warnings = []  # Surfaced to users for non-error disclosures
 
-        self.munkres = Munkres()
-
     def allocate(self):
         self.populate_adj_scores(self.adjudicators)
+        if self.restarts > 1:
+            return self.run_restarts(), self.user_warnings
         return self.run_allocation(), self.user_warnings
 
+    def run_restarts(self):
+        """Runs the allocation up to `self.restarts` times and returns the
+        attempt with the lowest objective (see `score_allocation()`). The first
+        attempt is the same as a single allocation; later ones perturb the cost
+        matrices, so that the solver finds other near-optimal allocations.
+        Stops making further attempts once `self.time_limit` seconds have
+        passed."""
+        deadline = time.monotonic() + self.time_limit
+        initial_warnings = self.user_warnings
+        self._rng = np.random.default_rng(random.getrandbits(32))
+        best = best_score = best_warnings = None
+
+        for attempt in range(self.restarts):
+            if attempt > 0 and time.monotonic() >= deadline:
+                logger.info("Stopping after %d of %d attempts, time limit reached", attempt, self.restarts)
+                break
+            self.user_warnings = list(initial_warnings)  # each attempt raises the same warnings
+            self.perturbation = self.restart_perturbation if attempt > 0 else 0.0
+            allocation = self.run_allocation()
+            score = self.score_allocation(allocation)
+            logger.info("Attempt %d: objective %f", attempt + 1, score)
+            if best is None or score < best_score:
+                best, best_score, best_warnings = allocation, score, self.user_warnings
+
+        self.perturbation = 0.0
+        self.user_warnings = best_warnings
+        return best
+
+    def score_allocation(self, allocation):
+        """Returns the objective used to compare attempts in a multi-restart
+        allocation, lower being better. This is the sum of:
+         - the conflict and history penalties incurred by each adjudicator with
+           the teams in their debate, and between adjudicators on the same panel;
+         - the standard deviation of panel strengths (average normalised score of
+           voting adjudicators) among debates of the same importance; and
+         - the number of voting adjudicators on each panel from a region that
+           another voting adjudicator on that panel is also from."""
+        penalty = 0
+        strengths = {}
+        region_clashes = 0
+
+        for aa in allocation:
+            panel = list(aa.all())
+            for i, adj in enumerate(panel):
+                for team in aa.container.teams:
+                    penalty += self.conflict_penalty * self.conflicts.conflict_adj_team(adj, team)
+                    penalty += self.history_penalty * self.history.seen_adj_team(adj, team)
+                for other in panel[i+1:]:
+                    penalty += self.conflict_penalty * self.conflicts.conflict_adj_adj(adj, other)
+                    penalty += self.history_penalty * self.history.seen_adj_adj(adj, other)
+
+            voting = list(aa.voting())
+            if voting:
+                strength = sum(adj._normalized_score for adj in voting) / len(voting)
+                strengths.setdefault(aa.container.importance, []).append(strength)
+            regions = [adj.institution.region_id for adj in voting
+                       if adj.institution_id is not None and adj.institution.region_id is not None]
+            region_clashes += len(regions) - len(set(regions))
+
+        spread = sum(np.std(group) for group in strengths.values())
+        return penalty + self.strength_spread_weight * spread + self.region_clash_weight * region_clashes
+
     def populate_adj_scores(self, adjudicators):
         score_min = self.min_score
         score_range = self.max_score - score_min
@@ -85,19 +166,62 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
 
         return cost
 
+    def calc_cost_matrix(self, debates, adjs, adjustments=None, chairs=None):
+        """Returns a NumPy array of costs, with one row per element of
+        `debates` and one column per element of `adjs`. Element (i, j) is equal
+        to `self.calc_cost(debates[i], adjs[j], adjustments[i], chairs[i])`,
+        but the whole matrix is computed using array operations. `debates` may
+        contain the same debate more than once, e.g. once for each position on
+        a panel. `adjustments` and `chairs`, if given, must be the same length
+        as `debates`."""
+        n_rows = len(debates)
+        scores = np.array([adj._normalized_score for adj in adjs], dtype=float)
+        if adjustments is None:
+            adjustments = np.zeros(n_rows)
+
+        # Team conflicts and histories, summed over the teams in each debate
+        teams = list({team.id: team for debate in debates for team in debate.teams}.values())
+        team_index = {team.id: k for k, team in enumerate(teams)}
+        incidence = np.zeros((n_rows, len(teams)))
+        for i, debate in enumerate(debates):
+            for team in debate.teams:
+                incidence[i, team_index[team.id]] += 1
+
+        team_costs = self.conflict_penalty * self.conflicts.conflict_matrix_adj_team(adjs, teams) + \
+            self.history_penalty * self.history.seen_matrix_adj_team(adjs, teams)
+        cost = incidence @ team_costs.T
+
+        # Conflicts and histories with the chair, for rows that have one
+        if chairs is not None:
+            rows = [i for i, chair in enumerate(chairs) if chair]
+            unique_chairs = list({chairs[i].id: chairs[i] for i in rows}.values())
+            chair_index = {chair.id: k for k, chair in enumerate(unique_chairs)}
+            chair_costs = self.conflict_penalty * self.conflicts.conflict_matrix_adj_adj(adjs, unique_chairs) + \
+                self.history_penalty * self.history.seen_matrix_adj_adj(adjs, unique_chairs)
+            cost[rows] += chair_costs[:, [chair_index[chairs[i].id] for i in rows]].T
+
+        impt = np.array([debate.importance + 3 for debate in debates], dtype=float) + adjustments
+        diff = 5 + impt[:, np.newaxis] - scores[np.newaxis, :]
+        cost += np.where(diff > 0.25, 1000 * np.exp(diff - 0.25), 0)
+
+        cost += self.max_score - scores
+
+        if self.perturbation:
+            cost += self._rng.uniform(0, self.perturbation, cost.shape)
+
+        return cost
+
     def allocate_trainees(self, trainees, allocation, debates):
         if len(trainees) > 0 and len(debates) > 0:
             allocation_by_debate = {aa.container: aa for aa in allocation}
 
             logger.info("costing trainees")
-            cost_matrix = []
-            for debate in debates:
-                chair = allocation_by_debate[debate].chair
-                row = [self.calc_cost(debate, adj, adjustment=-2.0, chair=chair) for adj in trainees]
-                cost_matrix.append(row)
-
-            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
+            chairs = [allocation_by_debate[debate].chair for debate in debates]
+            cost_matrix = self.calc_cost_matrix(debates, trainees,
+                adjustments=np.full(len(debates), -2.0), chairs=chairs)
+
+            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", *cost_matrix.shape)
+            indices = solve_assignment(cost_matrix, self.assignment_solver)
             total_cost = sum(cost_matrix[i][j] for i, j in indices)
             logger.info('total cost for %d trainees: %f', len(indices), total_cost)
 
@@ -180,13 +304,10 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
 
         if len(solos) > 0 and len(solo_debates) > 0:
             logger.info("costing solos")
-            cost_matrix = []
-            for debate in solo_debates:
-                row = [self.calc_cost(debate, adj) for adj in solos]
-                cost_matrix.append(row)
+            cost_matrix = self.calc_cost_matrix(solo_debates, solos)
 
-            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
+            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", *cost_matrix.shape)
+            indices = solve_assignment(cost_matrix, self.assignment_solver)
             total_cost = sum(cost_matrix[i][j] for i, j in indices)
             logger.info('total cost for %d solo debates: %f', len(solos), total_cost)
 
@@ -202,17 +323,18 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
         # Allocate panellists
         if len(panellists) > 0 and len(panel_debates) > 0:
             logger.info("costing panellists")
-            cost_matrix = []
+            positions = []
+            adjustments = []
             for i, debate in enumerate(panel_debates):
                 for j in range(3):
                     # for the top half of these debates, the final panellist
                     # can be of lower quality than the other 2
-                    adjustment = -1.0 if i < len(panel_debates)/2 and j == 2 else 0.0
-                    row = [self.calc_cost(debate, adj, adjustment) for adj in panellists]
-                    cost_matrix.append(row)
+                    positions.append(debate)
+                    adjustments.append(-1.0 if i < len(panel_debates)/2 and j == 2 else 0.0)
+            cost_matrix = self.calc_cost_matrix(positions, panellists, adjustments=np.array(adjustments))
 
-            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
+            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", *cost_matrix.shape)
+            indices = solve_assignment(cost_matrix, self.assignment_solver)
             total_cost = sum(cost_matrix[i][j] for i, j in indices)
             logger.info('total cost for %d panel debates: %f', len(panel_debates), total_cost)
 
@@ -289,15 +411,17 @@ class ConsensusHungarianAllocator(BaseHungarianAllocator):
 
         # Allocate voting
         logger.info("costing voting adjudicators")
-        cost_matrix = []
+        positions = []
+        adjustments = []
         for debate, njudges in zip(debates_sorted, judges_per_room):
             for i in range(njudges):
-                row = [self.calc_cost(debate, adj, adjustment=-i) for adj in voting]
-                cost_matrix.append(row)
+                positions.append(debate)
+                adjustments.append(-i)
+        cost_matrix = self.calc_cost_matrix(positions, voting, adjustments=np.array(adjustments, dtype=float))
 
         logger.info("optimizing voting adjudicators (matrix size: %d positions by %d adjudicators)",
-                len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
+                *cost_matrix.shape)
+        indices = solve_assignment(cost_matrix, self.assignment_solver)
         indices.sort()
         total_cost = sum(cost_matrix[i][j] for i, j in indices)
         logger.info('total cost for %d debates: %f', n_debates, total_cost)
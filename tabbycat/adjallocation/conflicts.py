@@ -1,16 +1,37 @@
 """Utilities for querying and listing conflicts and history between
-participants."""
+participants.
+
+When given a tournament, `ConflictsInfo` and `HistoryInfo` load their
+information from an index of all conflicts or history in the tournament, which
+is kept in the cache until conflicts or debates in the tournament change (see
+signals.py). Since the allocators, the allocation editor and the draw page all
+use these for the same tournament over and over, most of the time this saves
+rebuilding them from the database.
+"""
 import logging
-from itertools import combinations, product
+import time
+from itertools import combinations, groupby, product
+from operator import itemgetter
 from typing import Dict, List, Tuple, TypedDict
 
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
 from adjallocation.models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
-                     AdjudicatorTeamConflict, TeamInstitutionConflict)
-from draw.models import Debate
+                     AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+from draw.models import DebateTeam
 from participants.models import Adjudicator, Team
 
 logger = logging.getLogger(__name__)
 
+CONFLICTS_VERSION_KEY = "%s_conflicts_version"
+HISTORY_VERSION_KEY = "%s_allocation_history_version"
+CONFLICTS_INDEX_KEY = "%s_conflicts_index_%s"
+HISTORY_INDEX_KEY = "%s_allocation_history_index_%s"
+
 
 class AdjudicatorConflicts(TypedDict):
     class Conflict(TypedDict):
@@ -24,6 +45,126 @@ class AdjudicatorConflicts(TypedDict):
 TeamConflicts = AdjudicatorConflicts
 
 
+def _pairs_matrix(pairs, ids1, ids2):
+    """Returns a boolean NumPy array of shape `(len(ids1), len(ids2))`, whose
+    (i, j) element is True if `(ids1[i], ids2[j])` is in `pairs`."""
+    index1 = {pk: i for i, pk in enumerate(ids1)}
+    index2 = {pk: j for j, pk in enumerate(ids2)}
+    matrix = np.zeros((len(ids1), len(ids2)), dtype=bool)
+    for pk1, pk2 in pairs:
+        if pk1 in index1 and pk2 in index2:
+            matrix[index1[pk1], index2[pk2]] = True
+    return matrix
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Use a fresh token rather than restarting a counter, so that indices
+        # from before an eviction can't be mistaken for current ones.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_versions(key, tournament_ids):
+    # As with `utils.cache.invalidate_tags()`, bump again when the transaction
+    # commits, in case another process rebuilt the index in the meantime.
+    def bump():
+        version = time.time_ns()
+        cache.set_many({key % tid: version for tid in tournament_ids}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def bump_conflicts_version(*tournament_ids):
+    """Causes the conflicts index of each of the given tournaments to be
+    rebuilt the next time it's used."""
+    _bump_versions(CONFLICTS_VERSION_KEY, tournament_ids)
+
+
+def bump_history_version(*tournament_ids):
+    """Causes the history index of each of the given tournaments to be rebuilt
+    the next time it's used."""
+    _bump_versions(HISTORY_VERSION_KEY, tournament_ids)
+
+
+def _build_conflicts_index(tournament):
+    # Shared adjudicators (with no tournament) can be used in any tournament
+    adj_filter = Q(adjudicator__tournament=tournament) | Q(adjudicator__tournament__isnull=True)
+
+    adjteam = set(AdjudicatorTeamConflict.objects.filter(
+        team__tournament=tournament).values_list('adjudicator_id', 'team_id'))
+
+    adjadj = set()
+    for adj1_id, adj2_id in AdjudicatorAdjudicatorConflict.objects.filter(
+            Q(adjudicator1__tournament=tournament) | Q(adjudicator1__tournament__isnull=True) |
+            Q(adjudicator2__tournament=tournament)).values_list('adjudicator1_id', 'adjudicator2_id'):
+        adjadj.add((adj1_id, adj2_id))
+        adjadj.add((adj2_id, adj1_id))
+
+    teaminst = {}
+    for conflict in TeamInstitutionConflict.objects.filter(
+            team__tournament=tournament).select_related('institution'):
+        teaminst.setdefault(conflict.team_id, set()).add(conflict.institution)
+
+    adjinst = {}
+    for conflict in AdjudicatorInstitutionConflict.objects.filter(adj_filter).select_related('institution'):
+        adjinst.setdefault(conflict.adjudicator_id, set()).add(conflict.institution)
+
+    return {'adjteam': adjteam, 'adjadj': adjadj, 'teaminst': teaminst, 'adjinst': adjinst}
+
+
+def get_conflicts_index(tournament):
+    """Returns a dict of all conflicts relating to the tournament, from the
+    cache if it's current, otherwise building it from the database."""
+    key = CONFLICTS_INDEX_KEY % (tournament.id, _get_version(CONFLICTS_VERSION_KEY % tournament.id))
+    index = cache.get(key)
+    if index is None:
+        index = _build_conflicts_index(tournament)
+        cache.set(key, index, settings.ALLOCATION_INDEX_CACHE_TIMEOUT)
+        logger.info("Built conflicts index for %s", tournament)
+    return index
+
+
+def _build_history_index(tournament):
+    adjs = DebateAdjudicator.objects.filter(debate__round__tournament=tournament).order_by(
+        'debate_id', 'id').values_list('debate_id', 'debate__round__seq', 'adjudicator_id')
+    teams = DebateTeam.objects.filter(debate__round__tournament=tournament).order_by(
+        'debate_id', 'id').values_list('debate_id', 'team_id')
+    teams_by_debate = {debate_id: [team_id for _, team_id in group]
+                       for debate_id, group in groupby(teams, key=itemgetter(0))}
+
+    # Pairs map to lists of the `seq`s of the rounds in which they met, as in
+    # `HistoryInfo`, except that all rounds are included.
+    adjteam = {}
+    adjadj = {}
+    for debate_id, group in groupby(adjs, key=itemgetter(0)):
+        group = list(group)
+        r = group[0][1]
+        adj_ids = [adj_id for _, _, adj_id in group]
+        for adj_id, team_id in product(adj_ids, teams_by_debate.get(debate_id, [])):
+            adjteam.setdefault((adj_id, team_id), []).append(r)
+        for pair in combinations(adj_ids, 2):
+            adjadj.setdefault(pair, []).append(r)
+
+    return {'adjteam': adjteam, 'adjadj': adjadj}
+
+
+def get_history_index(tournament):
+    """Returns a dict of all history between adjudicators and teams in the
+    tournament, from the cache if it's current, otherwise building it from the
+    database."""
+    key = HISTORY_INDEX_KEY % (tournament.id, _get_version(HISTORY_VERSION_KEY % tournament.id))
+    index = cache.get(key)
+    if index is None:
+        index = _build_history_index(tournament)
+        cache.set(key, index, settings.ALLOCATION_INDEX_CACHE_TIMEOUT)
+        logger.info("Built allocation history index for %s", tournament)
+    return index
+
+
 class ConflictsInfo:
     """Manages information about conflicts between participants.
 
@@ -37,16 +178,37 @@ class ConflictsInfo:
     All queries must relate to teams and adjudicators that were in the QuerySets
     or other iterables that were provided to the constructor.
 
+    If `tournament` is given, conflicts are taken from the tournament's
+    conflicts index instead, which usually avoids hitting the database. All
+    teams and adjudicators must then be in (or shared with) that tournament.
+
     Although the attributes `self.adjteamconflicts`, `self.adjadjconflicts`,
     etc. aren't marked as such, they should be treated a private implementation
     detail that is subject to change. Callers should rely exclusively on
     methods of the class to access conflict information.
     """
 
-    def __init__(self, teams=None, adjudicators=None):
+    def __init__(self, teams=None, adjudicators=None, tournament=None):
         self.teams = teams or Team.objects.none()
         self.adjudicators = adjudicators or Adjudicator.objects.none()
-        self._fetch_conflicts_from_db()
+        if tournament is None:
+            self._fetch_conflicts_from_db()
+        else:
+            self._fetch_conflicts_from_index(get_conflicts_index(tournament))
+
+    def _fetch_conflicts_from_index(self, index):
+        """Takes the conflicts relevant to `self.teams` and `self.adjudicators`
+        from a tournament's conflicts index. The attributes set are the same as
+        with `_fetch_conflicts_from_db()`."""
+        self.adjudicator_ids = {adj.id for adj in self.adjudicators}
+        self.team_ids = {team.id for team in self.teams}
+
+        self.adjteamconflicts = {(adj_id, team_id) for adj_id, team_id in index['adjteam']
+                                 if adj_id in self.adjudicator_ids and team_id in self.team_ids}
+        self.adjadjconflicts = {(adj1_id, adj2_id) for adj1_id, adj2_id in index['adjadj']
+                                if adj1_id in self.adjudicator_ids and adj2_id in self.adjudicator_ids}
+        self.teaminstconflicts = {team_id: index['teaminst'].get(team_id, set()) for team_id in self.team_ids}
+        self.adjinstconflicts = {adj_id: index['adjinst'].get(adj_id, set()) for adj_id in self.adjudicator_ids}
 
     def _fetch_conflicts_from_db(self):
         """Fetches relevant conflicts from the database, based on `self.teams`
@@ -145,6 +307,54 @@ class ConflictsInfo:
         return (self.personal_conflict_adj_adj(adj1, adj2) or
                 self.institutional_conflict_adj_adj(adj1, adj2))
 
+    def _institution_incidence(self, ids, instconflicts, inst_index):
+        """Returns a boolean array of shape (len(ids), len(inst_index)), whose
+        (i, k) element is True if the participant `ids[i]` is conflicted with
+        the institution of index `k`. Institutions not in `inst_index` are
+        ignored."""
+        incidence = np.zeros((len(ids), len(inst_index)), dtype=bool)
+        for i, pk in enumerate(ids):
+            for inst in instconflicts[pk]:
+                if inst.id in inst_index:
+                    incidence[i, inst_index[inst.id]] = True
+        return incidence
+
+    def _institutional_conflict_matrix(self, ids1, instconflicts1, ids2, instconflicts2):
+        # Only institutions on both sides can cause a conflict, so the others
+        # are left out of the incidence matrices.
+        institutions = {inst.id for pk in ids1 for inst in instconflicts1[pk]}
+        institutions &= {inst.id for pk in ids2 for inst in instconflicts2[pk]}
+        inst_index = {inst_id: k for k, inst_id in enumerate(institutions)}
+        a = self._institution_incidence(ids1, instconflicts1, inst_index).astype(np.int32)
+        b = self._institution_incidence(ids2, instconflicts2, inst_index).astype(np.int32)
+        return (a @ b.T) > 0
+
+    def conflict_matrix_adj_team(self, adjudicators, teams):
+        """Returns a boolean NumPy array of shape `(len(adjudicators),
+        len(teams))`, whose (i, j) element is equal to
+        `self.conflict_adj_team(adjudicators[i], teams[j])`."""
+        adj_ids = [adj.id for adj in adjudicators]
+        team_ids = [team.id for team in teams]
+        assert self.adjudicator_ids.issuperset(adj_ids), "adjudicator not covered"
+        assert self.team_ids.issuperset(team_ids), "team not covered"
+        personal = _pairs_matrix(self.adjteamconflicts, adj_ids, team_ids)
+        institutional = self._institutional_conflict_matrix(
+            adj_ids, self.adjinstconflicts, team_ids, self.teaminstconflicts)
+        return personal | institutional
+
+    def conflict_matrix_adj_adj(self, adjudicators1, adjudicators2):
+        """Returns a boolean NumPy array of shape `(len(adjudicators1),
+        len(adjudicators2))`, whose (i, j) element is equal to
+        `self.conflict_adj_adj(adjudicators1[i], adjudicators2[j])`."""
+        ids1 = [adj.id for adj in adjudicators1]
+        ids2 = [adj.id for adj in adjudicators2]
+        assert self.adjudicator_ids.issuperset(ids1), "adjudicator 1 not covered"
+        assert self.adjudicator_ids.issuperset(ids2), "adjudicator 2 not covered"
+        personal = _pairs_matrix(self.adjadjconflicts, ids1, ids2)
+        institutional = self._institutional_conflict_matrix(
+            ids1, self.adjinstconflicts, ids2, self.adjinstconflicts)
+        return personal | institutional
+
     def serialized_by_participant(self):
         """Returns a tuple of two dicts, mapping primary keys of teams and
         adjudicators respectively to a three-key dict
@@ -180,8 +390,9 @@ class HistoryInfo:
     round.
 
     The main purpose of this class is to streamline queries about history. This
-    class hits the database once, on creation, with queries for
-    `DebateAdjudicator` and `DebateTeam`. It then can be used to find
+    class takes its information from the tournament's history index, which is
+    only rebuilt (with queries for `DebateAdjudicator` and `DebateTeam`) when
+    debates in the tournament have changed. It then can be used to find
     efficiently whether particular participants have seen each other, without a
     need for further SQL queries or excessive data processing.
 
@@ -197,20 +408,8 @@ class HistoryInfo:
         self._fetch_histories_from_db()
 
     def _fetch_histories_from_db(self):
-        """Fetches history information from the database, based on `self.teams`
-        and `self.adjudicators`."""
-
-        # The prefetches don't need `.select_related('adjudicator')` and
-        # `.select_related('team')`, because we only deal with the primary keys
-        # of adjudicators and teams.
-
-        debates = Debate.objects.filter(
-            round__tournament=self.tournament,
-            round__seq__lt=self.round.seq,
-        ).prefetch_related(
-            'debateadjudicator_set',
-            'debateteam_set',
-        ).select_related('round')
+        """Fetches history information from the tournament's history index,
+        keeping only rounds before `self.round`."""
 
         # Histories are stored in a dict, where keys are (adj.id, team.id) or
         # (adj1.id, adj2.id) tuples, and values are lists of `seq` integers
@@ -219,24 +418,24 @@ class HistoryInfo:
         # then `self.adjteamhistories[(33, 25)] = [3, 5]`. They're stored in a
         # dict to allow for O(1) lookup for adj-team or adj1-adj2 pairs.
         #
-        # Adjudicator pairs are stored both ways round, i.e., under both
-        # `(adj1.id, adj2.id)` and `(adj2.id, adj1.id)`. If a pair of
-        # participants has not seen each other, they are not in the dict at all;
-        # an empty list is *not* stored to indicate a lack of encounter.
-
-        self.adjteamhistories = {}
-        self.adjadjhistories = {}
-
-        for debate in debates:
-            r = debate.round.seq
-
-            for da, dt in product(debate.debateadjudicator_set.all(), debate.debateteam_set.all()):
-                pair = (da.adjudicator_id, dt.team_id)
-                self.adjteamhistories.setdefault(pair, []).append(r)
-
-            for da1, da2 in combinations(debate.debateadjudicator_set.all(), 2):
-                pair = (da1.adjudicator_id, da2.adjudicator_id)
-                self.adjadjhistories.setdefault(pair, []).append(r)
+        # Adjudicator pairs are stored in the order in which they're listed in
+        # the debate. If a pair of participants has not seen each other, they
+        # are not in the dict at all; an empty list is *not* stored to indicate
+        # a lack of encounter.
+
+        index = get_history_index(self.tournament)
+        seq = self.round.seq
+        self.adjteamhistories = self._before(index['adjteam'], seq)
+        self.adjadjhistories = self._before(index['adjadj'], seq)
+
+    @staticmethod
+    def _before(histories, seq):
+        result = {}
+        for pair, rseqs in histories.items():
+            rseqs = [r for r in rseqs if r < seq]
+            if rseqs:
+                result[pair] = rseqs
+        return result
 
     def seen_adj_team(self, adj, team):
         """Returns True if the adjudicator has seen this team in the history
@@ -248,6 +447,20 @@ class HistoryInfo:
         covered by this object."""
         return (adj1.id, adj2.id) in self.adjadjhistories
 
+    def seen_matrix_adj_team(self, adjudicators, teams):
+        """Returns a boolean NumPy array of shape `(len(adjudicators),
+        len(teams))`, whose (i, j) element is equal to
+        `self.seen_adj_team(adjudicators[i], teams[j])`."""
+        return _pairs_matrix(self.adjteamhistories.keys(),
+            [adj.id for adj in adjudicators], [team.id for team in teams])
+
+    def seen_matrix_adj_adj(self, adjudicators1, adjudicators2):
+        """Returns a boolean NumPy array of shape `(len(adjudicators1),
+        len(adjudicators2))`, whose (i, j) element is equal to
+        `self.seen_adj_adj(adjudicators1[i], adjudicators2[j])`."""
+        return _pairs_matrix(self.adjadjhistories.keys(),
+            [adj.id for adj in adjudicators1], [adj.id for adj in adjudicators2])
+
     def serialized_by_participant(self) -> Tuple[Dict[int, TeamConflicts], Dict[int, AdjudicatorConflicts]]:
         """Returns a tuple of two dicts, mapping primary keys of teams and
         adjudicators respectively to a two-key dict
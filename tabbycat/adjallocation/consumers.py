@@ -13,9 +13,10 @@ from participants.prefetch import populate_win_counts
 from tournaments.models import Round
 from users.permissions import Permission
 
+from .allocation import AdjudicatorAllocation, save_allocations
 from .allocators.base import AdjudicatorAllocationError
 from .allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
-from .models import PreformedPanel
+from .models import DebateAdjudicator, PreformedPanel
 from .preformed import copy_panels_to_debates
 from .preformed.anticipated import calculate_anticipated_draw
 from .preformed.direct import DirectPreformedPanelAllocator
@@ -40,7 +41,7 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
     def _apply_allocation_settings(self, round, settings):
         t = round.tournament
         for key, value in settings.items():
-            if key in ("usePreformedPanels", "allocationMethod"):
+            if key in ("usePreformedPanels", "allocationMethod", "keepExistingAllocations"):
                 # Passing this here is much easier than splitting the function
                 continue # (Not actually a preference; just a toggle from Vue)
             # No way to force front-end to only accept floats/integers :(
@@ -53,6 +54,17 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             else:
                 t.preferences[key] = value
 
+    def _exclude_existing_allocations(self, round, debates, adjs):
+        """Returns the debates and adjudicators left to allocate if debates
+        that already have a chair are kept as they are, and the number of
+        debates kept. Adjudicators in kept debates are left out of the
+        allocation; adjudicators in other debates are reallocated."""
+        kept = DebateAdjudicator.objects.filter(debate__round=round,
+            type=DebateAdjudicator.TYPE_CHAIR).values_list('debate_id', flat=True)
+        kept = set(kept)
+        used = DebateAdjudicator.objects.filter(debate_id__in=kept).values_list('adjudicator_id', flat=True)
+        return debates.exclude(id__in=kept), adjs.exclude(id__in=used), len(kept)
+
     def allocate_debate_adjs(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
         self._apply_allocation_settings(round, event['extra']['settings'])
@@ -93,7 +105,16 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             logger.info("Allocating debate adjudicators using traditional allocator")
 
             debates = round.debate_set.all()
-            adjs = round.active_adjudicators.all()
+            adjs = round.active_adjudicators.select_related('institution')
+
+            if event['extra']['settings'].get('keepExistingAllocations'):
+                debates, adjs, nkept = self._exclude_existing_allocations(round, debates, adjs)
+                if not debates.exists():
+                    self.return_error(event['extra']['group_name'],
+                        _("All debates already have a chair. Remove the adjudicators from the debates "
+                          "you want to reallocate, or allocate without keeping existing allocations."))
+                    return
+                logger.info("Keeping allocations of %d debates, allocating %d debates", nkept, debates.count())
 
             try:
                 if round.ballots_per_debate == 'per-adj':
@@ -105,8 +126,13 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                 self.return_error(event['extra']['group_name'], str(e))
                 return
 
-            for alloc in allocation:
-                alloc.save()
+            if event['extra']['settings'].get('keepExistingAllocations'):
+                # Clear debates the allocator left empty, whose adjudicators
+                # may have been allocated elsewhere
+                allocated = {aa.container.id for aa in allocation}
+                allocation += [AdjudicatorAllocation(debate) for debate in debates if debate.id not in allocated]
+
+            save_allocations(allocation)
 
             self.log_action(event['extra'], round, ActionLogEntry.ActionType.ADJUDICATORS_AUTO)
 
@@ -150,8 +176,7 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             self.return_error(event['extra']['group_name'], str(e))
             return
 
-        for alloc in allocation:
-            alloc.save()
+        save_allocations(allocation)
 
         self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_ADJUDICATOR_AUTO)
         content = self.reserialize_panels(SimplePanelAllocationSerializer, round)
@@ -1,5 +1,6 @@
 from django.db.models import F
 
+from adjallocation.conflicts import bump_conflicts_version
 from utils.management.base import TournamentCommand
 
 
@@ -19,6 +20,7 @@ class Command(TournamentCommand):
             self.add_for_queryset(tournament.adjudicator_set)
         if not options["adjudicators_only"]:
             self.add_for_queryset(tournament.team_set)
+        bump_conflicts_version(tournament.id)
 
     def add_for_queryset(self, qs):
         conflict_model = qs.model.institution_conflicts.through
@@ -46,7 +46,7 @@ class BasePreformedPanelAllocator:
 
         teams = Team.objects.filter(debateteam__debate__in=debates)
         adjudicators = Adjudicator.objects.filter(preformedpaneladjudicator__panel__in=panels)
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
+        self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators, tournament=self.tournament)
         self.history = HistoryInfo(round=round)
 
     def allocate(self):
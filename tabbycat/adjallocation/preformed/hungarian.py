@@ -1,6 +1,6 @@
 import logging
 
-from munkres import Munkres
+from draw.generator.assignment import solve_assignment
 
 from .base import BasePreformedPanelAllocator, register
 
@@ -19,8 +19,7 @@ class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
         self.conflict_penalty = t.pref('adj_conflict_penalty')
         self.history_penalty = t.pref('adj_history_penalty')
         self.mismatch_penalty = t.pref('preformed_panel_mismatch_penalty')
-
-        self.munkres = Munkres()
+        self.assignment_solver = t.pref('assignment_solver')
 
     def calc_cost(self, debate, panel):
         cost = 0
@@ -42,7 +41,7 @@ class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
         ]
 
         logger.info("optimizing panels (matrix size: %d debates by %d panels", len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
+        indices = solve_assignment(cost_matrix, self.assignment_solver)
         indices.sort()
         total_cost = sum(cost_matrix[i][j] for i, j in indices)
         logger.info("total cost: %f", total_cost)
@@ -0,0 +1,92 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from draw.signals import get_debate_tournament_id
+from participants.models import Adjudicator, Institution, Team
+from tournaments.models import Round, Tournament
+from utils.cache import invalidate_tags
+
+from .conflicts import bump_conflicts_version, bump_history_version
+from .models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
+                     AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+
+
+def _invalidate_conflicts(*tournament_ids):
+    # Conflicts are also shown on teams and adjudicators in the API
+    bump_conflicts_version(*tournament_ids)
+    for tournament_id in tournament_ids:
+        invalidate_tags(tournament_id, 'participants')
+
+
+def _bump_for_adjudicators(*adj_ids):
+    # Conflicts of shared adjudicators (with no tournament) apply to all tournaments
+    tournament_ids = set(Adjudicator.objects.filter(id__in=adj_ids).values_list('tournament_id', flat=True))
+    if None in tournament_ids:
+        tournament_ids = Tournament.objects.values_list('id', flat=True)
+    _invalidate_conflicts(*tournament_ids)
+
+
+@receiver(post_delete, sender=AdjudicatorTeamConflict)
+@receiver(post_save, sender=AdjudicatorTeamConflict)
+@receiver(post_delete, sender=TeamInstitutionConflict)
+@receiver(post_save, sender=TeamInstitutionConflict)
+def invalidate_conflicts_on_team_conflict_change(sender, instance, **kwargs):
+    tournament_id = Team.objects.filter(id=instance.team_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        _invalidate_conflicts(tournament_id)
+
+
+@receiver(post_delete, sender=AdjudicatorInstitutionConflict)
+@receiver(post_save, sender=AdjudicatorInstitutionConflict)
+def invalidate_conflicts_on_adj_conflict_change(sender, instance, **kwargs):
+    _bump_for_adjudicators(instance.adjudicator_id)
+
+
+@receiver(post_delete, sender=AdjudicatorAdjudicatorConflict)
+@receiver(post_save, sender=AdjudicatorAdjudicatorConflict)
+def invalidate_conflicts_on_adj_adj_conflict_change(sender, instance, **kwargs):
+    _bump_for_adjudicators(instance.adjudicator1_id, instance.adjudicator2_id)
+
+
+@receiver(m2m_changed, sender=Adjudicator.institution_conflicts.through)
+@receiver(m2m_changed, sender=Adjudicator.team_conflicts.through)
+@receiver(m2m_changed, sender=Adjudicator.adjudicator_conflicts.through)
+@receiver(m2m_changed, sender=Team.institution_conflicts.through)
+def invalidate_conflicts_on_m2m_change(sender, instance, action, pk_set, **kwargs):
+    # Adding, removing and setting conflicts through a related manager (as the
+    # API does) doesn't send post_save or post_delete for the through model.
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Adjudicator):
+        adj_ids = [instance.id]
+        if sender is AdjudicatorAdjudicatorConflict and pk_set:
+            adj_ids.extend(pk_set)
+        _bump_for_adjudicators(*adj_ids)
+    elif isinstance(instance, Team):
+        _invalidate_conflicts(instance.tournament_id)
+    else:  # an institution, whose teams and adjudicators could be anywhere
+        _invalidate_conflicts(*Tournament.objects.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Institution)
+def invalidate_conflicts_on_institution_change(sender, instance, created, **kwargs):
+    # Conflicts indices hold institution objects, for their names and codes
+    if not created:
+        bump_conflicts_version(*Tournament.objects.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+def invalidate_history_on_debate_change(sender, instance, **kwargs):
+    tournament_id = get_debate_tournament_id(instance)
+    if tournament_id is not None:
+        bump_history_version(tournament_id)
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+def invalidate_history_on_round_change(sender, instance, **kwargs):
+    bump_history_version(instance.tournament_id)
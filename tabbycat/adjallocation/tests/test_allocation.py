@@ -0,0 +1,102 @@
+from django.test import TestCase
+
+from adjallocation.allocation import AdjudicatorAllocation, save_adjudicator_types, save_allocations
+from adjallocation.models import DebateAdjudicator, PreformedPanel, PreformedPanelAdjudicator
+from draw.models import Debate
+from participants.models import Adjudicator
+from tournaments.models import Round, Tournament
+from utils.cache import get_tagged_version, round_tag
+
+
+class TestSaveAllocations(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="saveallocationstest", name="Save allocations test")
+        self.round = Round.objects.create(tournament=self.tournament, seq=1)
+        self.debates = [Debate.objects.create(round=self.round) for i in range(3)]
+        self.adjs = [Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator %d" % i)
+                     for i in range(9)]
+
+    def tearDown(self):
+        self.tournament.delete()
+
+    def get_rows(self):
+        return set(DebateAdjudicator.objects.filter(debate__round=self.round).values_list(
+            'debate_id', 'adjudicator_id', 'type'))
+
+    def expected_rows(self, allocations):
+        return {(alloc.container.id, adj.id, t) for alloc in allocations for adj, t in alloc.with_debateadj_types()}
+
+    def test_save_new(self):
+        a = self.adjs
+        allocations = [
+            AdjudicatorAllocation(self.debates[0], chair=a[0], panellists=[a[1], a[2]]),
+            AdjudicatorAllocation(self.debates[1], chair=a[3], trainees=[a[4]]),
+            AdjudicatorAllocation(self.debates[2], chair=a[5]),
+        ]
+        with self.assertNumQueries(4):  # savepoint, select, insert, release
+            save_allocations(allocations)
+        self.assertEqual(self.get_rows(), self.expected_rows(allocations))
+
+    def test_save_changes(self):
+        a = self.adjs
+        save_allocations([
+            AdjudicatorAllocation(self.debates[0], chair=a[0], panellists=[a[1], a[2]]),
+            AdjudicatorAllocation(self.debates[1], chair=a[3], trainees=[a[4]]),
+            AdjudicatorAllocation(self.debates[2], chair=a[5]),
+        ])
+        allocations = [
+            AdjudicatorAllocation(self.debates[0], chair=a[1], panellists=[a[0], a[6]]),
+            AdjudicatorAllocation(self.debates[1], chair=a[4], trainees=[a[3]]),
+        ]
+        save_allocations(allocations)
+        expected = self.expected_rows(allocations) | {(self.debates[2].id, a[5].id, DebateAdjudicator.TYPE_CHAIR)}
+        self.assertEqual(self.get_rows(), expected)
+
+    def test_same_as_save(self):
+        a = self.adjs
+        DebateAdjudicator.objects.create(debate=self.debates[0], adjudicator=a[7], type=DebateAdjudicator.TYPE_CHAIR)
+        alloc = AdjudicatorAllocation(self.debates[0], chair=a[0], panellists=[a[7], a[8]])
+        alloc.save()
+        expected = self.get_rows()
+        DebateAdjudicator.objects.all().delete()
+
+        DebateAdjudicator.objects.create(debate=self.debates[0], adjudicator=a[7], type=DebateAdjudicator.TYPE_CHAIR)
+        save_allocations([alloc])
+        self.assertEqual(self.get_rows(), expected)
+
+    def test_preformed_panels(self):
+        a = self.adjs
+        panel = PreformedPanel.objects.create(round=self.round)
+        save_allocations([AdjudicatorAllocation(panel, chair=a[0], panellists=[a[1], a[2]])])
+        self.assertEqual(PreformedPanelAdjudicator.objects.filter(panel=panel).count(), 3)
+        self.assertEqual(AdjudicatorAllocation(panel, from_db=True).chair, a[0])
+
+    def test_changed_containers(self):
+        a = self.adjs
+        C, P = DebateAdjudicator.TYPE_CHAIR, DebateAdjudicator.TYPE_PANEL  # noqa: N806
+        save_adjudicator_types(self.debates, {
+            self.debates[0].id: {a[0].id: C, a[1].id: P},
+            self.debates[1].id: {a[2].id: C},
+            self.debates[2].id: {a[3].id: C},
+        })
+        changed = save_adjudicator_types(self.debates, {
+            self.debates[0].id: {a[1].id: C, a[0].id: P},  # swapped
+            self.debates[1].id: {a[2].id: C},               # unchanged
+            self.debates[2].id: {a[3].id: C, a[4].id: P},  # added
+        })
+        self.assertEqual(changed, {self.debates[0].id, self.debates[2].id})
+        self.assertEqual(save_adjudicator_types(self.debates[:1], {self.debates[0].id: {}}), {self.debates[0].id})
+        self.assertIn((self.debates[1].id, a[2].id, C), self.get_rows())
+
+    def test_invalidates_draw(self):
+        a = self.adjs
+        save_allocations([AdjudicatorAllocation(self.debates[0], chair=a[0])])
+        tags = [round_tag('draw', self.round.id)]
+        before = get_tagged_version(self.tournament.id, tags)
+        save_allocations([AdjudicatorAllocation(self.debates[0], chair=a[0], panellists=[a[1]])])
+        self.assertNotEqual(get_tagged_version(self.tournament.id, tags), before)
+
+    def test_empty(self):
+        with self.assertNumQueries(0):
+            save_allocations([])
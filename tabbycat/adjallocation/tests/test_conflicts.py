@@ -0,0 +1,146 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from adjallocation.allocation import AdjudicatorAllocation, save_allocations
+from adjallocation.conflicts import ConflictsInfo, HistoryInfo
+from adjallocation.models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
+                                  AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+from draw.models import Debate, DebateTeam
+from draw.types import DebateSide
+from participants.models import Adjudicator, Institution, Team
+from tournaments.models import Round, Tournament
+
+
+class TestConflictsIndex(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(slug="conflictsindextest", name="Conflicts index test")
+        self.institutions = [Institution.objects.create(name="Institution %d" % i, code="I%d" % i) for i in range(3)]
+        self.teams = [Team.objects.create(tournament=self.tournament, reference="Team %d" % i,
+                      institution=self.institutions[i % 3]) for i in range(4)]
+        self.adjs = [Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator %d" % i,
+                     institution=self.institutions[i % 3]) for i in range(4)]
+        self.shared_adj = Adjudicator.objects.create(tournament=None, name="Shared adjudicator")
+
+        AdjudicatorTeamConflict.objects.create(adjudicator=self.adjs[0], team=self.teams[1])
+        AdjudicatorAdjudicatorConflict.objects.create(adjudicator1=self.adjs[1], adjudicator2=self.shared_adj)
+        for team in self.teams:
+            TeamInstitutionConflict.objects.create(team=team, institution=team.institution)
+        for adj in self.adjs:
+            AdjudicatorInstitutionConflict.objects.create(adjudicator=adj, institution=adj.institution)
+
+    def tearDown(self):
+        self.tournament.delete()
+        self.shared_adj.delete()
+        for institution in self.institutions:
+            institution.delete()
+        cache.clear()
+
+    def assertSameConflicts(self, teams, adjs):  # noqa: N802
+        from_db = ConflictsInfo(teams=teams, adjudicators=adjs)
+        from_index = ConflictsInfo(teams=teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertEqual(from_index.adjteamconflicts, from_db.adjteamconflicts)
+        self.assertEqual(from_index.adjadjconflicts, from_db.adjadjconflicts)
+        self.assertEqual(from_index.teaminstconflicts, from_db.teaminstconflicts)
+        self.assertEqual(from_index.adjinstconflicts, from_db.adjinstconflicts)
+
+    def test_same_as_db(self):
+        adjs = self.adjs + [self.shared_adj]
+        self.assertSameConflicts(self.teams, adjs)
+        self.assertSameConflicts(self.teams[:2], adjs[1:])
+
+    def test_cached(self):
+        adjs = self.adjs + [self.shared_adj]
+        ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        with self.assertNumQueries(0):
+            conflicts = ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertTrue(conflicts.personal_conflict_adj_adj(self.shared_adj, self.adjs[1]))
+
+    def test_invalidated_on_change(self):
+        adjs = self.adjs + [self.shared_adj]
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertFalse(conflicts.personal_conflict_adj_team(self.adjs[2], self.teams[3]))
+
+        conflict = AdjudicatorTeamConflict.objects.create(adjudicator=self.adjs[2], team=self.teams[3])
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertTrue(conflicts.personal_conflict_adj_team(self.adjs[2], self.teams[3]))
+
+        conflict.delete()
+        AdjudicatorInstitutionConflict.objects.create(adjudicator=self.shared_adj, institution=self.institutions[0])
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertFalse(conflicts.personal_conflict_adj_team(self.adjs[2], self.teams[3]))
+        self.assertTrue(conflicts.institutional_conflict_adj_team(self.shared_adj, self.teams[0]))
+
+    def test_invalidated_on_related_set(self):
+        # Related managers add and remove through-model rows without save or delete signals
+        adjs = self.adjs + [self.shared_adj]
+        ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+
+        self.adjs[2].team_conflicts.set([self.teams[3]])
+        self.teams[3].institution_conflicts.add(self.institutions[1])
+        self.adjs[3].adjudicator_conflicts.add(self.adjs[0])
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertTrue(conflicts.personal_conflict_adj_team(self.adjs[2], self.teams[3]))
+        self.assertTrue(conflicts.institutional_conflict_adj_team(self.adjs[1], self.teams[3]))
+        self.assertTrue(conflicts.personal_conflict_adj_adj(self.adjs[0], self.adjs[3]))
+
+        self.adjs[2].team_conflicts.clear()
+        self.institutions[1].team_inst_conflicts.remove(self.teams[3])
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=adjs, tournament=self.tournament)
+        self.assertFalse(conflicts.personal_conflict_adj_team(self.adjs[2], self.teams[3]))
+        self.assertFalse(conflicts.institutional_conflict_adj_team(self.adjs[1], self.teams[3]))
+
+
+class TestHistoryIndex(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(slug="historyindextest", name="History index test")
+        self.rounds = [Round.objects.create(tournament=self.tournament, seq=i) for i in range(1, 4)]
+        self.teams = [Team.objects.create(tournament=self.tournament, reference="Team %d" % i) for i in range(4)]
+        self.adjs = [Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator %d" % i)
+                     for i in range(4)]
+
+    def tearDown(self):
+        cache.clear()
+
+    def add_debate(self, round, teams, chair, panellists=[]):
+        debate = Debate.objects.create(round=round)
+        for team, side in zip(teams, [DebateSide.AFF, DebateSide.NEG]):
+            DebateTeam.objects.create(debate=debate, team=team, side=side)
+        save_allocations([AdjudicatorAllocation(debate, chair=chair, panellists=panellists)])
+        return debate
+
+    def test_history(self):
+        t, a = self.teams, self.adjs
+        self.add_debate(self.rounds[0], [t[0], t[1]], a[0], [a[1]])
+        self.add_debate(self.rounds[1], [t[0], t[2]], a[0])
+        self.add_debate(self.rounds[2], [t[1], t[3]], a[2], [a[3]])
+
+        history = HistoryInfo(self.rounds[2])
+        self.assertEqual(history.adjteamhistories[(a[0].id, t[0].id)], [1, 2])
+        self.assertTrue(history.seen_adj_team(a[1], t[1]))
+        self.assertFalse(history.seen_adj_team(a[2], t[1]))
+        self.assertEqual(len(history.adjadjhistories), 1)
+        self.assertNotIn((a[2].id, a[3].id), history.adjadjhistories)
+
+        history = HistoryInfo(self.rounds[1])
+        self.assertEqual(history.adjteamhistories[(a[0].id, t[0].id)], [1])
+        self.assertFalse(history.seen_adj_team(a[0], t[2]))
+
+    def test_invalidated_on_allocation(self):
+        t, a = self.teams, self.adjs
+        debate = self.add_debate(self.rounds[0], [t[0], t[1]], a[0])
+        self.assertTrue(HistoryInfo(self.rounds[1]).seen_adj_team(a[0], t[0]))
+
+        with self.assertNumQueries(0):
+            HistoryInfo(self.rounds[1])
+
+        save_allocations([AdjudicatorAllocation(debate, chair=a[2])])
+        history = HistoryInfo(self.rounds[1])
+        self.assertFalse(history.seen_adj_team(a[0], t[0]))
+        self.assertTrue(history.seen_adj_team(a[2], t[0]))
+
+        DebateAdjudicator.objects.filter(debate=debate).delete()
+        self.assertFalse(HistoryInfo(self.rounds[1]).seen_adj_team(a[2], t[0]))
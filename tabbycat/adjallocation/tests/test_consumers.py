@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from adjallocation.consumers import AdjudicatorAllocationWorkerConsumer
+from adjallocation.models import DebateAdjudicator
+from availability.utils import activate_all
+from tournaments.models import Round
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestKeepExistingAllocations(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.round.draw_status = Round.Status.CONFIRMED
+        self.round.save()
+        activate_all(self.round)
+        self.user = get_user_model().objects.create(username='test_admin', is_superuser=True)
+        self.channel_layer = mock.Mock(group_send=mock.AsyncMock())
+        patcher = mock.patch('draw.consumers.get_channel_layer', return_value=self.channel_layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def allocate(self):
+        AdjudicatorAllocationWorkerConsumer().allocate_debate_adjs({'extra': {
+            'round_id': self.round.id,
+            'user_id': self.user.id,
+            'group_name': "debates_test",
+            'settings': {'usePreformedPanels': False, 'keepExistingAllocations': True},
+        }})
+        return self.channel_layer.group_send.call_args.args[1]['content']['message']
+
+    def allocations(self, debates):
+        return set(DebateAdjudicator.objects.filter(debate__in=debates).values_list(
+            'debate_id', 'adjudicator_id', 'type'))
+
+    def test_keeps_debates_with_chairs(self):
+        debates = list(self.round.debate_set.order_by('id'))
+        kept, cleared = debates[:3], debates[3:]
+        DebateAdjudicator.objects.filter(debate__in=cleared).exclude(
+            type=DebateAdjudicator.TYPE_TRAINEE).delete()
+        before = self.allocations(kept)
+
+        message = self.allocate()
+        self.assertNotEqual(message['type'], 'danger')
+        self.assertEqual(self.allocations(kept), before)
+
+        chairs = DebateAdjudicator.objects.filter(debate__in=cleared, type=DebateAdjudicator.TYPE_CHAIR)
+        self.assertEqual(chairs.count(), len(cleared))
+        adj_ids = DebateAdjudicator.objects.filter(debate__round=self.round).values_list('adjudicator_id', flat=True)
+        self.assertEqual(len(adj_ids), len(set(adj_ids)))
+
+    def test_all_debates_kept(self):
+        before = self.allocations(self.round.debate_set.all())
+        message = self.allocate()
+        self.assertEqual(message['type'], 'danger')
+        self.assertEqual(self.allocations(self.round.debate_set.all()), before)
@@ -0,0 +1,159 @@
+import random
+import unittest
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest import mock
+
+from ..allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
+from ..conflicts import ConflictsInfo, HistoryInfo
+
+Institution = namedtuple('Institution', ['id'])
+
+
+class DummyDebate(SimpleNamespace):
+    """Hashable stand-in for a debate, for use as an allocation container."""
+    __hash__ = object.__hash__
+
+
+class DummyConflictsInfo(ConflictsInfo):
+    """ConflictsInfo with randomly generated conflicts instead of ones from
+    the database."""
+
+    def __init__(self, rng, teams, adjudicators, institutions):
+        self.teams = teams
+        self.adjudicators = adjudicators
+        self.adjudicator_ids = {adj.id for adj in adjudicators}
+        self.team_ids = {team.id for team in teams}
+        self.adjteamconflicts = {(adj.id, team.id) for adj in adjudicators for team in teams
+                                 if rng.random() < 0.05}
+        self.adjadjconflicts = set()
+        for adj1 in adjudicators:
+            for adj2 in adjudicators:
+                if adj1 is not adj2 and rng.random() < 0.05:
+                    self.adjadjconflicts.add((adj1.id, adj2.id))
+                    self.adjadjconflicts.add((adj2.id, adj1.id))
+        self.teaminstconflicts = {team.id: {rng.choice(institutions)} for team in teams}
+        self.adjinstconflicts = {adj.id: set(rng.sample(institutions, rng.randint(0, 2)))
+                                 for adj in adjudicators}
+
+
+class DummyHistoryInfo(HistoryInfo):
+    """HistoryInfo with randomly generated histories instead of ones from the
+    database."""
+
+    def __init__(self, rng, teams, adjudicators):
+        self.adjteamhistories = {(adj.id, team.id): [1] for adj in adjudicators for team in teams
+                                 if rng.random() < 0.1}
+        self.adjadjhistories = {(adj1.id, adj2.id): [1] for adj1 in adjudicators for adj2 in adjudicators
+                                if adj1 is not adj2 and rng.random() < 0.1}
+
+
+class TestHungarianCostMatrix(unittest.TestCase):
+    """Checks that the vectorized cost matrix matches the scalar cost function
+    element by element."""
+
+    def setUp(self):
+        rng = random.Random(8125)
+        institutions = [Institution(i) for i in range(6)]
+        self.teams = [SimpleNamespace(id=i) for i in range(24)]
+        self.adjs = [SimpleNamespace(id=i, _normalized_score=rng.uniform(-0.5, 5.5)) for i in range(30)]
+        self.debates = [SimpleNamespace(importance=rng.randint(-2, 2), teams=self.teams[i:i+2])
+                        for i in range(0, len(self.teams), 2)]
+
+        self.allocator = VotingHungarianAllocator.__new__(VotingHungarianAllocator)
+        self.allocator.conflict_penalty = 1000000
+        self.allocator.history_penalty = 10000
+        self.allocator.max_score = 5.0
+        self.allocator.conflicts = DummyConflictsInfo(rng, self.teams, self.adjs, institutions)
+        self.allocator.history = DummyHistoryInfo(rng, self.teams, self.adjs)
+
+    def assertMatrixMatches(self, matrix, debates, adjs, adjustments, chairs):  # noqa: N802
+        self.assertEqual(matrix.shape, (len(debates), len(adjs)))
+        for i, (debate, adjustment, chair) in enumerate(zip(debates, adjustments, chairs)):
+            for j, adj in enumerate(adjs):
+                with self.subTest(row=i, col=j):
+                    expected = self.allocator.calc_cost(debate, adj, adjustment, chair)
+                    self.assertAlmostEqual(matrix[i, j], expected, delta=abs(expected) * 1e-12)
+
+    def test_plain(self):
+        matrix = self.allocator.calc_cost_matrix(self.debates, self.adjs)
+        n = len(self.debates)
+        self.assertMatrixMatches(matrix, self.debates, self.adjs, [0] * n, [None] * n)
+
+    def test_repeated_debates_with_adjustments(self):
+        debates = [debate for debate in self.debates for i in range(3)]
+        adjustments = [-i for debate in self.debates for i in range(3)]
+        matrix = self.allocator.calc_cost_matrix(debates, self.adjs, adjustments=adjustments)
+        self.assertMatrixMatches(matrix, debates, self.adjs, adjustments, [None] * len(debates))
+
+    def test_chairs(self):
+        chairs = self.adjs[:len(self.debates)]
+        chairs[3] = None
+        trainees = self.adjs[len(self.debates):]
+        adjustments = [-2.0] * len(self.debates)
+        matrix = self.allocator.calc_cost_matrix(self.debates, trainees, adjustments=adjustments, chairs=chairs)
+        self.assertMatrixMatches(matrix, self.debates, trainees, adjustments, chairs)
+
+
+class TestMultiRestartAllocation(unittest.TestCase):
+    """Checks that a multi-restart allocation keeps its best attempt and
+    respects its time limit."""
+
+    def make_allocator(self, allocator_class, restarts, time_limit):
+        rng = random.Random(3716)
+        institutions = [Institution(i) for i in range(6)]
+        regions = [None, 1, 2, 3]
+        teams = [SimpleNamespace(id=i) for i in range(16)]
+        adjs = []
+        for i in range(30):
+            region_id = rng.choice(regions)
+            adjs.append(SimpleNamespace(id=i, trainee=False, _normalized_score=rng.uniform(0, 5),
+                        _weighted_score=rng.uniform(0, 5), institution_id=i % 6,
+                        institution=SimpleNamespace(region_id=region_id)))
+        debates = [DummyDebate(importance=rng.randint(-1, 1), room_rank=i, teams=teams[2*i:2*i+2])
+                   for i in range(8)]
+
+        allocator = allocator_class.__new__(allocator_class)
+        allocator.debates = debates
+        allocator.adjudicators = adjs
+        allocator.min_voting_score = 1.0
+        allocator.max_score = 5.0
+        allocator.conflict_penalty = 1000000
+        allocator.history_penalty = 10000
+        allocator.no_panellists = False
+        allocator.no_trainees = False
+        allocator.assignment_solver = "jv"
+        allocator.restarts = restarts
+        allocator.time_limit = time_limit
+        allocator.user_warnings = []
+        allocator.conflicts = DummyConflictsInfo(rng, teams, adjs, institutions)
+        allocator.history = DummyHistoryInfo(rng, teams, adjs)
+        return allocator
+
+    def run_restarts(self, allocator):
+        scores = []
+
+        def score_allocation(allocation):
+            score = type(allocator).score_allocation(allocator, allocation)
+            scores.append(score)
+            return score
+
+        with mock.patch.object(allocator, 'score_allocation', side_effect=score_allocation):
+            allocation = allocator.run_restarts()
+        return allocation, scores
+
+    def test_keeps_best(self):
+        for allocator_class in [VotingHungarianAllocator, ConsensusHungarianAllocator]:
+            with self.subTest(allocator=allocator_class.__name__):
+                allocator = self.make_allocator(allocator_class, restarts=6, time_limit=60)
+                allocation, scores = self.run_restarts(allocator)
+                self.assertEqual(len(scores), 6)
+                self.assertEqual(allocator.score_allocation(allocation), min(scores))
+                self.assertEqual(len(allocation), len(allocator.debates))
+                self.assertEqual(allocator.perturbation, 0.0)
+
+    def test_time_limit(self):
+        allocator = self.make_allocator(VotingHungarianAllocator, restarts=6, time_limit=0)
+        allocation, scores = self.run_restarts(allocator)
+        self.assertEqual(len(scores), 1)
+        self.assertEqual(len(allocation), len(allocator.debates))
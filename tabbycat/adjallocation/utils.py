@@ -9,14 +9,21 @@ from participants.models import Adjudicator, Team
 from .conflicts import ConflictsInfo
 
 
-def adjudicator_conflicts_display(debates):
+def adjudicator_conflicts_display(debates, tournament=None):
     """Returns a dict mapping elements (debates) in `debates` to a list of
     strings of explaining conflicts between adjudicators and teams, and
-    conflicts between adjudicators and each other."""
-
-    adjudicators = Adjudicator.objects.filter(debateadjudicator__debate__in=debates)
-    teams = Team.objects.filter(debateteam__debate__in=debates)
-    conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
+    conflicts between adjudicators and each other. If `tournament` is given,
+    conflicts are taken from its conflicts index."""
+
+    if tournament is None:
+        adjudicators = Adjudicator.objects.filter(debateadjudicator__debate__in=debates)
+        teams = Team.objects.filter(debateteam__debate__in=debates)
+    else:
+        # Use the (normally prefetched) participants of the debates, so that
+        # with the index, this needs no queries
+        adjudicators = {adj for debate in debates for adj in debate.adjudicators.all()}
+        teams = {team for debate in debates for team in debate.teams}
+    conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators, tournament=tournament)
 
     conflict_messages = {debate: [] for debate in debates}
 
@@ -50,6 +50,8 @@ class BaseEditDebateOrPanelAdjudicatorsView(DebateDragAndDropMixin, Administrato
             'draw_rules__adj_min_voting_score',
             'draw_rules__adj_conflict_penalty',
             'draw_rules__adj_history_penalty',
+            'draw_rules__adj_allocation_restarts',
+            'draw_rules__adj_allocation_time_limit',
             'draw_rules__preformed_panel_mismatch_penalty',
             'draw_rules__no_trainee_position',
             'draw_rules__no_panellist_position',
@@ -74,7 +76,8 @@ class BaseEditDebateOrPanelAdjudicatorsView(DebateDragAndDropMixin, Administrato
 
     def get_adjudicator_conflicts(self):
         conflicts = ConflictsInfo(teams=self.tournament.team_set.all(),
-                                  adjudicators=self.tournament.adjudicator_set.all())
+                                  adjudicators=self.tournament.adjudicator_set.all(),
+                                  tournament=self.tournament)
         team_conflicts, adj_conflicts = conflicts.serialized_by_participant()
         return {'teams': team_conflicts, 'adjudicators': adj_conflicts}
 
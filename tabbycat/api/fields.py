@@ -1,8 +1,9 @@
+import re
 from urllib import parse
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
-from django.urls import get_script_prefix, resolve, Resolver404
+from django.urls import get_script_prefix, NoReverseMatch, resolve, Resolver404
 from django.utils.encoding import uri_to_iri
 from drf_spectacular.utils import extend_schema_field
 from rest_framework.relations import Hyperlink, HyperlinkedIdentityField, HyperlinkedRelatedField, SlugRelatedField
@@ -15,6 +16,44 @@ from venues.models import Venue
 
 from .utils import is_staff
 
+URL_PLACEHOLDER = 7300013700
+URL_TEMPLATE_SAFE_VALUE = re.compile(r'^[-a-zA-Z0-9_]+$')
+
+
+def get_url_template(view_name, names, request, format):
+    """Returns a template for the URL of `view_name`, with fields named after
+    the URL kwargs in `names`, or None if one can't be made."""
+    placeholders = [str(URL_PLACEHOLDER + i) for i in range(len(names))]
+    try:
+        url = reverse(view_name, kwargs=dict(zip(names, placeholders)), request=request, format=format)
+    except NoReverseMatch:
+        return None
+    if any(url.count(placeholder) != 1 for placeholder in placeholders):
+        return None
+    template = url.replace('{', '{{').replace('}', '}}')
+    for name, placeholder in zip(names, placeholders):
+        template = template.replace(placeholder, '{%s}' % name)
+    return template
+
+
+def reverse_from_template(view_name, kwargs, request, format):
+    """Equivalent to `reverse()`, but only reverses each view once per request,
+    and fills in a template after that. Lists reverse the same few view names
+    for every object (and every team, speaker, etc. in it), and resolving them
+    from scratch is most of the time it takes to serialize them."""
+    if request is None or not all(URL_TEMPLATE_SAFE_VALUE.match(str(value)) for value in kwargs.values()):
+        return reverse(view_name, kwargs=kwargs, request=request, format=format)
+
+    templates = getattr(request, '_url_templates', None)
+    if templates is None:
+        templates = request._url_templates = {}
+    key = (view_name, tuple(kwargs), format)
+    if key not in templates:
+        templates[key] = get_url_template(view_name, tuple(kwargs), request, format)
+    if templates[key] is None:
+        return reverse(view_name, kwargs=kwargs, request=request, format=format)
+    return templates[key].format(**kwargs)
+
 
 class TournamentHyperlinkedRelatedField(HyperlinkedRelatedField):
     default_tournament_field = 'tournament'
@@ -38,14 +77,24 @@ class TournamentHyperlinkedRelatedField(HyperlinkedRelatedField):
         return kwargs
 
     def get_url(self, obj, view_name, request, format):
-        return reverse(view_name, kwargs=self.get_url_kwargs(obj), request=request, format=format)
+        return reverse_from_template(view_name, self.get_url_kwargs(obj), request, format)
 
     def get_object(self, view_name, view_args, view_kwargs):
         lookup_value = view_kwargs[self.lookup_url_kwarg]
         lookup_kwargs = {
             self.lookup_field: lookup_value,
         }
-        return self.get_queryset().get(**lookup_kwargs)
+
+        # Bulk requests share a dict of the objects already looked up, as
+        # many of their objects refer to the same teams, questions, etc.
+        related_objects = self.context.get('related_objects')
+        if related_objects is None:
+            return self.get_queryset().get(**lookup_kwargs)
+
+        key = (view_name, self.lookup_field, str(lookup_value))
+        if key not in related_objects:
+            related_objects[key] = self.get_queryset().get(**lookup_kwargs)
+        return related_objects[key]
 
     def lookup_kwargs(self):
         return {self.tournament_field: self.context['tournament']}
@@ -160,6 +209,11 @@ class CreatableSlugRelatedField(SlugRelatedField):
 
 class ParticipantAvailabilityForeignKeyField(TournamentHyperlinkedRelatedField):
     default_tournament_field = 'round__tournament'
+    models = {
+        'api-adjudicator-detail': Adjudicator,
+        'api-team-detail': Team,
+        'api-venue-detail': Venue,
+    }
 
     def get_tournament(self, obj):
         return obj.round.tournament
@@ -175,13 +229,9 @@ class ParticipantAvailabilityForeignKeyField(TournamentHyperlinkedRelatedField):
         return super().get_url(obj, view_name, request, format)
 
     def get_object(self, view_name, view_args, view_kwargs):
-        return {
-            'api-adjudicator-detail': Adjudicator,
-            'api-team-detail': Team,
-            'api-venue-detail': Venue,
-        }[view_name].objects.get(tournament__slug=view_kwargs['tournament_slug'], pk=view_kwargs['pk'])
+        return self.models[view_name].objects.get(tournament__slug=view_kwargs['tournament_slug'], pk=view_kwargs['pk'])
 
-    def to_internal_value(self, data):
+    def resolve_url(self, data):
         try:
             http_prefix = data.startswith(('http:', 'https:'))
         except AttributeError:
@@ -201,14 +251,36 @@ class ParticipantAvailabilityForeignKeyField(TournamentHyperlinkedRelatedField):
         except Resolver404:
             self.fail('no_match')
 
-        if match.view_name.split("-")[1] not in ['team', 'adjudicator', 'venue']:
+        if match.view_name not in self.models:
             self.fail('incorrect_match')
+        return match
 
+    def to_internal_value(self, data):
+        match = self.resolve_url(data)
         try:
             return self.get_object(match.view_name, match.args, match.kwargs)
         except (ObjectDoesNotExist, ValueError, TypeError):
             self.fail('does_not_exist')
 
+    def to_internal_values(self, data):
+        """Like `to_internal_value()` for a list of URLs, but looks up the
+        objects of each model together."""
+        if not isinstance(data, list):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        pks = {}
+        for url in data:
+            match = self.resolve_url(url)
+            pks.setdefault((match.view_name, match.kwargs['tournament_slug']), set()).add(match.kwargs['pk'])
+
+        objs = []
+        for (view_name, tournament_slug), ids in pks.items():
+            found = list(self.models[view_name].objects.filter(tournament__slug=tournament_slug, pk__in=ids))
+            if len(found) != len(ids):
+                self.fail('does_not_exist')
+            objs.extend(found)
+        return objs
+
 
 class BaseSourceField(TournamentHyperlinkedRelatedField):
     """Taken from REST_Framework: rest_framework.relations.HyperlinkedRelatedField
@@ -1,11 +1,26 @@
+import hashlib
 import operator
+from itertools import islice
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.utils.translation import get_language
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.fields import get_error_detail
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
 from tournaments.models import Round, Tournament
+from utils.cache import get_tagged_version
 
 from .permissions import APIEnabledPermission, IsAdminOrReadOnly, PerTournamentPermissionRequired, PublicIfReleasedPermission, PublicPreferencePermission
 
@@ -70,6 +85,196 @@ class RoundAPIMixin(TournamentAPIMixin):
         return context
 
 
+API_RESPONSE_KEY = "api_response_%s"
+
+
+class _EarlyResponse(Exception):
+    """Raised from `initial()` to answer a request without running its handler."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetAPIMixin:
+    """Mixin for API views that answer conditional GET requests.
+
+    Views set `cache_tags` (or override `get_cache_tags()`) to the kinds of
+    resources they show, as for `utils.mixins.CacheMixin`; the tags are
+    invalidated by the `signals.py` modules of each app. Once a GET request
+    has been authenticated and its permissions checked, its ETag is worked out
+    from the versions of those tags, the URL, the requester and the format. If
+    the request's `If-None-Match` header shows that the client has the current
+    version, the view answers 304; if a body for that ETag has been rendered
+    before, it's returned from the cache. Either way, the queryset and
+    serializers are never touched.
+
+    There's no Last-Modified header, since with its one-second precision, a
+    client could miss a change made in the same second as the one before.
+
+    The browsable API isn't cached, since its pages have forms for the user."""
+
+    cache_tags = None
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def get_etag(self, request, version):
+        requester = (getattr(request.user, 'pk', None), type(request.auth).__name__, getattr(request.auth, 'pk', None))
+        key = (version, request.build_absolute_uri(), requester, request.accepted_media_type, get_language())
+        return quote_etag(hashlib.sha1(repr(key).encode()).hexdigest())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional = None
+        tags = self.get_cache_tags()
+        if request.method not in ('GET', 'HEAD') or tags is None or request.accepted_renderer.format == 'api':
+            return
+
+        etag = self.get_etag(request, get_tagged_version(self.tournament.id, tags))
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            cached = cache.get(API_RESPONSE_KEY % etag)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+        if response is not None:
+            response['ETag'] = etag
+            raise _EarlyResponse(response)
+
+        self._conditional = etag
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, '_conditional', None) is None or response.status_code != 200 or response.streaming:
+            return response
+
+        etag = self._conditional
+        if hasattr(response, 'render'):
+            response.render()
+        response['ETag'] = etag
+        if request.method == 'GET':
+            cache.set(API_RESPONSE_KEY % etag, (response.content, response['Content-Type']),
+                      settings.TAGGED_PAGES_CACHE_TIMEOUT)
+        return response
+
+
+class StreamingListAPIMixin:
+    """Mixin for list views of collections that can get large.
+
+    Views override `prepare_objects()` to load anything their serializer needs
+    for a list of objects at once, which is called for every page or chunk.
+
+    With `?stream=json` or `?stream=ndjson`, the whole collection is sent as
+    one streamed JSON array, or as newline-delimited JSON, without pagination.
+    The objects are read from a server-side cursor `stream_chunk_size` at a
+    time, so only one chunk is ever held in memory."""
+
+    stream_query_param = 'stream'
+    stream_content_types = {
+        'json': 'application/json',
+        'ndjson': 'application/x-ndjson',
+    }
+    stream_chunk_size = 500
+
+    def prepare_objects(self, objects):
+        pass
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        stream_format = request.query_params.get(self.stream_query_param)
+        if stream_format:
+            return self.stream_list(queryset, stream_format)
+
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        self.prepare_objects(objects)
+
+        serializer = self.get_serializer(objects, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def iter_chunks(self, queryset):
+        iterator = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while chunk := list(islice(iterator, self.stream_chunk_size)):
+            self.prepare_objects(chunk)
+            yield self.get_serializer(chunk, many=True).data
+
+    def stream_list(self, queryset, stream_format):
+        if stream_format not in self.stream_content_types:
+            raise ValidationError({self.stream_query_param: "Must be one of: %s" % ", ".join(self.stream_content_types)})
+
+        renderer = JSONRenderer()
+
+        def stream_json():
+            separator = b'['
+            for data in self.iter_chunks(queryset):
+                yield separator + b','.join(renderer.render(item) for item in data)
+                separator = b','
+            yield b']' if separator == b',' else b'[]'
+
+        def stream_ndjson():
+            for data in self.iter_chunks(queryset):
+                yield b''.join(renderer.render(item) + b'\n' for item in data)
+
+        content = stream_json() if stream_format == 'json' else stream_ndjson()
+        return StreamingHttpResponse(content, content_type=self.stream_content_types[stream_format])
+
+
+class BulkCreateAPIMixin:
+    """Mixin for viewsets whose create action also takes a list of objects.
+
+    Permissions are checked once for the whole request. The objects are then
+    validated and saved in order, in one transaction, each in a savepoint of
+    its own so that an invalid object doesn't stop the others from being
+    saved. This includes validation and integrity errors raised when saving.
+    They share a serializer context, so objects they refer to in common
+    (teams, questions, etc.) are only looked up once.
+
+    The response is a list with, for each object given, a dict with its
+    "status" code and either its "data" or its "errors"."""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, 'related_objects', None) is not None:
+            context['related_objects'] = self.related_objects
+        return context
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        return Response(self.bulk_create(request.data))
+
+    def get_bulk_serializer(self, item):
+        return self.get_serializer(data=item)
+
+    def create_item(self, item):
+        try:
+            with transaction.atomic():
+                serializer = self.get_bulk_serializer(item)
+                serializer.is_valid(raise_exception=True)
+                self.perform_create(serializer)
+        except APIException as e:
+            return {'status': e.status_code, 'errors': e.detail}
+        except DjangoValidationError as e:
+            # Raised by model code, rather than during validation
+            return {'status': ValidationError.status_code, 'errors': get_error_detail(e)}
+        except IntegrityError as e:
+            return {'status': ValidationError.status_code, 'errors': ValidationError(str(e)).detail}
+        return {'status': 201, 'data': serializer.data}
+
+    def bulk_create(self, items):
+        self.related_objects = {}
+        with transaction.atomic():
+            return [self.create_item(item) for item in items]
+
+
 class AdministratorAPIMixin:
     permission_classes = [APIEnabledPermission, IsAdminUser | PerTournamentPermissionRequired]
 
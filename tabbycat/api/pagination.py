@@ -0,0 +1,76 @@
+from drf_link_header_pagination import LinkHeaderLimitOffsetPagination
+from rest_framework.pagination import _positive_int
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetLimitOffsetPagination(LinkHeaderLimitOffsetPagination):
+    """Limit/offset pagination with Link headers, which switches to keyset
+    pagination on the primary key when the `after` parameter is given.
+
+    With `?after=<id>`, a page is the objects with a primary key greater than
+    `id`, in order of primary key, so deep pages cost as little as the first
+    one, and no count of the whole collection is taken. The "next" link then
+    carries the primary key of the last object on the page. Start from the
+    beginning with `?after=0`."""
+
+    after_query_param = 'after'
+    after_query_description = "Only return results with a primary key greater than this, in order of primary key."
+    keyset_default_limit = 100
+
+    def get_after(self, request):
+        if self.after_query_param not in request.query_params:
+            return None
+        try:
+            return _positive_int(request.query_params[self.after_query_param])
+        except ValueError:
+            return 0
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.after = self.get_after(request)
+        if self.after is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request) or self.keyset_default_limit
+        page = list(queryset.filter(pk__gt=self.after).order_by('pk')[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last_pk = page[-1].pk if page else None
+        return page
+
+    def get_keyset_url(self, after):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.after_query_param, after)
+
+    def get_next_link(self):
+        if self.after is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.get_keyset_url(self.last_pk)
+
+    def get_previous_link(self):
+        if self.after is None:
+            return super().get_previous_link()
+        return None
+
+    def get_first_link(self):
+        if self.after is None:
+            return super().get_first_link()
+        return self.get_keyset_url(0)
+
+    def get_last_link(self):
+        if self.after is None:
+            return super().get_last_link()
+        return None
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.after_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.after_query_description,
+            'schema': {'type': 'integer'},
+        }]
@@ -20,7 +20,7 @@ from breakqual.models import BreakCategory, BreakingTeam
 from draw.manager import DrawManager
 from draw.models import Debate, DebateTeam
 from motions.models import DebateTeamMotionPreference, Motion, RoundMotion
-from options.preferences import (BPAssignmentMethod, BPPositionCost, BPPullupDistribution, DrawAvoidConflicts,
+from options.preferences import (AssignmentSolver, BPAssignmentMethod, BPPositionCost, BPPullupDistribution, DrawAvoidConflicts,
     DrawOddBracket, DrawPairingMethod, DrawPullupRestriction, DrawSideAllocations)
 from participants.emoji import pick_unused_emoji
 from participants.models import Adjudicator, Institution, Region, Speaker, SpeakerCategory, Team
@@ -30,6 +30,7 @@ from results.models import BallotSubmission, ScoreCriterion, SpeakerScore, Submi
 from results.result import DebateResult, ResultError
 from standings.speakers import SpeakerStandingsGenerator
 from standings.teams import TeamStandingsGenerator
+from standings.totals import update_running_totals_for_debate
 from tournaments.models import Round, Tournament
 from users.models import Group
 from users.permissions import has_permission, Permission
@@ -1066,6 +1067,7 @@ class DrawGenerationSerializer(serializers.Serializer):
         pullup = serializers.ChoiceField(choices=BPPullupDistribution.choices, required=False, help_text=BPPullupDistribution.help_text)
         position_cost = serializers.ChoiceField(choices=BPPositionCost.choices, required=False, help_text=BPPositionCost.help_text)
         assignment_method = serializers.ChoiceField(choices=BPAssignmentMethod.choices, required=False, help_text=BPAssignmentMethod.help_text)
+        assignment_solver = serializers.ChoiceField(choices=AssignmentSolver.choices, required=False, help_text=AssignmentSolver.help_text)
         renyi_order = serializers.FloatField(required=False)
         exponent = serializers.FloatField(required=False)
 
@@ -1158,7 +1160,8 @@ class FeedbackSerializer(serializers.ModelSerializer):
         debate = data.pop('debate')
 
         source_type = 'from_team' if isinstance(source, Team) else 'from_adj'
-        required_questions = self.context['tournament'].adjudicatorfeedbackquestion_set.filter(required=True, **{source_type: True})
+        required_questions = AdjudicatorFeedbackQuestion.objects.filter(
+            tournament=self.context['tournament'], required=True, **{source_type: True})
         answers = data.get('get_answers', [])
 
         if len(set(required_questions) - set(a['question'] for a in answers)) > 0:
@@ -1198,7 +1201,7 @@ class FeedbackSerializer(serializers.ModelSerializer):
         }
 
     def create(self, validated_data):
-        answers = validated_data.pop('get_answers')
+        answers = validated_data.pop('get_answers', [])
 
         validated_data.update(self.get_submitter_fields())
         if validated_data.get('confirmed', False):
@@ -1207,13 +1210,16 @@ class FeedbackSerializer(serializers.ModelSerializer):
 
         feedback = super().create(validated_data)
 
-        # Create answers
+        # Create answers, with one insert for each type of answer
+        answers_by_model = {}
         for answer in answers:
             question = answer['question']
             model = AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES[question.answer_type]
-            obj = model(question=question, feedback=feedback, answer=answer['answer'])
+            answers_by_model.setdefault(model, []).append(
+                model(question=question, content_object=feedback, answer=answer['answer']))
+        for model, objs in answers_by_model.items():
             try:
-                obj.save()
+                model.objects.bulk_create(objs)
             except TypeError as e:
                 raise serializers.ValidationError(e)
 
@@ -1468,6 +1474,10 @@ class BallotSerializer(serializers.ModelSerializer):
 
         save_related(self.ResultSerializer, result_data, self.context, {'ballot': ballot})
 
+        # Scores are saved after the ballot, so weren't counted when it was saved
+        if ballot.confirmed:
+            update_running_totals_for_debate(ballot.debate)
+
         if veto_data:
             save_related(self.VetoSerializer, veto_data, self.context, {'ballot_submission': ballot, 'preference': 3})
 
@@ -1,10 +1,38 @@
+import json
+import logging
+import time
+from itertools import product
+from unittest import mock
+
 from django.conf import settings
-from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, IntegrityError
+from django.test import tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
 from dynamic_preferences.registries import global_preferences_registry
-from rest_framework.test import APITestCase
-
+from rest_framework.reverse import reverse as drf_reverse
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from adjallocation.models import AdjudicatorTeamConflict, DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedbackQuestion, StringAnswer
+from api.fields import reverse_from_template
+from api.views import RoundBallotViewSet
+from availability.models import RoundAvailability
 from breakqual.models import BreakingTeam
+from checkins.models import PersonIdentifier
+from draw.models import Debate, DebateTeam
+from participants.models import Institution, Team
+from results.models import BallotSubmission
+from results.result import DebateResult
+from tournaments.models import Round
+from utils.misc import reverse_round, reverse_tournament
 from utils.tests import CompletedTournamentTestMixin
+from venues.models import VenueCategory, VenueConstraint
+
+logger = logging.getLogger(__name__)
 
 
 class RootTests(APITestCase):
@@ -140,3 +168,395 @@ class BreakingTeamsViewsetTests(CompletedTournamentTestMixin, APITestCase):
             'remark': BreakingTeam.Remark.WITHDRAWN,
         }, content_type='application/json')
         self.assertEqual(len(response.data), 16)
+
+
+class ConditionalGetTests(CompletedTournamentTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.login(username="admin", password="admin")
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_teams(self, **headers):
+        return self.client.get(reverse('api-team-list', kwargs={'tournament_slug': self.tournament.slug}), **headers)
+
+    def get_pairings(self, round_seq, **headers):
+        return self.client.get(reverse('api-pairing-list', kwargs={
+            'tournament_slug': self.tournament.slug, 'round_seq': round_seq}), **headers)
+
+    def test_if_none_match(self):
+        response = self.get_teams()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.get_teams(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        team = Team.objects.filter(tournament=self.tournament).first()
+        team.reference = "Renamed"
+        team.save()
+        response = self.get_teams(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn("Renamed", response.content.decode())
+
+    def test_related_changes(self):
+        # Conflicts, room constraints and barcodes are shown on teams, but aren't saved with them
+        team = Team.objects.filter(tournament=self.tournament).first()
+        adj = self.tournament.adjudicator_set.first()
+        category = VenueCategory.objects.create(name="Accessible")
+        for change in [
+            lambda: AdjudicatorTeamConflict.objects.create(adjudicator=adj, team=team),
+            lambda: team.institution_conflicts.add(Institution.objects.exclude(id=team.institution_id).first()),
+            lambda: VenueConstraint.objects.create(category=category, priority=1, subject=team),
+            lambda: PersonIdentifier.objects.update_or_create(person=team.speaker_set.first(), defaults={'barcode': "123456"}),
+        ]:
+            etag = self.get_teams()['ETag']
+            change()
+            self.assertEqual(self.get_teams(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_no_last_modified(self):
+        # One-second precision would hide changes made within the same second
+        response = self.get_teams()
+        self.assertNotIn('Last-Modified', response)
+        response = self.get_teams(HTTP_IF_MODIFIED_SINCE="Sat, 01 Jan 2000 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_body(self):
+        with CaptureQueriesContext(connection) as first:
+            response = self.get_teams()
+        with CaptureQueriesContext(connection) as second:
+            cached = self.get_teams()
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertLess(len(second.captured_queries), len(first.captured_queries))
+
+    def test_other_requester(self):
+        etag = self.get_teams()['ETag']
+        get_user_model().objects.create_superuser(username='test_other', password='test_other')
+        self.client.login(username="test_other", password="test_other")
+        response = self.get_teams(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_round_scoped(self):
+        self.get_pairings(4)  # create preferences
+        etag = self.get_pairings(4)['ETag']
+
+        debate = self.tournament.round_set.get(seq=3).debate_set.first()
+        debate.importance = 1
+        debate.save()
+        self.assertEqual(self.get_pairings(4, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        debate = self.tournament.round_set.get(seq=4).debate_set.first()
+        debate.importance = 1
+        debate.save()
+        self.assertEqual(self.get_pairings(4, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class LargeCollectionTests(CompletedTournamentTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.login(username="admin", password="admin")
+        self.url = reverse('api-speaker-list', kwargs={'tournament_slug': self.tournament.slug})
+        self.ids = list(self.tournament.team_set.values_list('speaker__id', flat=True).order_by('speaker__id'))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_keyset_pages(self):
+        ids, url = [], self.url + "?after=0&limit=7"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = [speaker['id'] for speaker in response.json()]
+            self.assertLessEqual(len(page), 7)
+            ids.extend(page)
+            links = {rel.split('"')[1]: link.strip(' <>') for link, rel in
+                     (part.split(';') for part in response.get('Link', '').split(',') if part)}
+            self.assertNotIn('last', links)
+            url = links.get('next')
+        self.assertEqual(ids, self.ids)
+
+    def test_limit_offset_unchanged(self):
+        response = self.client.get(self.url + "?limit=5&offset=5")
+        self.assertEqual(len(response.json()), 5)
+        self.assertIn('rel="last"', response['Link'])
+
+    def test_stream_json(self):
+        expected = self.client.get(self.url).json()
+        response = self.client.get(self.url + "?stream=json")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+    def test_stream_ndjson(self):
+        response = self.client.get(self.url + "?stream=ndjson")
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(sorted(json.loads(line)['id'] for line in lines), self.ids)
+
+    def test_stream_ballots(self):
+        self.tournament.preferences['tab_release__ballots_released'] = True
+        debate = self.tournament.round_set.get(seq=4).debate_set.first()
+        url = reverse('api-ballot-list', kwargs={
+            'tournament_slug': self.tournament.slug, 'round_seq': 4, 'debate_pk': debate.pk})
+        expected = self.client.get(url).json()
+        response = self.client.get(url + "?stream=json")
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+    def test_stream_unknown_format(self):
+        self.assertEqual(self.client.get(self.url + "?stream=xml").status_code, 400)
+
+
+class BulkCreateTests(CompletedTournamentTestMixin, APITestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.get(username="admin"))
+        self.debates = list(self.round.debate_set.order_by('id')[:3])
+
+    def url(self, view_name, obj):
+        return reverse_tournament(view_name, self.tournament, kwargs={'pk': obj.pk})
+
+    def debate_url(self, debate):
+        return reverse_round('api-pairing-detail', self.round, kwargs={'debate_pk': debate.pk})
+
+    def ballot(self, debate, swap=False):
+        teams = [dt.team for dt in debate.debateteam_set.order_by('side')]
+        if swap:
+            teams.reverse()
+        return {
+            'debate': self.debate_url(debate),
+            'result': {'sheets': [{'teams': [
+                {'side': side, 'team': self.url('api-team-detail', team), 'win': side == 0}
+                for side, team in enumerate(teams)
+            ]}]},
+        }
+
+    def test_ballots(self):
+        self.tournament.preferences['debate_rules__ballots_per_debate_prelim'] = 'per-debate'
+        self.tournament.preferences['debate_rules__speakers_in_ballots'] = 'never'
+        before = BallotSubmission.objects.filter(debate__round=self.round).count()
+
+        response = self.client.post(reverse_round('api-round-ballot-list', self.round), [
+            self.ballot(self.debates[0]),
+            self.ballot(self.debates[1], swap=True),
+            self.ballot(self.debates[2]),
+            {'result': {}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data], [201, 400, 201, 400])
+        self.assertIn('debate', response.data[3]['errors'])
+        self.assertEqual(BallotSubmission.objects.filter(debate__round=self.round).count(), before + 2)
+        self.assertTrue(BallotSubmission.objects.filter(debate=self.debates[2], version__gt=1).exists())
+
+    def test_ballots_save_errors(self):
+        self.tournament.preferences['debate_rules__ballots_per_debate_prelim'] = 'per-debate'
+        self.tournament.preferences['debate_rules__speakers_in_ballots'] = 'never'
+        perform_create = RoundBallotViewSet.perform_create
+        errors = iter([None, DjangoValidationError("Invalid"), IntegrityError("Duplicate")])
+
+        def perform_create_with_errors(self, serializer):
+            error = next(errors)
+            perform_create(self, serializer)
+            if error is not None:
+                raise error
+
+        with mock.patch.object(RoundBallotViewSet, 'perform_create', perform_create_with_errors):
+            response = self.client.post(reverse_round('api-round-ballot-list', self.round),
+                [self.ballot(debate) for debate in self.debates])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data], [201, 400, 400])
+        self.assertTrue(BallotSubmission.objects.filter(debate=self.debates[0], version__gt=1).exists())
+        self.assertFalse(BallotSubmission.objects.filter(debate=self.debates[1], version__gt=1).exists())
+
+    def test_ballots_not_list(self):
+        response = self.client.post(reverse_round('api-round-ballot-list', self.round), self.ballot(self.debates[0]))
+        self.assertEqual(response.status_code, 400)
+
+    def test_feedback(self):
+        questions = AdjudicatorFeedbackQuestion.objects.filter(tournament=self.tournament)
+        questions.update(required=False)
+        question = questions.filter(
+            from_team=True, answer_type=AdjudicatorFeedbackQuestion.ANSWER_TYPE_LONGTEXT).first()
+
+        items, expected = [], []
+        for debate in self.debates:
+            adj = debate.debateadjudicator_set.first().adjudicator
+            for dt in debate.debateteam_set.all():
+                items.append({
+                    'adjudicator': self.url('api-adjudicator-detail', adj),
+                    'source': self.url('api-team-detail', dt.team),
+                    'debate': self.debate_url(debate),
+                    'score': 3,
+                    'participant_submitter': None,
+                    'answers': [{'question': self.url('api-feedbackquestion-detail', question), 'answer': "Bulk"}],
+                })
+                expected.append(201)
+        other_adj = self.debates[1].debateadjudicator_set.first().adjudicator
+        items.append(dict(items[0], adjudicator=self.url('api-adjudicator-detail', other_adj)))
+        expected.append(400)
+
+        response = self.client.post(reverse_tournament('api-feedback-list', self.tournament), items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data], expected)
+        self.assertEqual(StringAnswer.objects.filter(question=question, answer="Bulk").count(), len(items) - 1)
+
+    def test_single_feedback_unchanged(self):
+        AdjudicatorFeedbackQuestion.objects.filter(tournament=self.tournament).update(required=False)
+        debate = self.debates[0]
+        response = self.client.post(reverse_tournament('api-feedback-list', self.tournament), {
+            'adjudicator': self.url('api-adjudicator-detail', debate.debateadjudicator_set.first().adjudicator),
+            'source': self.url('api-team-detail', debate.debateteam_set.first().team),
+            'debate': self.debate_url(debate),
+            'score': 3,
+            'participant_submitter': None,
+        })
+        self.assertEqual(response.status_code, 201)
+
+    def test_availabilities(self):
+        adjs = list(self.tournament.adjudicator_set.all()[:5])
+        urls = [self.url('api-adjudicator-detail', adj) for adj in adjs]
+        url = reverse_round('api-availability-list', self.round)
+        RoundAvailability.objects.filter(round=self.round).delete()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(url, urls + urls[:2])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(RoundAvailability.objects.filter(round=self.round).values_list('object_id', flat=True)),
+                         {adj.id for adj in adjs})
+        self.assertEqual(len([q for q in context.captured_queries if 'FROM "participants_adjudicator"' in q['sql']]), 1)
+
+        response = self.client.put(url, [urls[0], url])
+        self.assertEqual(response.status_code, 400)
+
+
+class RoundSerializationTests(CompletedTournamentTestMixin, APITestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.get(username="admin"))
+
+    def tearDown(self):
+        cache.clear()
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_url_templates(self):
+        request = APIRequestFactory().get('/')
+        for view_name, kwargs in [
+            ('api-team-detail', {'tournament_slug': self.tournament.slug, 'pk': 5}),
+            ('api-team-detail', {'tournament_slug': self.tournament.slug, 'pk': 6}),
+            ('api-ballot-list', {'tournament_slug': self.tournament.slug, 'round_seq': 4, 'debate_pk': 7}),
+        ]:
+            with self.subTest(view_name=view_name, kwargs=kwargs):
+                expected = drf_reverse(view_name, kwargs=kwargs, request=request)
+                self.assertEqual(reverse_from_template(view_name, kwargs, request, None), expected)
+                self.assertEqual(reverse_from_template(view_name, kwargs, request, None), expected)
+
+        # Values that can't go in a template are reversed the usual way
+        with self.assertRaises(NoReverseMatch):
+            reverse_from_template('api-team-detail', {'tournament_slug': "not a slug", 'pk': 5}, request, None)
+
+    def test_pairings_fixed_queries(self):
+        self.client.get(reverse_round('api-pairing-list', self.round))  # create preferences
+        url = reverse_round('api-pairing-list', self.round) + "?after=0&limit="
+        self.assertEqual(self.count_queries(url + "2"), self.count_queries(url + "100"))
+
+    def test_round_ballots(self):
+        response = self.client.get(reverse_round('api-round-ballot-list', self.round))
+        self.assertEqual(response.status_code, 200)
+        expected = []
+        for debate in self.round.debate_set.all():
+            expected.extend(self.client.get(reverse_round('api-ballot-list', self.round, kwargs={'debate_pk': debate.pk})).json())
+        self.assertEqual(sorted(response.json(), key=lambda b: b['id']), sorted(expected, key=lambda b: b['id']))
+
+        url = reverse_round('api-round-ballot-list', self.round) + "?after=0&limit="
+        self.assertEqual(self.count_queries(url + "2"), self.count_queries(url + "100"))
+
+
+@tag('benchmark')
+class BenchmarkRoundSerialization(CompletedTournamentTestMixin, APITestCase):
+    """Times the pairings and ballots of a 200-debate round, and counts their
+    queries, comparing the round's ballots list with getting each debate's
+    ballots separately. The whole-round lists must stay within a small, fixed
+    number of queries. Run with `manage.py test --tag=benchmark`."""
+
+    ndebates = 200
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.get(username="admin")
+        self.client.force_authenticate(user=self.user)
+
+        # Copy the debates and results of round 4 until there are `ndebates`
+        source = self.tournament.round_set.get(seq=4)
+        self.round = Round.objects.create(tournament=self.tournament, seq=self.tournament.round_set.count() + 1,
+            name="Benchmark", abbreviation="B", draw_status=Round.Status.RELEASED)
+        originals = list(source.debate_set.order_by('id'))
+        for i in range(self.ndebates):
+            self.copy_debate(originals[i % len(originals)], i)
+
+        self.client.get(reverse_round('api-pairing-list', self.round))  # create preferences
+
+    def tearDown(self):
+        cache.clear()
+
+    def copy_debate(self, original, room_rank):
+        debate = Debate.objects.create(round=self.round, room_rank=room_rank, result_status=Debate.STATUS_CONFIRMED)
+        DebateTeam.objects.bulk_create([DebateTeam(debate=debate, team=dt.team, side=dt.side)
+            for dt in original.debateteam_set.all()])
+        DebateAdjudicator.objects.bulk_create([DebateAdjudicator(debate=debate, adjudicator=da.adjudicator, type=da.type)
+            for da in original.debateadjudicator_set.all()])
+
+        result = original.confirmed_ballot.result
+        ballotsub = BallotSubmission.objects.create(debate=debate, confirmed=True, submitter=self.user,
+            submitter_type=BallotSubmission.Submitter.TABROOM)
+        copy = DebateResult(ballotsub, tournament=self.tournament)
+        for side, pos in product(result.sides, result.positions):
+            copy.set_speaker(side, pos, result.get_speaker(side, pos))
+            copy.set_ghost(side, pos, result.get_ghost(side, pos))
+            for adj in result.scoresheets:
+                copy.set_score(adj, side, pos, result.get_score(adj, side, pos))
+        copy.save()
+
+    def measure(self, urls):
+        cache.clear()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            for url in urls:
+                self.assertEqual(self.client.get(url).status_code, 200)
+        return time.perf_counter() - start, len(context.captured_queries)
+
+    def test_benchmark(self):
+        debates = list(self.round.debate_set.all())
+        for name, urls in [
+            ("pairings", [reverse_round('api-pairing-list', self.round)]),
+            ("round ballots", [reverse_round('api-round-ballot-list', self.round)]),
+            ("ballots by debate", [reverse_round('api-ballot-list', self.round, kwargs={'debate_pk': d.pk}) for d in debates]),
+        ]:
+            elapsed, nqueries = self.measure(urls)
+            logger.info("%d debates, %s: %.4f s, %d queries", self.ndebates, name, elapsed, nqueries)
+            if len(urls) == 1:  # whole-round lists use a fixed number of queries, not some per debate
+                self.assertLess(nqueries, self.ndebates // 4)
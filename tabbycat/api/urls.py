@@ -88,6 +88,10 @@ urlpatterns = [
                             views.AvailabilitiesViewSet.as_view(),
                             name='api-availability-list'),
 
+                        path('/ballots',
+                            views.RoundBallotViewSet.as_view({'get': 'list', 'post': 'create'}),
+                            name='api-round-ballot-list'),
+
                         path('/pairings', include([
                             path('',
                                 views.PairingViewSet.as_view({'get': 'list', 'post': 'create', 'delete': 'delete_all'}),
@@ -6,11 +6,12 @@ from channels.layers import get_channel_layer
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.db.models import Count, Prefetch, Q
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from dynamic_preferences.api.serializers import PreferenceSerializer
 from dynamic_preferences.api.viewsets import PerInstancePreferenceViewSet
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.fields import DateTimeField
 from rest_framework.generics import CreateAPIView, GenericAPIView, get_object_or_404, RetrieveUpdateAPIView
 from rest_framework.mixins import ListModelMixin
@@ -34,16 +35,19 @@ from draw.models import Debate, DebateTeam
 from options.models import TournamentPreferenceModel
 from participants.models import Adjudicator, Institution, Person, Speaker, SpeakerCategory, Team
 from results.models import SpeakerScore, TeamScore
+from results.prefetch import populate_results
 from standings.speakers import SpeakerStandingsGenerator
 from standings.teams import TeamStandingsGenerator
 from tournaments.mixins import TournamentFromUrlMixin
 from tournaments.models import Round, Tournament
 from users.permissions import get_permissions, Permission
+from utils.cache import round_tag
 from venues.models import Venue, VenueCategory
 
-from . import serializers
+from . import fields, serializers
 from .fields import ParticipantAvailabilityForeignKeyField
-from .mixins import AdministratorAPIMixin, APILogActionMixin, PublicAPIMixin, RoundAPIMixin, TournamentAPIMixin, TournamentPublicAPIMixin
+from .mixins import (AdministratorAPIMixin, APILogActionMixin, BulkCreateAPIMixin, ConditionalGetAPIMixin, PublicAPIMixin,
+                     RoundAPIMixin, StreamingListAPIMixin, TournamentAPIMixin, TournamentPublicAPIMixin)
 from .permissions import APIEnabledPermission, PerTournamentPermissionRequired, PublicPreferencePermission, URLKeyAuthentication
 
 
@@ -346,7 +350,7 @@ class BreakingTeamsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenerateBr
         OpenApiParameter('region', description='Only include institutions from the region', required=False, type=str),
     ]),
 )
-class InstitutionViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class InstitutionViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, StreamingListAPIMixin, ModelViewSet):
     serializer_class = serializers.PerTournamentInstitutionSerializer
     access_preference = 'public_institutions_list'
     action_log_type_created = ActionLogEntry.ActionType.INSTITUTION_CREATE
@@ -385,8 +389,9 @@ class InstitutionViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelView
     partial_update=extend_schema(summary="Patch team", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete team", parameters=[id_parameter]),
 )
-class TeamViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class TeamViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ConditionalGetAPIMixin, StreamingListAPIMixin, ModelViewSet):
     serializer_class = serializers.TeamSerializer
+    cache_tags = ('participants',)
     access_preference = 'public_participants'
     action_log_type_created = ActionLogEntry.ActionType.TEAM_CREATE
     action_log_type_updated = ActionLogEntry.ActionType.TEAM_EDIT
@@ -422,8 +427,9 @@ class TeamViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch adjudicator", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete adjudicator", parameters=[id_parameter]),
 )
-class AdjudicatorViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class AdjudicatorViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ConditionalGetAPIMixin, StreamingListAPIMixin, ModelViewSet):
     serializer_class = serializers.AdjudicatorSerializer
+    cache_tags = ('participants',)
     access_preference = 'public_participants'
     action_log_type_created = ActionLogEntry.ActionType.ADJUDICATOR_CREATE
     action_log_type_updated = ActionLogEntry.ActionType.ADJUDICATOR_EDIT
@@ -485,7 +491,7 @@ class GlobalInstitutionViewSet(AdministratorAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch speaker", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete speaker", parameters=[id_parameter]),
 )
-class SpeakerViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class SpeakerViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, StreamingListAPIMixin, ModelViewSet):
     serializer_class = serializers.SpeakerSerializer
     tournament_field = "team__tournament"
     access_preference = 'public_participants'
@@ -748,9 +754,10 @@ def get_metrics_params(generator):
     ]
 
 
-class BaseStandingsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenericAPIView):
+class BaseStandingsView(TournamentAPIMixin, TournamentPublicAPIMixin, ConditionalGetAPIMixin, GenericAPIView):
     lookup_field = 'slug'
     lookup_url_kwarg = 'tournament_slug'
+    cache_tags = ('results', 'participants')
 
     def get_metrics(self):
         if self.request.query_params.get('metrics'):
@@ -919,7 +926,7 @@ class TeamRoundStandingsRoundsView(TournamentAPIMixin, TournamentPublicAPIMixin,
     partial_update=extend_schema(summary="Patch pairing", parameters=debate_parameters),
     destroy=extend_schema(summary="Delete pairing", parameters=debate_parameters),
 )
-class PairingViewSet(RoundAPIMixin, ModelViewSet):
+class PairingViewSet(RoundAPIMixin, ConditionalGetAPIMixin, StreamingListAPIMixin, ModelViewSet):
 
     class Permission(PublicPreferencePermission):
         def get_tournament_preference(self, view, op):
@@ -956,8 +963,11 @@ class PairingViewSet(RoundAPIMixin, ModelViewSet):
     action_log_type_created = ActionLogEntry.ActionType.DEBATE_CREATE
     action_log_type_updated = ActionLogEntry.ActionType.DEBATE_EDIT
 
+    def get_cache_tags(self):
+        return (round_tag('draw', self.round.id), 'venues', 'participants')
+
     def get_queryset(self):
-        return super().get_queryset().select_related('round', 'round__tournament', 'venue', 'venue__tournament').prefetch_related(
+        return super().get_queryset().select_related('round', 'round__tournament', 'venue', 'venue__tournament', 'checkin_identifier').prefetch_related(
             'debateteam_set', 'debateteam_set__team', 'debateteam_set__team__tournament',
             'debateadjudicator_set', 'debateadjudicator_set__adjudicator', 'debateadjudicator_set__adjudicator__tournament',
         )
@@ -1004,7 +1014,7 @@ class GeneratePairingView(RoundAPIMixin, AdministratorAPIMixin, CreateAPIView):
     update=extend_schema(summary="Update ballot", parameters=[id_parameter], request=serializers.UpdateBallotSerializer),
     partial_update=extend_schema(summary="Patch ballot", parameters=[id_parameter], request=serializers.UpdateBallotSerializer),
 )
-class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ConditionalGetAPIMixin, StreamingListAPIMixin, ModelViewSet):
 
     class CustomPermission(BasePermission):
         def has_permission(self, request, view):
@@ -1059,6 +1069,9 @@ class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     def lookup_kwargs(self):
         return {'debate': self.debate}
 
+    def get_cache_tags(self):
+        return (round_tag('results', self.round.id), round_tag('draw', self.round.id), 'participants')
+
     def get_queryset(self):
         filters = Q()
 
@@ -1076,6 +1089,11 @@ class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
             'motion', 'motion__tournament',
             'participant_submitter__adjudicator__tournament')
 
+    def prepare_objects(self, objects):
+        """Loads the results of all listed ballots at once, rather than
+        letting each ballot load its own."""
+        populate_results(objects, self.tournament)
+
     @extend_schema(summary="Delete ballot", parameters=[id_parameter], responses={200: serializers.BallotSerializer})
     def destroy(self, request, *args, **kwargs):
         """Only mark as discarded; don't allow object deletion."""
@@ -1086,6 +1104,49 @@ class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
         return self.retrieve(request, *args, **kwargs)
 
 
+@extend_schema(tags=['results'], parameters=round_parameters)
+@extend_schema_view(
+    list=extend_schema(summary="Get ballots in the round", parameters=[
+        OpenApiParameter('confirmed', description='Only include confirmed ballots', required=False, type=bool, default=False),
+    ]),
+    create=extend_schema(summary="Create ballots for debates in the round"),
+)
+class RoundBallotViewSet(BulkCreateAPIMixin, BallotViewSet):
+    """Lists the ballots of every debate in the round, and takes a list of
+    ballots for any debates in the round, each with the URL of its debate in
+    "debate"."""
+
+    @property
+    def debate(self):
+        return getattr(self, '_debate', None)
+
+    def lookup_kwargs(self):
+        if self.debate is not None:
+            return {'debate': self.debate}
+        return {self.round_field: self.round}
+
+    def get_debate_field(self):
+        field = fields.RoundHyperlinkedRelatedField(view_name='api-pairing-detail', lookup_url_kwarg='debate_pk',
+            queryset=Debate.objects.all())
+        field._context = {'request': self.request, 'tournament': self.tournament, 'round': self.round,
+                          'related_objects': self.related_objects}
+        return field
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise ValidationError("Expected a list of ballots")
+        return super().create(request, *args, **kwargs)
+
+    def get_bulk_serializer(self, item):
+        if not isinstance(item, dict) or 'debate' not in item:
+            raise ValidationError({'debate': ["This field is required."]})
+        try:
+            self._debate = self.get_debate_field().run_validation(item['debate'])
+        except ValidationError as e:
+            raise ValidationError({'debate': e.detail})
+        return super().get_bulk_serializer(item)
+
+
 @extend_schema(tags=['feedback'], parameters=[tournament_parameter])
 @extend_schema_view(
     list=extend_schema(summary="List tournament feedback questions", parameters=[
@@ -1125,13 +1186,13 @@ class FeedbackQuestionViewSet(TournamentAPIMixin, PublicAPIMixin, ModelViewSet):
         OpenApiParameter('round', description='The sequence of the rounds of the submitted feedback', required=False, type={"type": "array", "items": {"type": "integer"}}, explode=False),
         OpenApiParameter('target', description='The ID of the adjudicator receiving feedback', required=False, type=int),
     ]),
-    create=extend_schema(summary="Create feedback"),
+    create=extend_schema(summary="Create feedback, or a list of feedback"),
     retrieve=extend_schema(summary="Get feedback", parameters=[id_parameter]),
     update=extend_schema(summary="Update feedback", parameters=[id_parameter]),
     partial_update=extend_schema(summary="Patch feedback", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete feedback", parameters=[id_parameter]),
 )
-class FeedbackViewSet(TournamentAPIMixin, AdministratorAPIMixin, ModelViewSet):
+class FeedbackViewSet(TournamentAPIMixin, AdministratorAPIMixin, BulkCreateAPIMixin, StreamingListAPIMixin, ModelViewSet):
 
     class CustomPermission(BasePermission):
         def has_permission(self, request, view):
@@ -1233,6 +1294,10 @@ class AvailabilitiesViewSet(RoundAPIMixin, AdministratorAPIMixin, APIView):
         field.root._context = {'request': self.request}
         return field
 
+    def get_participants(self):
+        objs = self.get_field().child_relation.to_internal_values(self.request.data)
+        return sorted(objs, key=lambda o: type(o).__name__)
+
     def get_filters(self):
         filters = Q()
         if self.request.query_params.get('adjudicators', 'false') == 'false':
@@ -1252,8 +1317,9 @@ class AvailabilitiesViewSet(RoundAPIMixin, AdministratorAPIMixin, APIView):
         return Response(self.get_field().to_representation(self.get_queryset()))
 
     @extend_schema(summary="Toggle the availabilities of the included objects")
+    @transaction.atomic
     def patch(self, request, *args, **kwargs):
-        objs = sorted(self.get_field().to_internal_value(request.data), key=lambda o: type(o).__name__)
+        objs = self.get_participants()
         for model, participants in groupby(objs, key=type):
             contenttype = ContentType.objects.get_for_model(model)
 
@@ -1272,8 +1338,9 @@ class AvailabilitiesViewSet(RoundAPIMixin, AdministratorAPIMixin, APIView):
         return self.get(request, *args, **kwargs)
 
     @extend_schema(summary="Mark objects as available")
+    @transaction.atomic
     def put(self, request, *args, **kwargs):
-        objs = sorted(self.get_field().to_internal_value(request.data), key=lambda o: type(o).__name__)
+        objs = self.get_participants()
         for model, participants in groupby(objs, key=type):
             contenttype = ContentType.objects.get_for_model(model)
             RoundAvailability.objects.bulk_create(
@@ -1282,8 +1349,9 @@ class AvailabilitiesViewSet(RoundAPIMixin, AdministratorAPIMixin, APIView):
         return self.get(request, *args, **kwargs)
 
     @extend_schema(summary="Mark objects as unavailable")
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
-        objs = sorted(self.get_field().to_internal_value(request.data), key=lambda o: type(o).__name__)
+        objs = self.get_participants()
         for model, participants in groupby(objs, key=type):
             contenttype = ContentType.objects.get_for_model(model)
             RoundAvailability.objects.filter(
@@ -1,14 +1,13 @@
 from asgiref.sync import async_to_sync
 from channels.generic.websocket import JsonWebsocketConsumer
-from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext_lazy as _
 
 from options.utils import use_team_code_names_data_entry
 from tournaments.mixins import TournamentWebsocketMixin
 from users.permissions import has_permission, Permission
 
-from .models import Event, Identifier
-from .utils import get_unexpired_checkins
+from .models import Event
+from .utils import get_identifiers, get_unexpired_checkins
 
 
 class CheckInEventConsumer(TournamentWebsocketMixin, JsonWebsocketConsumer):
@@ -23,63 +22,71 @@ class CheckInEventConsumer(TournamentWebsocketMixin, JsonWebsocketConsumer):
         if not has_permission(self.scope["user"], self.edit_permission, self.tournament):
             return
 
+        # The checkins are issued here, once, by the consumer that received
+        # them; the other consumers in the group only pass on the result.
+        return_content = self.issue_checkins(content)
+        if return_content is None:
+            return
+
         # Send message to room group about the new checkin
         async_to_sync(self.channel_layer.group_send)(
             self.group_name(), {
                 'type': 'broadcast_checkin',
-                'content': content,
+                'content': return_content,
             },
         )
 
-    # Issue the relevant checkins
-    def broadcast_checkin(self, event):
-        content = event['content']
+    def get_owner_name(self, identifier, use_team_code_names):
+        if hasattr(identifier.owner, 'matchup'):
+            if use_team_code_names:
+                return identifier.owner.matchup_codes
+            return identifier.owner.matchup
+        return identifier.owner.name
+
+    def issue_checkins(self, content):
+        """Checks in (or revokes the checkins of) all the barcodes in `content`
+        at once, and returns the content to broadcast, or None (having sent an
+        error back) if there's nothing to broadcast."""
         barcode_ids = [b for b in content['barcodes'] if b is not None]
         return_content = {'created': content['status'], 'checkins': [],
                           'component_id': content['component_id']}
 
-        use_team_code_names = use_team_code_names_data_entry(self.tournament, True)
-
-        for barcode in barcode_ids:
-            try:
-                identifier = Identifier.objects.get(barcode=barcode)
-                if content['status'] is True:
-                    # If checking-in someone
-                    checkin = Event.objects.create(identifier=identifier,
-                                                   tournament=self.tournament)
-                    checkin_dict = checkin.serialize()
-
-                    if hasattr(identifier.owner, 'matchup'):
-                        if use_team_code_names:
-                            checkin_dict['owner_name'] = identifier.owner.matchup_codes
-                        else:
-                            checkin_dict['owner_name'] = identifier.owner.matchup
-                    else:
-                        checkin_dict['owner_name'] = identifier.owner.name
-
-                    return_content['checkins'].append(checkin_dict)
-                else:
-                    # If undoing/revoking a check-in
-                    if content['type'] == 'people':
-                        window = 'checkin_window_people'
-                    else:
-                        window = 'checkin_window_venues'
-
-                    checkins = get_unexpired_checkins(self.tournament, window)
-                    checkins.filter(identifier=identifier).delete()
-                    return_content['checkins'].append({'identifier': barcode})
-
-            except ObjectDoesNotExist:
-                # Only raise an error for single check-ins as for multi-check-in
-                # events via the status page its clear what has failed or not
-                if len(barcode_ids) == 1:
-                    msg = _("Sent checkin identifier doesn't exist")
-                    self.send_error(_("Checkins"), msg, content)
-                    return
+        identifiers = get_identifiers(barcode_ids)
+        found = [barcode for barcode in barcode_ids if barcode in identifiers]
+
+        # Only raise an error for single check-ins as for multi-check-in
+        # events via the status page its clear what has failed or not
+        if len(barcode_ids) == 1 and not found:
+            msg = _("Sent checkin identifier doesn't exist")
+            self.send_error(_("Checkins"), msg, content)
+            return None
+
+        if content['status'] is True:
+            # If checking-in people
+            use_team_code_names = use_team_code_names_data_entry(self.tournament, True)
+            checkins = Event.objects.bulk_create([Event(identifier=identifiers[barcode], tournament=self.tournament)
+                                                  for barcode in found])
+            for checkin in checkins:
+                checkin_dict = checkin.serialize()
+                checkin_dict['owner_name'] = self.get_owner_name(checkin.identifier, use_team_code_names)
+                return_content['checkins'].append(checkin_dict)
+        else:
+            # If undoing/revoking check-ins
+            if content['type'] == 'people':
+                window = 'checkin_window_people'
+            else:
+                window = 'checkin_window_venues'
+
+            checkins = get_unexpired_checkins(self.tournament, window)
+            checkins.filter(identifier__in=[identifiers[barcode] for barcode in found]).delete()
+            return_content['checkins'] = [{'identifier': barcode} for barcode in found]
 
         if len(return_content['checkins']) == 0 and content['status'] is not False:
             msg = _("No checkin identifiers exist for sent barcodes")
             self.send_error(_("Checkins"), msg, content)
-            return
+            return None
 
-        self.send_json(return_content)
+        return return_content
+
+    def broadcast_checkin(self, event):
+        self.send_json(event['content'])
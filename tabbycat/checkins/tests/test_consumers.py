@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from checkins.consumers import CheckInEventConsumer
+from checkins.models import Event, PersonIdentifier, VenueIdentifier
+from checkins.utils import create_identifiers
+from participants.models import Speaker
+from utils.tests import CompletedTournamentTestMixin
+from venues.models import Venue
+
+
+class TestCheckInEventConsumer(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        create_identifiers(PersonIdentifier, Speaker.objects.filter(team__tournament=self.tournament))
+        create_identifiers(VenueIdentifier, Venue.objects.filter(tournament=self.tournament))
+        self.barcodes = list(PersonIdentifier.objects.filter(
+            person__speaker__team__tournament=self.tournament).values_list('barcode', flat=True))
+
+        self.consumer = CheckInEventConsumer()
+        self.consumer.scope = {
+            'user': get_user_model().objects.create(username='test_admin', is_superuser=True),
+            'url_route': {'kwargs': {'tournament_slug': self.tournament.slug}},
+        }
+        self.consumer.channel_layer = mock.Mock(group_send=mock.AsyncMock())
+        self.consumer.send_json = mock.Mock()
+
+    def tearDown(self):
+        cache.clear()
+
+    def receive(self, barcodes, status=True):
+        self.consumer.channel_layer.group_send.reset_mock()
+        self.consumer.send_json.reset_mock()
+        self.consumer.receive_json({'barcodes': barcodes, 'status': status, 'type': 'people', 'component_id': 1})
+
+    def broadcast(self):
+        self.assertEqual(self.consumer.channel_layer.group_send.call_count, 1)
+        return self.consumer.channel_layer.group_send.call_args.args[1]['content']
+
+    def test_checkin(self):
+        self.receive(self.barcodes)
+        content = self.broadcast()
+        self.assertIs(content['created'], True)
+        self.assertEqual([c['identifier'] for c in content['checkins']], self.barcodes)
+        self.assertTrue(all(c['owner_name'] and c['id'] for c in content['checkins']))
+        self.assertEqual(Event.objects.filter(tournament=self.tournament).count(), len(self.barcodes))
+
+        # Other consumers only pass on the broadcast, without touching the database
+        with CaptureQueriesContext(connection) as context:
+            self.consumer.broadcast_checkin({'content': content})
+        self.assertEqual(len(context.captured_queries), 0)
+        self.consumer.send_json.assert_called_once_with(content)
+
+    def test_venue_checkin(self):
+        barcode = VenueIdentifier.objects.filter(venue__tournament=self.tournament).first().barcode
+        self.receive([barcode])
+        self.assertEqual(self.broadcast()['checkins'][0]['identifier'], barcode)
+
+    def test_revoke(self):
+        self.receive(self.barcodes)
+        self.receive(self.barcodes[:5], status=False)
+        self.assertEqual(self.broadcast()['checkins'], [{'identifier': b} for b in self.barcodes[:5]])
+        self.assertEqual(Event.objects.filter(tournament=self.tournament).count(), len(self.barcodes) - 5)
+
+    def test_fixed_queries(self):
+        self.receive(self.barcodes[:1])  # create preferences
+        with CaptureQueriesContext(connection) as small:
+            self.receive(self.barcodes[:2])
+        with CaptureQueriesContext(connection) as large:
+            self.receive(self.barcodes)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_unknown_barcodes(self):
+        self.receive(["000000"])
+        self.consumer.channel_layer.group_send.assert_not_called()
+        self.assertEqual(self.consumer.send_json.call_args.args[0]['message'], "Sent checkin identifier doesn't exist")
+
+        self.receive(["000000", "000001"])
+        self.consumer.channel_layer.group_send.assert_not_called()
+        self.assertEqual(self.consumer.send_json.call_args.args[0]['message'],
+                         "No checkin identifiers exist for sent barcodes")
+
+        self.receive(["000000", self.barcodes[0]])
+        self.assertEqual([c['identifier'] for c in self.broadcast()['checkins']], self.barcodes[:1])
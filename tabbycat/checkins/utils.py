@@ -32,6 +32,20 @@ def delete_identifiers(queryset):
     return klass.objects.filter(**{attr + '__in': queryset}).delete()
 
 
+def get_identifiers(barcodes):
+    """Returns a dict mapping each of `barcodes` that has an identifier to that
+    identifier, with its owner already loaded, in one query per kind of
+    identifier."""
+    querysets = [
+        PersonIdentifier.objects.select_related('person'),
+        DebateIdentifier.objects.select_related('debate__round__tournament').prefetch_related(
+            'debate__debateteam_set__team'),
+        VenueIdentifier.objects.select_related('venue'),
+    ]
+    return {identifier.barcode: identifier for queryset in querysets
+            for identifier in queryset.filter(barcode__in=barcodes)}
+
+
 def get_unexpired_checkins(tournament, window_preference_type):
     filters = Q(tournament=tournament)
     if window_preference_type:
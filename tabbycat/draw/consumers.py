@@ -1,22 +1,58 @@
 import logging
+import threading
+import uuid
+from contextlib import contextmanager
 
 from asgiref.sync import async_to_sync
 from channels.consumer import SyncConsumer
 from channels.generic.websocket import JsonWebsocketConsumer
 from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext as _
+from django.utils.translation import gettext_lazy
 
 from actionlog.models import ActionLogEntry
+from adjallocation.allocation import save_adjudicator_types
+from adjallocation.models import DebateAdjudicator
 from adjallocation.serializers import SimpleDebateAllocationSerializer, SimpleDebateImportanceSerializer
+from standings.base import StandingsError
+from standings.views import BaseStandingsView
 from tournaments.mixins import RoundWebsocketMixin
+from tournaments.models import Round
 from users.permissions import Permission
+from utils.misc import reverse_round, reverse_tournament
 from utils.mixins import SuperuserRequiredWebsocketMixin
+from venues.allocator import allocate_venues
+from venues.models import VenueConstraint
 from venues.serializers import SimpleDebateVenueSerializer
 
+from .generator import DrawFatalError, DrawUserError
+from .manager import DrawManager
 from .models import Debate, DebateTeam
 from .serializers import EditDebateTeamsDebateSerializer, SimpleDebateSideStatusSerializer
 
 logger = logging.getLogger(__name__)
 
+DRAW_GENERATION_STATUS_KEY = "draw_generation_status_%d"
+DRAW_GENERATION_LOCK_KEY = "draw_generation_lock_%d"
+DRAW_GENERATION_CLAIM_KEY = "draw_generation_claim_%d"
+DRAW_GENERATION_TIMEOUT = 60 * 60
+# The lock is taken when the draw is queued, and lasts as long as a draw may
+# wait for a worker. The worker running the draw also holds a claim, which
+# expires soon after it stops refreshing it, so that a worker that dies
+# doesn't block draw generation for the round.
+DRAW_GENERATION_CLAIM_TIMEOUT = 2 * 60
+DRAW_GENERATION_CLAIM_REFRESH = 30
+
+DRAW_GENERATION_STAGES = {
+    "teams": gettext_lazy("Fetching teams and standings"),
+    "history": gettext_lazy("Loading team histories"),
+    "pairing": gettext_lazy("Pairing teams"),
+    "saving": gettext_lazy("Saving debates"),
+    "venues": gettext_lazy("Allocating rooms"),
+}
+
 
 class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWebsocketMixin, JsonWebsocketConsumer):
     """For receiving updates to either debates or preformed panels; making the
@@ -67,39 +103,35 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
         del content_to_return['importance'] # Reserialise as debatesOrPanels
         self.return_attributes(content_to_return, serialized)
 
-    def delete_adjudicators(self, debate_or_panel, adj_ids):
-        return debate_or_panel.related_adjudicator_set.exclude(
-            adjudicator_id__in=adj_ids).delete()
-
-    def create_adjudicators(self, debate_or_panel, adj_id, adj_type):
-        return debate_or_panel.related_adjudicator_set.update_or_create(
-            adjudicator_id=adj_id, defaults={'type': adj_type})
-
     def receive_adjudicators(self, content):
-        """ Update adjudicators on the django data then reserialize/return it """
+        """ Update adjudicators on the django data, in bulk, then broadcast the
+        new adjudicators of only those debates/panels that actually changed.
+        The broadcast is built from the sent data rather than re-serialised."""
         changes = {int(c['id']): c for c in content['adjudicators']}
-        # TODO: prefetch the adjudicator allocation objects
         debates_or_panels = self.get_debates_or_panels(changes)
+
+        types = {}
         for d_or_p in debates_or_panels:
-            sent_allocation = changes[d_or_p.id]['adjudicators']
-            sent_allocation_ids = []
-            for (position, position_ids) in sent_allocation.items():
-                sent_allocation_ids.extend(adj_id for adj_id in position_ids)
-
-            # Delete adjudicators in the posted information
-            self.delete_adjudicators(d_or_p, sent_allocation_ids)
-            # Re-create positions of adjudicators in debate
-            for (position, position_ids) in sent_allocation.items():
-                for adjudicator_id in position_ids:
-                    self.create_adjudicators(d_or_p, adjudicator_id, position)
-
-        # Re-fetch the modified data
-        # TODO: is it necessary to re-fetch? Or should the objects be returned?
-        debates_or_panels = self.get_debates_or_panels(changes)
-        serialized = self.adjudicators_serializer(debates_or_panels, many=True)
-        content_to_return = content.copy()
-        del content_to_return['adjudicators']
-        self.return_attributes(content_to_return, serialized)
+            types[d_or_p.id] = {adj_id: position
+                for position, position_ids in changes[d_or_p.id]['adjudicators'].items()
+                for adj_id in position_ids}
+        changed = save_adjudicator_types(debates_or_panels, types)
+        if not changed:
+            return
+
+        serialized = []
+        for d_or_p_id in sorted(changed):
+            adjudicators = {key: [] for key, label in DebateAdjudicator.TYPE_CHOICES}
+            for adj_id, position in types[d_or_p_id].items():
+                adjudicators[position].append(adj_id)
+            serialized.append({'id': d_or_p_id, 'adjudicators': adjudicators})
+
+        async_to_sync(get_channel_layer().group_send)(
+            self.group_name(), {
+                'type': 'broadcast_debates_or_panels',
+                'content': {'componentID': content.get('componentID'), 'debatesOrPanels': serialized},
+            },
+        )
 
     def return_attributes(self, original_content, serialized_content):
         """ Return the original JSON but with the generic debatesOrPanels key """
@@ -234,3 +266,188 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
                 'content': content,
             },
         )
+
+
+class DrawGenerationConsumer(SuperuserRequiredWebsocketMixin, RoundWebsocketMixin, JsonWebsocketConsumer):
+    """Reports the progress of draws being generated by the "draw" worker."""
+    group_prefix = 'draw_generation'
+    access_permission = Permission.GENERATE_DEBATE
+
+    def connect(self):
+        super().connect()
+        # The worker may have made progress before the client connected
+        status = get_draw_generation_status(self.round)
+        if status is not None:
+            self.send_json({'data': status})
+
+
+def get_draw_generation_status(round):
+    """Returns the last status sent by the worker for `round`, or None if
+    there isn't one. If the draw is still queued but its lock has expired, or
+    running but the worker's claim has expired, the worker must have stopped
+    without finishing, so the status is replaced with an error and the lock
+    released."""
+    status = cache.get(DRAW_GENERATION_STATUS_KEY % round.id)
+    if status is None:
+        return None
+    if (status['status'] == 'queued' and cache.get(DRAW_GENERATION_LOCK_KEY % round.id) is None) or \
+            (status['status'] == 'running' and cache.get(DRAW_GENERATION_CLAIM_KEY % round.id) is None):
+        logger.warning("Draw generation for %s stopped without finishing", round.name)
+        status = {'status': 'error', 'message': _("The draw could not be created, because the worker "
+                  "generating it stopped unexpectedly. Please try again.")}
+        cache.set(DRAW_GENERATION_STATUS_KEY % round.id, status, DRAW_GENERATION_TIMEOUT)
+        cache.delete(DRAW_GENERATION_LOCK_KEY % round.id)
+    return status
+
+
+def clear_draw_generation_status(round):
+    cache.delete(DRAW_GENERATION_STATUS_KEY % round.id)
+
+
+def queue_draw_generation(round, user):
+    """Sends a draw for `round` to the "draw" worker to be generated. Returns
+    False, without doing anything, if one is already queued or being
+    generated. The lock is held with a token identifying this draw, which the
+    worker uses to claim it."""
+    get_draw_generation_status(round)  # releases the lock if the last worker died
+    token = uuid.uuid4().hex
+    if not cache.add(DRAW_GENERATION_LOCK_KEY % round.id, token, DRAW_GENERATION_TIMEOUT):
+        return False
+    cache.set(DRAW_GENERATION_STATUS_KEY % round.id, {'status': 'queued'}, DRAW_GENERATION_TIMEOUT)
+    group_name = "_".join([DrawGenerationConsumer.group_prefix, round.tournament.slug, str(round.seq)])
+    async_to_sync(get_channel_layer().send)("draw", {
+        "type": "generate_draw",
+        "extra": {'user_id': user.id, 'round_id': round.id, 'group_name': group_name, 'token': token},
+    })
+    return True
+
+
+def _claim_draw_generation(round, token):
+    """Claims the draw with lock `token` for this worker. Returns False if
+    another worker has already claimed the round, or if the lock no longer
+    has this token (because the draw was already generated or abandoned)."""
+    if not cache.add(DRAW_GENERATION_CLAIM_KEY % round.id, token, DRAW_GENERATION_CLAIM_TIMEOUT):
+        return False
+    if cache.get(DRAW_GENERATION_LOCK_KEY % round.id) != token:
+        cache.delete(DRAW_GENERATION_CLAIM_KEY % round.id)
+        return False
+    return True
+
+
+def _release_draw_generation(round, token):
+    for key in [DRAW_GENERATION_CLAIM_KEY, DRAW_GENERATION_LOCK_KEY]:
+        if cache.get(key % round.id) == token:
+            cache.delete(key % round.id)
+
+
+@contextmanager
+def _hold_draw_generation_claim(round, token):
+    """Keeps refreshing the claim on `round` from a background thread until
+    the block exits."""
+    stop = threading.Event()
+
+    def refresh():
+        while not stop.wait(DRAW_GENERATION_CLAIM_REFRESH):
+            if cache.get(DRAW_GENERATION_CLAIM_KEY % round.id) == token:
+                cache.set(DRAW_GENERATION_CLAIM_KEY % round.id, token, DRAW_GENERATION_CLAIM_TIMEOUT)
+
+    thread = threading.Thread(target=refresh, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+class DrawGenerationWorkerConsumer(EditDebateOrPanelWorkerMixin):
+    """Generates draws outside the request-response cycle, so that large draws
+    don't time out. Each worker generates one draw at a time; to generate draws
+    for several tournaments at once, run several workers on the "draw" channel.
+    """
+
+    def send_status(self, round, group_name, **status):
+        cache.set(DRAW_GENERATION_STATUS_KEY % round.id, status, DRAW_GENERATION_TIMEOUT)
+        async_to_sync(get_channel_layer().group_send)(group_name, {
+            "type": "send_json",
+            "data": status,
+        })
+
+    def generate_draw(self, event):
+        extra = event['extra']
+        round = Round.objects.select_related('tournament').get(id=extra['round_id'])
+        if not _claim_draw_generation(round, extra['token']):
+            logger.warning("Not generating draw for %s, it was already claimed or abandoned", round.name)
+            return
+        try:
+            with _hold_draw_generation_claim(round, extra['token']):
+                self._generate_draw(round, extra)
+        except Exception:
+            logger.exception("Unexpected error generating draw for %s", round.name)
+            self.send_status(round, extra['group_name'], status='error',
+                message=_("The draw could not be created because of an unexpected error."))
+        finally:
+            _release_draw_generation(round, extra['token'])
+
+    def _generate_draw(self, round, extra):
+        group_name = extra['group_name']
+        availability_url = reverse_round('availability-index', round)
+
+        def progress(stage):
+            self.send_status(round, group_name, status='running', stage=stage,
+                             description=str(DRAW_GENERATION_STAGES[stage]))
+
+        try:
+            with transaction.atomic():
+                # Lock the round, so that no other draw can be created for it meanwhile
+                round.draw_status = Round.objects.select_for_update().values_list(
+                    'draw_status', flat=True).get(id=round.id)
+                if round.draw_status != Round.Status.NONE:
+                    self.send_status(round, group_name, status='error',
+                        message=_("Could not create draw for %(round)s, there was already a draw!") % {'round': round.name})
+                    return
+                DrawManager(round).create(progress=progress)
+        except DrawUserError as e:
+            message = _(
+                "<p>The draw could not be created, for the following reason: "
+                "<em>%(message)s</em></p>\n"
+                "<p>Please fix this issue before attempting to create the draw.</p>",
+            ) % {'message': str(e)}
+            logger.warning("User error creating draw: " + str(e), exc_info=True)
+            self.send_status(round, group_name, status='error', message=message, redirect=availability_url)
+            return
+        except DrawFatalError as e:
+            message = _(
+                "<p>The draw could not be created, because the following error occurred: "
+                "<em>%(message)s</em></p>\n"
+                "<p>If this issue persists and you're not sure how to resolve it, please "
+                "contact the developers.</p>",
+            ) % {'message': str(e)}
+            logger.exception("Fatal error creating draw: " + str(e))
+            self.send_status(round, group_name, status='error', message=message, redirect=availability_url)
+            return
+        except StandingsError as e:
+            message = _(
+                "<p>The team standings could not be generated, because the following error occurred: "
+                "<em>%(message)s</em></p>\n"
+                "<p>Because generating the draw uses the current team standings, this "
+                "prevents the draw from being generated.</p>",
+            ) % {'message': str(e)}
+            standings_options_url = reverse_tournament('options-tournament-section', round.tournament, kwargs={'section': 'standings'})
+            instructions = BaseStandingsView.admin_standings_error_instructions % {'standings_options_url': standings_options_url}
+            logger.exception("Error generating standings for draw: " + str(e))
+            self.send_status(round, group_name, status='error', message=message + instructions, redirect=availability_url)
+            return
+
+        warning = None
+        progress("venues")
+        relevant_adj_venue_constraints = VenueConstraint.objects.filter(
+                adjudicator__in=round.tournament.relevant_adjudicators)
+        if not relevant_adj_venue_constraints.exists():
+            allocate_venues(round)
+        else:
+            warning = _("Rooms were not auto-allocated because there are one or more adjudicator room constraints. "
+                "You should run room allocations after allocating adjudicators.")
+
+        self.log_action(extra, round, ActionLogEntry.ActionType.DRAW_CREATE)
+        self.send_status(round, group_name, status='done', message=warning, redirect=reverse_round('draw', round))
@@ -0,0 +1,141 @@
+"""Solvers for the linear assignment problem, used by the draw generators and
+adjudicator allocators that are based on the Hungarian algorithm.
+
+All solvers take a cost matrix, either as a list of lists or as a NumPy array,
+in which disallowed assignments are marked with `DISALLOWED`. The matrix need
+not be square. They return a list of `(row, col)` tuples, sorted by row, with
+one tuple for each row (if there are no more rows than columns) or for each
+column (otherwise)."""
+
+import munkres
+import numpy as np
+
+DISALLOWED = float('inf')
+
+
+class UnsolvableAssignmentError(ValueError):
+    """Raised when the disallowed entries of a cost matrix leave no complete
+    assignment possible."""
+    pass
+
+
+def _as_array(costs):
+    """Converts `costs` to a two-dimensional float array. Disallowed entries
+    (including `munkres.DISALLOWED`) become infinity."""
+    if isinstance(costs, np.ndarray):
+        array = costs.astype(float)
+    else:
+        array = np.array([[DISALLOWED if c is munkres.DISALLOWED else c for c in row] for row in costs], dtype=float)
+        if array.ndim == 1:  # no rows
+            array = array.reshape(0, 0)
+    if np.isnan(array).any():
+        raise ValueError("Cost matrix contains NaN")
+    if np.isneginf(array).any():
+        raise ValueError("Cost matrix contains negative infinity")
+    return array
+
+
+def solve_munkres(costs):
+    """Solves the assignment problem using the pure-Python `munkres` package.
+    This is slow, roughly O(n³) in Python operations, but is kept for
+    comparison and as a fallback."""
+    array = _as_array(costs)
+    if array.size == 0:
+        return []
+    matrix = [[munkres.DISALLOWED if c == DISALLOWED else c for c in row] for row in array.tolist()]
+    try:
+        indices = munkres.Munkres().compute(matrix)
+    except munkres.UnsolvableMatrix as e:
+        raise UnsolvableAssignmentError(str(e)) from e
+    return sorted(indices)
+
+
+def solve_jv(costs):
+    """Solves the assignment problem using a shortest augmenting path algorithm
+    in the style of Jonker and Volgenant, as described in D. F. Crouse, "On
+    implementing 2D rectangular assignment algorithms", IEEE Trans. Aerospace
+    and Electronic Systems 52(4), 2016.
+
+    Each row is added to the assignment in turn, by finding a shortest
+    augmenting path with Dijkstra's algorithm on reduced costs. The inner loop
+    over columns is done with NumPy array operations, so this takes O(n²)
+    Python operations, rather than O(n³)."""
+    array = _as_array(costs)
+    transposed = array.shape[0] > array.shape[1]
+    if transposed:
+        array = array.T
+    nr, nc = array.shape
+
+    u = np.zeros(nr)  # dual variables for rows
+    v = np.zeros(nc)  # dual variables for columns
+    col4row = np.full(nr, -1)
+    row4col = np.full(nc, -1)
+
+    for cur_row in range(nr):
+        shortest = np.full(nc, np.inf)
+        path = np.full(nc, -1)
+        visited_rows = np.zeros(nr, dtype=bool)
+        remaining = np.ones(nc, dtype=bool)
+        min_val = 0.0
+        i = cur_row
+        sink = -1
+
+        while sink == -1:
+            visited_rows[i] = True
+            reduced = min_val + array[i] - u[i] - v
+            update = remaining & (reduced < shortest)
+            path[update] = i
+            shortest[update] = reduced[update]
+
+            # Choose the closest remaining column, preferring unassigned ones
+            candidates = np.flatnonzero(remaining)
+            lowest = shortest[candidates].min()
+            if lowest == np.inf:
+                raise UnsolvableAssignmentError("Cost matrix has no complete assignment")
+            closest = candidates[shortest[candidates] == lowest]
+            unassigned = closest[row4col[closest] == -1]
+            j = unassigned[0] if len(unassigned) > 0 else closest[0]
+
+            min_val = lowest
+            remaining[j] = False
+            if row4col[j] == -1:
+                sink = j
+            else:
+                i = row4col[j]
+
+        # Update dual variables
+        u[cur_row] += min_val
+        others = visited_rows.copy()
+        others[cur_row] = False
+        u[others] += min_val - shortest[col4row[others]]
+        v[~remaining] -= min_val - shortest[~remaining]
+
+        # Augment along the path back to the current row
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+    if transposed:
+        return sorted((int(col4row[i]), i) for i in range(nr))
+    return [(i, int(col4row[i])) for i in range(nr)]
+
+
+SOLVERS = {
+    "jv": solve_jv,
+    "munkres": solve_munkres,
+}
+
+
+def solve_assignment(costs, solver="jv"):
+    """Solves the assignment problem for the cost matrix `costs`, using the
+    solver named by `solver` (a key of `SOLVERS`). Returns a list of
+    `(row, col)` tuples, sorted by row."""
+    try:
+        function = SOLVERS[solver]
+    except KeyError:
+        raise ValueError("Invalid assignment solver: {0}".format(solver))
+    return function(costs)
@@ -1,19 +1,31 @@
 import logging
+import os
 import random
 import time
 from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import combinations
 from math import log2
 from statistics import pvariance
 
-import munkres
+import numpy as np
 from django.utils.translation import gettext as _
 
+from .assignment import DISALLOWED, solve_assignment
 from .common import BaseBPDrawGenerator, DrawUserError
 from .pairing import PolyPairing
 
 logger = logging.getLogger(__name__)
 
 
+def _solve_shuffled(costs, rows, cols, solver):
+    """Solves the assignment problem `costs` with its rows and columns permuted
+    by `rows` and `cols`, and returns the assignment in the original indices.
+    This is a module-level function so that it can run in a process pool."""
+    indices = solve_assignment(costs[np.ix_(rows, cols)], solver)
+    return [(rows[i], cols[j]) for i, j in indices]
+
+
 class BPHungarianDrawGenerator(BaseBPDrawGenerator):
     """Power-paired draw for BP based on the Hungarian algorithm.
     With default options, this is WUDC-compliant.
@@ -64,6 +76,20 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             "hungarian_preshuffled" - Hungarian algorithm, with the rows and
                                       columns of the cost matrix permuted
                                       randomly beforehand.
+
+        "assignment_restarts" - (int) With "hungarian_preshuffled", the number
+                                of shuffled assignments to try. Of these, the
+                                one in which the fewest teams meet again is
+                                used. Requires Team.seen() if more than 1.
+
+        "assignment_time_limit" - (float) Time in seconds after which no
+                                  further shuffled assignments are waited for.
+                                  Attempts are run in a pool of processes.
+
+        "assignment_solver" - Implementation used to solve the assignment
+                              problem, a key of `assignment.SOLVERS`. All
+                              solvers give an optimal assignment, but "jv" is
+                              much faster than "munkres".
     """
 
     requires_even_teams = True
@@ -75,13 +101,15 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         "renyi_order"      : 1.0,
         "exponent"         : 4.0,
         "assignment_method": "hungarian_preshuffled",
+        "assignment_restarts": 1,
+        "assignment_time_limit": 10.0,
+        "assignment_solver": "jv",
     }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.check_teams_for_attribute("points")
         self.check_teams_for_attribute("side_history")
-        self.munkres = munkres.Munkres()
 
     def generate(self):
         self._rooms = self.define_rooms([team.points for team in self.teams])
@@ -217,10 +245,99 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             return (2 - log2(sum([p ** α for p in probs])) / (1 - α)) * n
         return _position_cost_renyi_entropy
 
+    # Vectorized position cost functions. Each takes an array of shape
+    # (nteams, 4) of position histories, and returns an array of the same shape,
+    # whose (t, pos) element is the cost of putting team t in position pos.
+    # Each is equivalent to the corresponding scalar function above.
+
+    POSITION_COSTS_FUNCTIONS = {
+        "simple" : "_position_costs_simple",
+        "variance": "_position_costs_variance",
+    }
+
+    @staticmethod
+    def get_entropy_position_costs_function(α):  # noqa: N803
+        if α == 1.0:
+            logger.info("Using Shannon entropy (α = 1)")
+            return BPHungarianDrawGenerator._position_costs_shannon_entropy
+        elif α == 0.0:
+            logger.info("Using min-entropy (α = 0)")
+            return BPHungarianDrawGenerator._position_costs_min_entropy
+        elif α > 0.0:
+            logger.info("Using Rényi entropy with α = %f", α)
+            return BPHungarianDrawGenerator._get_position_costs_renyi_entropy_function(α)
+        else:
+            raise DrawUserError(_("The Rényi order can't be negative, and it's currently set "
+                "to %(alpha)f.") % {'alpha': α})
+
+    def get_position_costs_function(self):
+        """Like `get_position_cost_function()`, but returns the vectorized
+        version of the position cost function. Returns None if the position
+        cost option is a custom (scalar) function."""
+        if callable(self.options["position_cost"]):
+            return None
+        elif self.options["position_cost"] == "entropy":
+            return self.get_entropy_position_costs_function(self.options["renyi_order"])
+        else:
+            return self.get_option_function("position_cost", self.POSITION_COSTS_FUNCTIONS)
+
+    @staticmethod
+    def _update_histories(histories):
+        """Returns an array of shape (nteams, 4, 4), whose [t, pos] element is
+        the position history of team t after being put in position pos."""
+        return histories[:, np.newaxis, :] + np.eye(histories.shape[1])
+
+    @staticmethod
+    def _probabilities(histories):
+        n = histories.sum(axis=2)
+        return histories / n[..., np.newaxis], n
+
+    @staticmethod
+    def _position_costs_simple(histories):
+        return histories.copy()
+
+    @staticmethod
+    def _position_costs_variance(histories):
+        return BPHungarianDrawGenerator._update_histories(histories).var(axis=2)
+
+    @staticmethod
+    def _position_costs_shannon_entropy(histories):
+        histories = BPHungarianDrawGenerator._update_histories(histories)
+        probs, n = BPHungarianDrawGenerator._probabilities(histories)
+        selfinfo = -probs * np.log2(np.where(probs > 0, probs, 1))
+        return (2 - selfinfo.sum(axis=2)) * n
+
+    @staticmethod
+    def _position_costs_min_entropy(histories):
+        histories = BPHungarianDrawGenerator._update_histories(histories)
+        return (2 - np.log2((histories > 0).sum(axis=2))) * histories.sum(axis=2)
+
+    @staticmethod
+    def _get_position_costs_renyi_entropy_function(α):  # noqa: N803
+        def _position_costs_renyi_entropy(histories):
+            histories = BPHungarianDrawGenerator._update_histories(histories)
+            probs, n = BPHungarianDrawGenerator._probabilities(histories)
+            return (2 - np.log2((probs ** α).sum(axis=2)) / (1 - α)) * n
+        return _position_costs_renyi_entropy
+
+    def generate_position_costs(self):
+        """Returns an array of shape (nteams, 4), whose (t, pos) element is the
+        position cost of putting `self.teams[t]` in position `pos`, raised to
+        the power given by the "exponent" option."""
+        costs = self.get_position_costs_function()
+        if costs is None:
+            cost = self.get_position_cost_function()
+            position_costs = np.array([[cost(pos, team.side_history) for pos in range(4)]
+                                       for team in self.teams], dtype=float)
+        else:
+            histories = np.array([team.side_history for team in self.teams], dtype=float)
+            position_costs = costs(histories.reshape(len(self.teams), 4))
+        return position_costs ** self.options["exponent"]
+
     def generate_cost_matrix(self, rooms):
-        """Returns a cost matrix for the tournament.
-        Rows (inner lists) are teams, in the same order as in `self.teams`.
-        Columns (elements) are positions in rooms, ordered first by room in the
+        """Returns a cost matrix for the tournament, as a NumPy array.
+        Rows are teams, in the same order as in `self.teams`.
+        Columns are positions in rooms, ordered first by room in the
         order returned by `rooms`, then in speaking order (OG, OO, CG, CO).
         Rules:
          - if the team (given its points) is not allowed in the room, use
@@ -229,21 +346,18 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
            (for a team with that position history).
         """
         nteams = len(self.teams)
-        cost = self.get_position_cost_function()
-        exponent = self.options["exponent"]
-
-        costs = []
-        for team in self.teams:
-            row = []
-            for level, allowed in rooms:
-                if team.points not in allowed:
-                    row.extend([munkres.DISALLOWED] * 4)
-                else:
-                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
-            assert len(row) == nteams
-            costs.append(row)
-
-        assert len(costs) == nteams
+        position_costs = self.generate_position_costs()
+
+        # Whether each team is allowed in each room, computed once per points value
+        allowed_by_points = {points: [points in allowed for level, allowed in rooms]
+                             for points in set(team.points for team in self.teams)}
+        team_allowed = np.array([allowed_by_points[team.points] for team in self.teams],
+                                dtype=bool).reshape(nteams, len(rooms))
+
+        costs = np.where(team_allowed[:, :, np.newaxis], position_costs[:, np.newaxis, :], DISALLOWED)
+        costs = costs.reshape(nteams, len(rooms) * 4)
+
+        assert costs.shape == (nteams, nteams)
         return costs
 
     # Assignment algorithms
@@ -267,15 +381,58 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         return indices
 
     def _assign_hungarian(self, costs):
-        return self.munkres.compute(costs)
+        return solve_assignment(costs, self.options["assignment_solver"])
 
     def _assign_hungarian_preshuffled(self, costs):
+        """Solves the assignment problem after shuffling it, as many times as
+        the "assignment_restarts" option allows, and returns the assignment in
+        which the fewest teams meet again. Every shuffle gives an optimal
+        assignment, so this only chooses between equally good position
+        allocations.
+
+        With more than one attempt, the attempts are solved in a process pool.
+        Those not finished by the time limit are abandoned, unless none has
+        finished, in which case the first to finish is used."""
+        restarts = self.options["assignment_restarts"]
+        solver = self.options["assignment_solver"]
+        costs = np.asarray(costs, dtype=float)
         n = len(costs)
-        K = random.sample(range(n), n)             # noqa: N806
-        J = random.sample(range(n), n)             # noqa: N806
-        C = [[costs[i][j] for j in J] for i in K]  # noqa: N806
-        indices = self.munkres.compute(C)
-        return [(K[i], J[j]) for i, j in indices]
+        shuffles = [(random.sample(range(n), n), random.sample(range(n), n)) for i in range(restarts)]
+
+        if restarts == 1:
+            return _solve_shuffled(costs, *shuffles[0], solver)
+
+        deadline = time.monotonic() + self.options["assignment_time_limit"]
+        executor = ProcessPoolExecutor(max_workers=min(restarts, os.cpu_count() or 1))
+        try:
+            futures = [executor.submit(_solve_shuffled, costs, rows, cols, solver) for rows, cols in shuffles]
+            done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            if not done:
+                done, not_done = wait(futures, return_when=FIRST_COMPLETED)
+            if not_done:
+                logger.info("Using %d of %d attempts, time limit reached", len(done), restarts)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        best = best_score = None
+        for attempt, future in enumerate(futures, start=1):
+            if future not in done:
+                continue
+            indices = future.result()
+            score = self.count_repeat_meetings(indices)
+            logger.info("Attempt %d: %d repeat meetings", attempt, score)
+            if best is None or score < best_score:
+                best, best_score = indices, score
+
+        return best
+
+    def count_repeat_meetings(self, indices):
+        """Returns the total number of times that teams in the same room under
+        the assignment `indices` have met before."""
+        teams_in_room = [[] for i in range(len(indices) // 4)]
+        for t, r in indices:
+            teams_in_room[r // 4].append(self.teams[t])
+        return sum(team1.seen(team2) for teams in teams_in_room for team1, team2 in combinations(teams, 2))
 
     # Make pairings
 
@@ -158,6 +158,8 @@ class BasePairDrawGenerator(BaseDrawGenerator):
         "avoid_institution" - if True, draw tries to avoid pairing teams that
             are from the same institution.
         "side_penalty" - A penalty to apply when optimizing with side balance
+        "assignment_solver" - Implementation used to solve assignment problems,
+            where applicable; a key of `assignment.SOLVERS`.
         """
 
     BASE_DEFAULT_OPTIONS = {
@@ -170,6 +172,7 @@ class BasePairDrawGenerator(BaseDrawGenerator):
         "pullup_debates_penalty": 0,
         "pairing_penalty"       : 0,
         "avoid_conflicts"       : "off",
+        "assignment_solver"     : "jv",
     }
 
     TEAMS_IN_DEBATE = 2
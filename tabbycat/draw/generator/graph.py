@@ -1,9 +1,10 @@
 from collections import OrderedDict
+from itertools import combinations
 from typing import TYPE_CHECKING
 
-import munkres
 import networkx as nx
 
+from .assignment import DISALLOWED, solve_assignment
 from ..types import DebateSide
 
 if TYPE_CHECKING:
@@ -19,6 +20,7 @@ def sign(n: int) -> int:
 
 
 class GraphGeneratorMixin:
+
     def avoid_conflicts(self, pairings):
         """Graph optimisation avoids conflicts, so method is extraneous."""
         pass
@@ -55,6 +57,26 @@ class GraphGeneratorMixin:
     def get_n_teams(self, teams: list['Team']) -> int:
         return len(teams)
 
+    def get_edge_costs(self, teams, size, bracket=None):
+        """Returns a dict mapping index pairs `(a, b)`, with `a < b`, to the
+        cost of pairing `teams[a]` with `teams[b]`. Pairs that can't be paired
+        are omitted. Assignment costs are symmetric, so each pair is costed
+        only once."""
+        costs = {}
+        for (a, t1), (b, t2) in combinations(enumerate(teams), 2):
+            penalty = self.assignment_cost(t1, t2, size, bracket)
+            if penalty is not None:
+                costs[(a, b)] = penalty
+        return costs
+
+    def make_graph(self, teams, size, bracket=None):
+        """Returns an undirected weighted graph of the teams in a bracket."""
+        costs = self.get_edge_costs(teams, size, bracket)
+        graph = nx.Graph()
+        graph.add_nodes_from(teams)
+        graph.add_weighted_edges_from((teams[a], teams[b], cost) for (a, b), cost in costs.items())
+        return graph
+
     def generate_pairings(self, brackets):
         """Creates an undirected weighted graph for each bracket and gets the minimum weight matching"""
         from .pairing import Pairing
@@ -62,13 +84,7 @@ class GraphGeneratorMixin:
         i = 0
         for j, (points, teams) in enumerate(brackets.items()):
             pairings[points] = []
-            graph = nx.Graph()
-            n_teams = self.get_n_teams(teams)
-            for t1 in teams:
-                for t2 in teams:
-                    penalty = self.assignment_cost(t1, t2, n_teams, j)
-                    if penalty is not None:
-                        graph.add_edge(t1, t2, weight=penalty)
+            graph = self.make_graph(teams, self.get_n_teams(teams), j)
 
             for pairing in nx.min_weight_matching(graph):
                 i += 1
@@ -86,7 +102,7 @@ class GraphAllocatedSidesMixin(GraphGeneratorMixin):
     def assignment_cost(self, t1, t2, size):
         penalty = super().assignment_cost(t1, t2, size)
         if penalty is None:
-            return munkres.DISALLOWED
+            return DISALLOWED
         return penalty
 
     def generate_pairings(self, brackets):
@@ -98,7 +114,7 @@ class GraphAllocatedSidesMixin(GraphGeneratorMixin):
             n_teams = len(pool[DebateSide.AFF]) + len(pool[DebateSide.NEG])
             matrix = [[self.assignment_cost(aff, neg, n_teams) for neg in pool[DebateSide.NEG]] for aff in pool[DebateSide.AFF]]
 
-            for i_aff, i_neg in munkres.Munkres().compute(matrix):
+            for i_aff, i_neg in solve_assignment(matrix, self.options["assignment_solver"]):
                 i += 1
                 pairings[points].append(Pairing(teams=[pool[DebateSide.AFF][i_aff], pool[DebateSide.NEG][i_neg]], bracket=points, room_rank=i))
 
@@ -0,0 +1,36 @@
+"""In-memory index of which teams have faced each other, for draw generation."""
+
+from itertools import combinations, groupby
+from operator import itemgetter
+
+import numpy as np
+
+
+class PairingHistory:
+    """Holds a (team index × team index) matrix of the number of times each
+    pair of teams has met, so that draw generators can check pairing history
+    without querying the database for every pair of teams.
+
+    `team_ids` is the list of IDs of teams to index. `debate_teams` is an
+    iterable of (debate_id, team_id) tuples, one for every team in every
+    debate that counts towards history. Teams not in `team_ids` are ignored.
+    """
+
+    def __init__(self, team_ids, debate_teams):
+        self.index = {team_id: i for i, team_id in enumerate(team_ids)}
+        self.counts = np.zeros((len(self.index), len(self.index)), dtype=np.int32)
+
+        rows, cols = [], []
+        for _, group in groupby(sorted(debate_teams), key=itemgetter(0)):
+            indices = [self.index[team_id] for _, team_id in group if team_id in self.index]
+            for a, b in combinations(indices, 2):
+                rows.extend((a, b))
+                cols.extend((b, a))
+        np.add.at(self.counts, (rows, cols), 1)
+
+    def __contains__(self, team):
+        return team.id in self.index
+
+    def seen(self, team1, team2):
+        """Returns the number of times `team1` and `team2` have met."""
+        return int(self.counts[self.index[team1.id], self.index[team2.id]])
@@ -5,6 +5,7 @@ from typing import List, Tuple, TYPE_CHECKING
 
 from django.utils.translation import gettext as _
 
+from adjallocation.conflicts import bump_history_version
 from draw.generator.powerpair import BasePowerPairedDrawGenerator
 from participants.utils import get_side_history
 from results.models import BallotSubmission, TeamScore
@@ -12,6 +13,7 @@ from standings.teams import TeamStandingsGenerator
 from tournaments.models import Round
 
 from .generator import BPEliminationResultPairing, DrawGenerator, DrawUserError, ResultPairing
+from .generator.history import PairingHistory
 from .generator.utils import ispow2
 from .models import Debate, DebateTeam
 from .types import DebateSide
@@ -38,11 +40,18 @@ OPTIONS_TO_CONFIG_MAPPING = {
     "pullup"                : "draw_rules__bp_pullup_distribution",
     "position_cost"         : "draw_rules__bp_position_cost",
     "assignment_method"     : "draw_rules__bp_assignment_method",
+    "assignment_restarts"   : "draw_rules__bp_assignment_restarts",
+    "assignment_time_limit" : "draw_rules__bp_assignment_time_limit",
     "renyi_order"           : "draw_rules__bp_renyi_order",
     "exponent"              : "draw_rules__bp_position_cost_exponent",
+    "assignment_solver"     : "draw_rules__assignment_solver",
 }
 
 
+def _no_progress(stage):
+    pass
+
+
 def DrawManager(round: Round, active_only: bool = True, draw_type: Round.DrawType | str | None = None):  # noqa: N802 (factory function)
     teams_in_debate = round.tournament.pref('teams_in_debate')
     draw_type = draw_type or round.draw_type
@@ -83,6 +92,7 @@ class BaseDrawManager:
                 "side_penalty",
                 "pairing_penalty",
                 "avoid_conflicts",
+                "assignment_solver",
             ]
         return []
 
@@ -126,6 +136,15 @@ class BaseDrawManager:
             for team in teams:
                 team.side_history = [0] * len(sides)
 
+    def _populate_pairing_history(self, teams):
+        """Attaches a history index, loaded with a single query, to each team,
+        which `Team.seen()` uses instead of querying the database."""
+        debate_teams = DebateTeam.objects.filter(
+            debate__round__tournament=self.round.tournament).values_list('debate_id', 'team_id')
+        history = PairingHistory([team.id for team in teams], debate_teams)
+        for team in teams:
+            team.pairing_history = history
+
     def _populate_team_side_allocations(self, teams):
         tsas = dict()
         for tsa in self.round.teamsideallocation_set.all():
@@ -157,6 +176,7 @@ class BaseDrawManager:
 
         DebateTeam.objects.bulk_create(debateteams)
         logger.debug("Created %d debate teams", len(debateteams))
+        bump_history_version(self.round.tournament_id)  # bulk creates don't send signals
         return list(debates.values())
 
     def _make_bye_debates(self, byes: List['Team'], room_rank: int) -> list[Debate]:
@@ -171,16 +191,21 @@ class BaseDrawManager:
             dt.save()
 
             if self.round.tournament.pref('bye_team_results') == 'points':
-                bs = BallotSubmission(submitter_type=BallotSubmission.Submitter.AUTOMATION, confirmed=True, debate=debate)
+                bs = BallotSubmission(submitter_type=BallotSubmission.Submitter.AUTOMATION, debate=debate)
                 bs.save()
                 TeamScore.objects.create(ballot_submission=bs, debate_team=dt, points=1, win=True)
+                bs.confirmed = True  # after the score, so that it's counted in running totals
+                bs.save()
         return debates
 
     def delete(self):
         self.round.debate_set.all().delete()
 
-    def create(self, options: dict | None = None) -> list[Debate]:
-        """Generates a draw and populates the database with it."""
+    def create(self, options: dict | None = None, progress=_no_progress) -> list[Debate]:
+        """Generates a draw and populates the database with it.
+
+        If `progress` is given, it is called with the name of each stage
+        ("teams", "history", "pairing" or "saving") as it begins."""
 
         if self.round.draw_status != Round.Status.NONE:
             raise RuntimeError("Tried to create a draw on round that already has a draw")
@@ -195,11 +220,14 @@ class BaseDrawManager:
         if options.get("side_allocations") == "manual-ballot":
             options["side_allocations"] = "balance"
 
+        progress("teams")
         teams, byes = self.get_teams()
         results = self.get_results()
         rrseq = self.get_rrseq()
 
+        progress("history")
         self._populate_side_history(teams)
+        self._populate_pairing_history(teams)
         if options.get("side_allocations") == "preallocated":
             self._populate_team_side_allocations(teams)
 
@@ -207,7 +235,10 @@ class BaseDrawManager:
         logger.debug("Using generator type: %s", generator_type)
         drawer = DrawGenerator(self.teams_in_debate, generator_type, teams,
                 results=results, rrseq=rrseq, **options)
+        progress("pairing")
         pairings = drawer.generate()
+
+        progress("saving")
         debates = self._make_debates(pairings)
 
         debates.extend(self._make_bye_debates(byes, max([p.room_rank for p in pairings], default=0)))
@@ -246,7 +277,8 @@ class PowerPairedDrawManager(BaseDrawManager):
                 "pullup_restriction", "side_allocations",
             ])
         elif self.teams_in_debate == 4:
-            options.extend(["pullup", "position_cost", "assignment_method", "renyi_order", "exponent"])
+            options.extend(["pullup", "position_cost", "assignment_method", "assignment_restarts",
+                            "assignment_time_limit", "assignment_solver", "renyi_order", "exponent"])
         return options
 
     def get_teams(self) -> Tuple[List['Team'], List['Team']]:
@@ -300,7 +332,7 @@ class SeededDrawManager(BaseDrawManager):
         if self.teams_in_debate == 2:
             options.extend(["avoid_conflicts", "pairing_method", "side_allocations"])
         elif self.teams_in_debate == 4:
-            options.extend(["assignment_method"])
+            options.extend(["assignment_method", "assignment_restarts", "assignment_time_limit", "assignment_solver"])
         return options
 
     def get_teams(self) -> Tuple[List['Team'], List['Team']]:
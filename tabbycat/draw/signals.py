@@ -0,0 +1,54 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from adjallocation.models import DebateAdjudicator
+from utils.cache import invalidate_tags, round_tag
+from venues.models import Venue
+
+from .models import Debate, DebateTeam
+
+logger = logging.getLogger(__name__)
+
+
+def _query_debate_round_ids(debate_id):
+    return Debate.objects.filter(id=debate_id).values_list('round_id', 'round__tournament_id').first() or (None, None)
+
+
+def get_debate_round_ids(instance):
+    """Returns the IDs of the round and tournament of `instance`, which must be
+    a debate or have a `debate` field. Allocations save and delete many objects
+    at once, so this avoids a query where the round is already cached. If the
+    debate no longer exists, both IDs are None."""
+    debate = instance
+    if not isinstance(instance, Debate):
+        if not type(instance).debate.is_cached(instance):
+            return _query_debate_round_ids(instance.debate_id)
+        debate = instance.debate
+    if Debate.round.is_cached(debate):
+        return debate.round_id, debate.round.tournament_id
+    return _query_debate_round_ids(debate.id)
+
+
+def get_debate_tournament_id(instance):
+    return get_debate_round_ids(instance)[1]
+
+
+@receiver(post_delete, sender=Debate)
+@receiver(post_save, sender=Debate)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+def invalidate_draw_pages(sender, instance, **kwargs):
+    # If the whole round is being deleted, the round's own signal covers it
+    round_id, tournament_id = get_debate_round_ids(instance)
+    if tournament_id is not None:
+        invalidate_tags(tournament_id, 'draw', round_tag('draw', round_id))
+
+
+@receiver(post_delete, sender=Venue)
+@receiver(post_save, sender=Venue)
+def invalidate_draw_pages_on_venue_change(sender, instance, **kwargs):
+    invalidate_tags(instance.tournament_id, 'draw', 'venues')
@@ -0,0 +1,91 @@
+import random
+import unittest
+
+import munkres
+
+from .utils import TestTeam
+from ..generator.assignment import DISALLOWED, solve_assignment, SOLVERS, UnsolvableAssignmentError
+from ..generator.bphungarian import BPHungarianDrawGenerator
+
+
+def total_cost(costs, indices):
+    return sum(costs[i][j] for i, j in indices)
+
+
+class TestAssignmentSolverParity(unittest.TestCase):
+    """Checks that all assignment solvers find assignments of the same total
+    cost. (Where there are ties, they may find different assignments.)"""
+
+    def setUp(self):
+        self.rng = random.Random(4096)
+
+    def random_matrix(self, nrows, ncols, disallowed=0.0, integers=True):
+        def entry():
+            if self.rng.random() < disallowed:
+                return DISALLOWED
+            return self.rng.randint(0, 20) if integers else self.rng.uniform(0, 100)
+        return [[entry() for j in range(ncols)] for i in range(nrows)]
+
+    def assertSolversAgree(self, costs):  # noqa: N802
+        expected = solve_assignment(costs, "munkres")
+        for solver in SOLVERS:
+            with self.subTest(solver=solver):
+                indices = solve_assignment(costs, solver)
+                self.assertEqual(len(indices), min(len(costs), len(costs[0]) if costs else 0))
+                self.assertEqual(indices, sorted(indices))
+                self.assertEqual(len({i for i, j in indices}), len(indices))
+                self.assertEqual(len({j for i, j in indices}), len(indices))
+                self.assertAlmostEqual(total_cost(costs, indices), total_cost(costs, expected))
+
+    def test_square(self):
+        for n in range(1, 12):
+            for integers in [True, False]:
+                with self.subTest(n=n, integers=integers):
+                    self.assertSolversAgree(self.random_matrix(n, n, integers=integers))
+
+    def test_rectangular(self):
+        for nrows, ncols in [(1, 5), (5, 1), (3, 7), (7, 3), (12, 36), (36, 12)]:
+            with self.subTest(nrows=nrows, ncols=ncols):
+                self.assertSolversAgree(self.random_matrix(nrows, ncols))
+
+    def test_disallowed(self):
+        for i in range(20):
+            n = self.rng.randint(2, 10)
+            costs = self.random_matrix(n, n, disallowed=0.3)
+            try:
+                expected = solve_assignment(costs, "munkres")
+            except UnsolvableAssignmentError:
+                for solver in SOLVERS:
+                    with self.subTest(i=i, solver=solver):
+                        self.assertRaises(UnsolvableAssignmentError, solve_assignment, costs, solver)
+            else:
+                self.assertNotIn(DISALLOWED, [costs[r][c] for r, c in expected])
+                self.assertSolversAgree(costs)
+
+    def test_munkres_disallowed(self):
+        costs = [[munkres.DISALLOWED, 1], [2, munkres.DISALLOWED]]
+        for solver in SOLVERS:
+            with self.subTest(solver=solver):
+                self.assertEqual(solve_assignment(costs, solver), [(0, 1), (1, 0)])
+
+    def test_unsolvable(self):
+        costs = [[1, DISALLOWED, DISALLOWED], [2, DISALLOWED, DISALLOWED], [3, 4, 5]]
+        for solver in SOLVERS:
+            with self.subTest(solver=solver):
+                self.assertRaises(UnsolvableAssignmentError, solve_assignment, costs, solver)
+
+    def test_empty(self):
+        for solver in SOLVERS:
+            with self.subTest(solver=solver):
+                self.assertEqual(solve_assignment([], solver), [])
+
+    def test_invalid_solver(self):
+        self.assertRaises(ValueError, solve_assignment, [[1]], "nonexistent")
+
+    def test_bp_cost_matrix(self):
+        teams = [TestTeam(i, 'A', points=self.rng.randint(0, 6),
+                          side_history=[self.rng.randint(0, 2) for j in range(4)])
+                 for i in range(48)]
+        generator = BPHungarianDrawGenerator(teams)
+        rooms = generator.define_rooms([team.points for team in teams])
+        self.assertSolversAgree(generator.generate_cost_matrix(rooms).tolist())
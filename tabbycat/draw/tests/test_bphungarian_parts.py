@@ -1,6 +1,8 @@
+import random
 import unittest
 
 from .utils import TestTeam
+from ..generator.assignment import DISALLOWED
 from ..generator.bphungarian import BPHungarianDrawGenerator
 
 DUMMY_TEAMS = [TestTeam(1, 'A', side_history=[0, 0, 0, 0]),
@@ -45,3 +47,77 @@ class TestDefineRooms(unittest.TestCase):
 
     def test_pullup_one_room(self):
         self._test_define_rooms("one_room", self.one_room)
+
+
+class TestVectorizedCostMatrix(unittest.TestCase):
+    """Tests that the vectorized position cost functions and cost matrix agree
+    with the scalar position cost functions."""
+
+    def setUp(self):
+        rng = random.Random(5329)
+        self.teams = [TestTeam(i, 'A', points=rng.randint(0, 8), side_history=[rng.randint(0, 4) for j in range(4)])
+                      for i in range(48)]
+        self.teams[0].side_history = [0, 0, 0, 0]
+        self.teams[1].side_history = [0, 3, 0, 0]
+
+    def _scalar_cost_matrix(self, generator, rooms):
+        cost = generator.get_position_cost_function()
+        exponent = generator.options["exponent"]
+        costs = []
+        for team in self.teams:
+            row = []
+            for level, allowed in rooms:
+                if team.points not in allowed:
+                    row.extend([DISALLOWED] * 4)
+                else:
+                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
+            costs.append(row)
+        return costs
+
+    def _test_cost_matrix(self, **options):
+        generator = BPHungarianDrawGenerator(self.teams, **options)
+        rooms = generator.define_rooms([team.points for team in self.teams])
+        actual = generator.generate_cost_matrix(rooms)
+        expected = self._scalar_cost_matrix(generator, rooms)
+        self.assertEqual(actual.shape, (len(self.teams), len(self.teams)))
+        for i, row in enumerate(expected):
+            for j, value in enumerate(row):
+                with self.subTest(row=i, col=j):
+                    if value == DISALLOWED:
+                        self.assertEqual(actual[i, j], DISALLOWED)
+                    else:
+                        self.assertAlmostEqual(actual[i, j], value, delta=1e-9 * max(abs(value), 1))
+
+    def test_simple(self):
+        self._test_cost_matrix(position_cost="simple")
+
+    def test_variance(self):
+        self._test_cost_matrix(position_cost="variance")
+
+    def test_entropy(self):
+        for α in [0.0, 0.5, 1.0, 2.0, 3.0]:  # noqa: N806
+            with self.subTest(α=α):
+                self._test_cost_matrix(position_cost="entropy", renyi_order=α)
+
+    def test_exponent(self):
+        for exponent in [1.0, 2.0, 4.0, 0.5]:
+            with self.subTest(exponent=exponent):
+                self._test_cost_matrix(position_cost="entropy", exponent=exponent)
+
+    def test_custom_function(self):
+        self._test_cost_matrix(position_cost=lambda pos, history: pos * sum(history))
+
+
+class TestPreshuffledRestarts(unittest.TestCase):
+    """Tests that restarts with preshuffling keep the assignment with the
+    fewest repeat meetings."""
+
+    def test_fewest_repeat_meetings(self):
+        # Teams 0-3 have all met each other, so at best two pairs of them meet again
+        met = {0, 1, 2, 3}
+        teams = [TestTeam(i, 'A', hist=(met - {i}) if i in met else (), side_history=[0, 0, 0, 0])
+                 for i in range(8)]
+        generator = BPHungarianDrawGenerator(teams, assignment_restarts=50, assignment_time_limit=60.0)
+        rooms = generator.define_rooms([team.points for team in teams])
+        indices = generator.solve_assignment(generator.generate_cost_matrix(rooms))
+        self.assertEqual(generator.count_repeat_meetings(indices), 2)
@@ -1,8 +1,11 @@
+import json
 import logging
+from unittest import mock
 
-from django.contrib.messages import ERROR
+from django.core.cache import cache
 
 from availability.utils import set_availability
+from draw.consumers import DrawGenerationWorkerConsumer
 from draw.generator import DrawUserError
 from options.models import TournamentPreferenceModel
 from options.serializers import MultiValueSerializer
@@ -18,28 +21,39 @@ class TestCreateDrawViewErrors(TournamentTestCase):
 
     def setUp(self):
         super().setUp()
+        cache.clear()
         self.client.login(username="admin", password="admin")
         self.round = self.tournament.round_set.get(seq=self.round_seq)
         self.tournament.preferences['standings__team_standings_precedence'] = ['wins', 'speaks_sum']
 
     def run_test_for_error_response(self, expected_loglevel, error_type):
         url = self.reverse_round('draw-create')
-        with self.assertLogs('draw.views', level=expected_loglevel) as cm, \
-                suppress_logs('standings.metrics', logging.INFO):
-            response = self.client.post(url, follow=True)
+        channel_layer = mock.Mock(send=mock.AsyncMock(), group_send=mock.AsyncMock())
+        with mock.patch('draw.consumers.get_channel_layer', return_value=channel_layer):
+            response = self.client.post(url)
+            self.assertRedirects(response, self.reverse_round('draw'), fetch_redirect_response=False)
+
+            # Run the job that the view sent to the draw worker
+            channel, event = channel_layer.send.call_args.args
+            self.assertEqual(channel, "draw")
+            with self.assertLogs('draw.consumers', level=expected_loglevel) as cm, \
+                    suppress_logs('standings.metrics', logging.INFO):
+                getattr(DrawGenerationWorkerConsumer(), event['type'])(event)
 
         # Check that it logged something at the correct level (WARNING or ERROR), depending on the error
         self.assertEqual(cm.records[0].levelno, expected_loglevel)
         self.assertEqual(cm.records[0].exc_info[0], error_type)
 
-        # Check that it redirects appropriately
-        self.assertRedirects(response, self.reverse_round('availability-index'))
+        # Check that the error was reported, with a link back to availability
+        status = channel_layer.group_send.call_args.args[1]['data']
+        self.assertEqual(status['status'], 'error')
+        self.assertEqual(status['redirect'], self.reverse_round('availability-index'))
 
-        # Check that there is a message at level ERROR
-        messages = response.context.get('messages', [])
-        self.assertEqual(len(messages), 1)
-        message = list(messages)[0]
-        self.assertEqual(message.level, ERROR)
+        # Check that the draw page shows the error once
+        response = self.client.get(self.reverse_round('draw'))
+        self.assertEqual(json.loads(response.context['draw_generation']), status)
+        response = self.client.get(self.reverse_round('draw'))
+        self.assertNotIn('draw_generation', response.context)
 
     def reverse_round(self, view_name):
         return reverse_round(view_name, self.round)
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from availability.utils import activate_all
+from draw.consumers import (DRAW_GENERATION_CLAIM_KEY, DRAW_GENERATION_STATUS_KEY, DrawGenerationWorkerConsumer,
+                            get_draw_generation_status, queue_draw_generation)
+from tournaments.models import Round
+from utils.tests import BaseMinimalTournamentTestCase
+
+
+class TestDrawGenerationWorker(BaseMinimalTournamentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.round = Round.objects.create(tournament=self.tournament, seq=1, draw_type=Round.DrawType.RANDOM)
+        activate_all(self.round)
+        self.user = get_user_model().objects.create(username='admin', is_superuser=True)
+        self.channel_layer = mock.Mock(send=mock.AsyncMock(), group_send=mock.AsyncMock())
+        patcher = mock.patch('draw.consumers.get_channel_layer', return_value=self.channel_layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def test_generate(self):
+        self.assertTrue(queue_draw_generation(self.round, self.user))
+        self.assertEqual(get_draw_generation_status(self.round), {'status': 'queued'})
+        self.assertFalse(queue_draw_generation(self.round, self.user))
+        self.channel_layer.send.assert_called_once()
+
+        channel, event = self.channel_layer.send.call_args.args
+        self.assertEqual(event['extra']['group_name'], "draw_generation_tournament_1")
+        DrawGenerationWorkerConsumer().generate_draw(event)
+
+        statuses = [call.args[1]['data'] for call in self.channel_layer.group_send.call_args_list]
+        self.assertEqual([status.get('stage') for status in statuses],
+                         ["teams", "history", "pairing", "saving", "venues", None])
+        self.assertEqual(statuses[-1]['status'], 'done')
+        self.assertEqual(get_draw_generation_status(self.round), statuses[-1])
+
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.draw_status, Round.Status.DRAFT)
+        self.assertEqual(self.round.debate_set.count(), 6)
+
+        # The lock is released once the worker is done
+        self.assertTrue(queue_draw_generation(self.round, self.user))
+
+    def get_event(self):
+        self.assertTrue(queue_draw_generation(self.round, self.user))
+        return self.channel_layer.send.call_args.args[1]
+
+    def test_queued_without_worker(self):
+        # A draw waiting for a busy worker is still queued, and holds the lock
+        self.get_event()
+        self.assertEqual(get_draw_generation_status(self.round), {'status': 'queued'})
+        self.assertFalse(queue_draw_generation(self.round, self.user))
+
+    def test_stale_claim(self):
+        self.get_event()
+        # As if the worker started, then died and its claim expired
+        cache.set(DRAW_GENERATION_STATUS_KEY % self.round.id, {'status': 'running', 'stage': 'teams'})
+        self.assertIsNone(cache.get(DRAW_GENERATION_CLAIM_KEY % self.round.id))
+        self.assertEqual(get_draw_generation_status(self.round)['status'], 'error')
+        self.assertTrue(queue_draw_generation(self.round, self.user))
+
+    def test_already_claimed(self):
+        event = self.get_event()
+        # As if another worker received the same draw and is generating it
+        cache.set(DRAW_GENERATION_CLAIM_KEY % self.round.id, event['extra']['token'])
+        DrawGenerationWorkerConsumer().generate_draw(event)
+        self.assertEqual(self.round.debate_set.count(), 0)
+        self.channel_layer.group_send.assert_not_called()
+
+    def test_redelivered(self):
+        event = self.get_event()
+        DrawGenerationWorkerConsumer().generate_draw(event)
+        self.assertEqual(self.round.debate_set.count(), 6)
+        # The same message again doesn't create another draw
+        DrawGenerationWorkerConsumer().generate_draw(event)
+        self.assertEqual(self.round.debate_set.count(), 6)
+
+    def test_existing_draw(self):
+        event = self.get_event()
+        Round.objects.filter(id=self.round.id).update(draw_status=Round.Status.DRAFT)
+        DrawGenerationWorkerConsumer().generate_draw(event)
+        self.assertEqual(get_draw_generation_status(self.round)['status'], 'error')
+        self.assertEqual(self.round.debate_set.count(), 0)
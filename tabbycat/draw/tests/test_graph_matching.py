@@ -0,0 +1,108 @@
+import logging
+import random
+import time
+import unittest
+from collections import OrderedDict
+
+import networkx as nx
+from django.test import tag
+
+from .utils import TestTeam
+from ..generator.powerpair import GraphPowerPairedDrawGenerator
+
+logger = logging.getLogger(__name__)
+
+
+def make_brackets(rng, n_teams, n_brackets, n_institutions, n_rounds=5):
+    teams = [TestTeam(i, rng.randrange(n_institutions), subrank=None,
+                      side_history=[rng.randint(0, n_rounds), rng.randint(0, n_rounds)])
+             for i in range(n_teams)]
+    for r in range(n_rounds):
+        order = rng.sample(teams, n_teams)
+        for t1, t2 in zip(order[::2], order[1::2]):
+            t1.hist.append(t2.id)
+            t2.hist.append(t1.id)
+    size = n_teams // n_brackets
+    brackets = OrderedDict()
+    for b in range(n_brackets):
+        bracket = teams[b*size:(b+1)*size]
+        for subrank, team in enumerate(bracket, start=1):
+            team.subrank = subrank
+        brackets[n_brackets - b] = bracket
+    return brackets
+
+
+def make_generator(brackets):
+    teams = [team for bracket in brackets.values() for team in bracket]
+    generator = GraphPowerPairedDrawGenerator(teams, pairing_method="fold", avoid_conflicts="graph",
+            odd_bracket="pullup_top", side_penalty=10, pairing_penalty=1)
+    generator._brackets = brackets
+    return generator
+
+
+def make_full_graph(generator, teams, size, bracket=None):
+    """Builds the graph as it was before, costing every ordered pair."""
+    graph = nx.Graph()
+    for t1 in teams:
+        for t2 in teams:
+            penalty = generator.assignment_cost(t1, t2, size, bracket)
+            if penalty is not None:
+                graph.add_edge(t1, t2, weight=penalty)
+    return graph
+
+
+def matching_cost(generator, matchings):
+    return sum(generator.assignment_cost(t1, t2, generator.get_n_teams(bracket))
+               for bracket, matching in zip(generator._brackets.values(), matchings)
+               for t1, t2 in matching)
+
+
+def generate_matchings(generator, make_graph):
+    return [nx.min_weight_matching(make_graph(teams, generator.get_n_teams(teams), j))
+            for j, teams in enumerate(generator._brackets.values())]
+
+
+class TestGraphMatching(unittest.TestCase):
+    """Checks that costing each pair of teams once gives matchings as good as
+    those from the graph of all ordered pairs."""
+
+    def test_same_edges_as_full_graph(self):
+        brackets = make_brackets(random.Random(1729), 40, 4, 8)
+        generator = make_generator(brackets)
+        for j, teams in enumerate(brackets.values()):
+            size = generator.get_n_teams(teams)
+            full = make_full_graph(generator, teams, size, j)
+            graph = generator.make_graph(teams, size, j)
+            self.assertEqual(set(map(frozenset, graph.edges)), set(map(frozenset, full.edges)))
+            for t1, t2, weight in full.edges(data='weight'):
+                self.assertEqual(graph[t1][t2]['weight'], weight)
+
+    def test_same_cost_as_full_graph(self):
+        rng = random.Random(1729)
+        for i in range(10):
+            with self.subTest(i=i):
+                generator = make_generator(make_brackets(rng, 40, 4, 8))
+                full = generate_matchings(generator, lambda *args: make_full_graph(generator, *args))
+                matchings = generate_matchings(generator, generator.make_graph)
+                self.assertEqual(matching_cost(generator, matchings), matching_cost(generator, full))
+
+
+@tag('benchmark')
+class BenchmarkGraphMatching(unittest.TestCase):
+    """Compares the time taken to build graphs and generate pairings for a
+    360-team round, costing each pair once and every ordered pair. Run with
+    `manage.py test --tag=benchmark`."""
+
+    def test_benchmark(self):
+        generator = make_generator(make_brackets(random.Random(360), 360, 4, 40))
+        costs = {}
+        for name, make_graph in [
+            ("ordered pairs", lambda *args: make_full_graph(generator, *args)),
+            ("unordered pairs", generator.make_graph),
+        ]:
+            start = time.perf_counter()
+            matchings = generate_matchings(generator, make_graph)
+            elapsed = time.perf_counter() - start
+            costs[name] = matching_cost(generator, matchings)
+            logger.info("%s: %.2f seconds, total cost %s", name, elapsed, costs[name])
+        self.assertEqual(costs["unordered pairs"], costs["ordered pairs"])
@@ -0,0 +1,78 @@
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from availability.utils import activate_all
+from draw.manager import DrawManager
+from tournaments.models import Round
+from utils.tests import BaseMinimalTournamentTestCase
+
+from .utils import TestTeam
+from ..generator.history import PairingHistory
+
+
+class TestPairingHistory(unittest.TestCase):
+
+    def test_counts(self):
+        teams = [TestTeam(i, None) for i in range(1, 6)]
+        debate_teams = [(1, 1), (1, 2), (2, 1), (2, 3), (3, 2), (3, 1), (4, 4), (4, 5), (4, 6)]
+        history = PairingHistory([team.id for team in teams], debate_teams)
+        t1, t2, t3, t4, t5 = teams
+        self.assertEqual(history.seen(t1, t2), 2)
+        self.assertEqual(history.seen(t2, t1), 2)
+        self.assertEqual(history.seen(t1, t3), 1)
+        self.assertEqual(history.seen(t2, t3), 0)
+        self.assertEqual(history.seen(t4, t5), 1)
+        self.assertIn(t5, history)
+        self.assertNotIn(TestTeam(6, None), history)
+
+
+class TestDrawQueryCounts(BaseMinimalTournamentTestCase):
+    """Checks that draw generators look up pairing history in the index that
+    the draw manager attaches, rather than querying for every pair of teams."""
+
+    configurations = [
+        (2, Round.DrawType.RANDOM, {'draw_rules__draw_avoid_conflicts': 'off'}),
+        (2, Round.DrawType.RANDOM, {'draw_rules__draw_avoid_conflicts': 'graph'}),
+        (2, Round.DrawType.POWERPAIRED, {'draw_rules__draw_avoid_conflicts': 'one_up_one_down',
+                                         'draw_rules__draw_odd_bracket': 'intermediate_bubble_up_down'}),
+        (2, Round.DrawType.POWERPAIRED, {'draw_rules__draw_avoid_conflicts': 'graph'}),
+        (4, Round.DrawType.RANDOM, {}),
+        (4, Round.DrawType.POWERPAIRED, {}),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.round1 = Round.objects.create(tournament=self.tournament, seq=1, draw_type=Round.DrawType.RANDOM)
+        self.round2 = Round.objects.create(tournament=self.tournament, seq=2)
+        activate_all(self.round1)
+        activate_all(self.round2)
+
+    @staticmethod
+    def is_history_query(sql):
+        return sql.startswith('SELECT COUNT(*)') and '"draw_debateteam"' in sql
+
+    def test_no_history_queries(self):
+        for teams_in_debate, draw_type, preferences in self.configurations:
+            with self.subTest(teams_in_debate=teams_in_debate, draw_type=draw_type, **preferences):
+                self.tournament.preferences['debate_rules__teams_in_debate'] = teams_in_debate
+                for key, value in preferences.items():
+                    self.tournament.preferences[key] = value
+
+                for rd in [self.round1, self.round2]:
+                    rd.debate_set.all().delete()
+                    rd.draw_status = Round.Status.NONE
+                    rd.save()
+                self.round1.refresh_from_db()
+                DrawManager(self.round1).create()
+
+                self.round2.draw_type = draw_type
+                self.round2.save()
+                self.round2.refresh_from_db()
+                with CaptureQueriesContext(connection) as context:
+                    DrawManager(self.round2).create()
+
+                history_queries = [q['sql'] for q in context.captured_queries if self.is_history_query(q['sql'])]
+                self.assertEqual(history_queries, [])
+                self.assertEqual(self.round2.debate_set.count(), 12 // teams_in_debate)
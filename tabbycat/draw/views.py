@@ -1,4 +1,5 @@
 import datetime
+import json
 import logging
 import unicodedata
 from itertools import product
@@ -29,9 +30,7 @@ from options.preferences import BPPositionCost
 from participants.models import Adjudicator, Speaker, Team
 from participants.prefetch import populate_win_counts
 from participants.utils import get_side_history
-from standings.base import StandingsError
 from standings.teams import TeamStandingsGenerator
-from standings.views import BaseStandingsView
 from tournaments.mixins import (CurrentRoundMixin, DebateDragAndDropMixin,
     OptionalAssistantTournamentPageMixin, PublicTournamentPageMixin, RoundMixin,
     TournamentMixin)
@@ -42,14 +41,11 @@ from utils.misc import reverse_round, reverse_tournament
 from utils.mixins import AdministratorMixin
 from utils.tables import TabbycatTableBuilder
 from utils.views import PostOnlyRedirectView, VueTableTemplateView
-from venues.allocator import allocate_venues
-from venues.models import VenueConstraint
 from venues.utils import venue_conflicts_display
 
+from .consumers import clear_draw_generation_status, get_draw_generation_status, queue_draw_generation
 from .dbutils import delete_round_draw
 from .forms import ConfirmDrawDeletionForm
-from .generator import DrawFatalError, DrawUserError
-from .manager import DrawManager
 from .models import Debate, TeamSideAllocation
 from .prefetch import populate_history
 from .serializers import EditDebateTeamsDebateSerializer, EditDebateTeamsTeamSerializer
@@ -173,6 +169,7 @@ class BaseDisplayDrawForCurrentRoundsTableView(BaseDisplayDrawTableView):
 class PublicDrawMixin(PublicTournamentPageMixin):
     """Governs permissions, particularly those relating to draw release."""
 
+    cache_tags = ('draw', 'participants')
     empty_table_title = gettext_lazy("The draw for this round hasn't been released.")
 
     @cached_property
@@ -346,7 +343,7 @@ class AdminDrawUtilitiesMixin:
 
     @cached_property
     def adjudicator_conflicts(self):
-        return adjudicator_conflicts_display(self.get_draw())
+        return adjudicator_conflicts_display(self.get_draw(), self.tournament)
 
     @cached_property
     def venue_conflicts(self):
@@ -566,6 +563,15 @@ class AdminDrawView(RoundMixin, AdministratorMixin, AdminDrawUtilitiesMixin, Vue
                 [d.get_team(side).break_rank_for_category(category) for d in draw],
             )
 
+    def get_context_data(self, **kwargs):
+        if self.round.draw_status == Round.Status.NONE:
+            status = get_draw_generation_status(self.round)
+            if status is not None:
+                kwargs["draw_generation"] = json.dumps(status)
+                if status['status'] == 'error':
+                    clear_draw_generation_status(self.round)  # only show errors once
+        return super().get_context_data(**kwargs)
+
     def get_template_names(self):
         if self.round.draw_status == Round.Status.NONE:
             return ["draw_status_none.html"]
@@ -668,55 +674,16 @@ class DrawStatusEdit(LogActionMixin, AdministratorMixin, RoundMixin, PostOnlyRed
 
 class CreateDrawView(DrawStatusEdit):
     edit_permission = Permission.GENERATE_DEBATE
-    action_log_type = ActionLogEntry.ActionType.DRAW_CREATE
 
     def post(self, request, *args, **kwargs):
         if self.round.draw_status != Round.Status.NONE:
             messages.error(request, _("Could not create draw for %(round)s, there was already a draw!") % {'round': self.round.name})
             return super().post(request, *args, **kwargs)
 
-        try:
-            manager = DrawManager(self.round)
-            manager.create()
-        except DrawUserError as e:
-            messages.error(request, mark_safe(_(
-                "<p>The draw could not be created, for the following reason: "
-                "<em>%(message)s</em></p>\n"
-                "<p>Please fix this issue before attempting to create the draw.</p>",
-            ) % {'message': str(e)}))
-            logger.warning("User error creating draw: " + str(e), exc_info=True)
-            return HttpResponseRedirect(reverse_round('availability-index', self.round))
-        except DrawFatalError as e:
-            messages.error(request, mark_safe(_(
-                "<p>The draw could not be created, because the following error occurred: "
-                "<em>%(message)s</em></p>\n"
-                "<p>If this issue persists and you're not sure how to resolve it, please "
-                "contact the developers.</p>",
-            ) % {'message': str(e)}))
-            logger.exception("Fatal error creating draw: " + str(e))
-            return HttpResponseRedirect(reverse_round('availability-index', self.round))
-        except StandingsError as e:
-            message = _(
-                "<p>The team standings could not be generated, because the following error occurred: "
-                "<em>%(message)s</em></p>\n"
-                "<p>Because generating the draw uses the current team standings, this "
-                "prevents the draw from being generated.</p>",
-            ) % {'message': str(e)}
-            standings_options_url = reverse_tournament('options-tournament-section', self.tournament, kwargs={'section': 'standings'})
-            instructions = BaseStandingsView.admin_standings_error_instructions % {'standings_options_url': standings_options_url}
-            messages.error(request, mark_safe(message + instructions))
-            logger.exception("Error generating standings for draw: " + str(e))
-            return HttpResponseRedirect(reverse_round('availability-index', self.round))
-
-        relevant_adj_venue_constraints = VenueConstraint.objects.filter(
-                adjudicator__in=self.tournament.relevant_adjudicators)
-        if not relevant_adj_venue_constraints.exists():
-            allocate_venues(self.round)
-        else:
-            messages.warning(request, _("Rooms were not auto-allocated because there are one or more adjudicator room constraints. "
-                "You should run room allocations after allocating adjudicators."))
-
-        self.log_action()
+        # The draw is generated, and the action logged, by the "draw" worker;
+        # the draw page shows its progress.
+        if not queue_draw_generation(self.round, request.user):
+            messages.info(request, _("The draw for %(round)s is already being generated.") % {'round': self.round.name})
         return super().post(request, *args, **kwargs)
 
 
@@ -857,6 +824,7 @@ class SideAllocationsView(AdministratorMixin, BaseSideAllocationsView):
 
 class PublicSideAllocationsView(PublicTournamentPageMixin, BaseSideAllocationsView):
     public_page_preference = 'public_side_allocations'
+    cache_tags = ('draw', 'participants')
 
 
 class EditDebateTeamsView(DebateDragAndDropMixin, AdministratorMixin, TemplateView):
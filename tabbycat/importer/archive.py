@@ -98,8 +98,10 @@ class Exporter:
         if adjs != "":
             debate_tag.set('adjudicators', adjs)
 
-            chair = debate.debateadjudicator_set.get(type=DebateAdjudicator.TYPE_CHAIR).adjudicator_id
-            debate_tag.set('chair', ADJ_PREFIX + str(chair))
+            chair = next((d_adj.adjudicator_id for d_adj in debate.debateadjudicator_set.all()
+                          if d_adj.type == DebateAdjudicator.TYPE_CHAIR), None)
+            if chair is not None:
+                debate_tag.set('chair', ADJ_PREFIX + str(chair))
 
         # Venue
         if debate.venue_id is not None:
@@ -112,7 +114,7 @@ class Exporter:
             debate_tag.set('motion', MOTION_PREFIX + str(motion.id))
 
         if debate.confirmed_ballot is not None:
-            result = DebateResult(debate.confirmed_ballot, tournament=self.t)
+            result = debate.confirmed_ballot.result  # populated by populate_confirmed_ballots()
 
             for side in self.t.sides:
                 side_tag = SubElement(debate_tag, 'side', {
@@ -618,7 +620,7 @@ class Importer:
 
             for debate in round.findall('debate'):
                 bs_obj = BallotSubmission(
-                    version=1, submitter_type=Submission.Submitter.TABROOM, confirmed=True,
+                    version=1, submitter_type=Submission.Submitter.TABROOM,
                     debate=self.debates[debate.get('id')], motion=self.motions.get(debate.get('motion')))
                 bs_obj.save()
                 dr = DebateResult(bs_obj)
@@ -656,6 +658,10 @@ class Importer:
                                     dr.add_winner(adj, side_code)
                 dr.save()
 
+                # Confirm after saving scores, so that they're counted in running totals
+                bs_obj.confirmed = True
+                bs_obj.save()
+
     def import_feedback(self):
         for adj in self.root.findall('participants/adjudicator'):
             adj_obj = self.adjudicators[adj.get('id')]
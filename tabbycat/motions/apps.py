@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class MotionsConfig(AppConfig):
     name = 'motions'
     verbose_name = _("Motions")
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tournaments.models import Round
+from utils.cache import invalidate_tags
+
+from .models import Motion, RoundMotion
+
+
+@receiver(post_delete, sender=Motion)
+@receiver(post_save, sender=Motion)
+def invalidate_motions_pages(sender, instance, **kwargs):
+    invalidate_tags(instance.tournament_id, 'motions')
+
+
+@receiver(post_delete, sender=RoundMotion)
+@receiver(post_save, sender=RoundMotion)
+def invalidate_motions_pages_on_round_motion_change(sender, instance, **kwargs):
+    tournament_id = Round.objects.filter(id=instance.round_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        invalidate_tags(tournament_id, 'motions')
@@ -28,6 +28,7 @@ from .statistics import MotionBPStatsCalculator, MotionTwoTeamStatsCalculator, R
 class PublicMotionsView(PublicTournamentPageMixin, TemplateView):
     public_page_preference = 'public_motions'
     template_name = 'public_motions.html'
+    cache_tags = ('motions',)
 
     def get_context_data(self, **kwargs):
         order_by = 'seq' if self.tournament.pref('public_motions_order') == 'forward' else '-seq'
@@ -275,6 +276,7 @@ class BasePublicMotionStatisticsView(PublicTournamentPageMixin):
     Motion context provided in subclasses."""
     public_page_preference = 'motion_tab_released'
     cache_timeout = settings.TAB_PAGES_CACHE_TIMEOUT
+    cache_tags = ('motions', 'results')
     for_public = True
 
 
@@ -146,6 +146,26 @@ class AdjHistoryPenalty(IntegerPreference):
     default = 10000
 
 
+@tournament_preferences_registry.register
+class AdjAllocationRestarts(IntegerPreference):
+    help_text = _("Number of randomised attempts the adjudicator auto-allocator makes, keeping the best (1 makes a single attempt)")
+    verbose_name = _("Adjudicator allocation attempts")
+    section = draw_rules
+    name = 'adj_allocation_restarts'
+    default = 1
+    field_kwargs = {'validators': [MinValueValidator(1)]}
+
+
+@tournament_preferences_registry.register
+class AdjAllocationTimeLimit(FloatPreference):
+    help_text = _("Time in seconds after which the adjudicator auto-allocator stops making further attempts")
+    verbose_name = _("Adjudicator allocation time limit")
+    section = draw_rules
+    name = 'adj_allocation_time_limit'
+    default = 10.0
+    field_kwargs = {'validators': [MinValueValidator(0.0)]}
+
+
 @tournament_preferences_registry.register
 class PreformedPanelMismatchPenalty(IntegerPreference):
     help_text = _("Penality applied by preformed panel auto-allocator for priority mismatch")
@@ -374,6 +394,42 @@ class BPAssignmentMethod(ChoicePreference):
     default = 'hungarian_preshuffled'
 
 
+@tournament_preferences_registry.register
+class BPAssignmentRestarts(IntegerPreference):
+    help_text = _("In BP, with preshuffling, number of shuffled attempts to make, keeping the one "
+                  "in which the fewest teams meet again (1 makes a single attempt)")
+    verbose_name = _("BP assignment attempts")
+    section = draw_rules
+    name = 'bp_assignment_restarts'
+    default = 1
+    field_kwargs = {'validators': [MinValueValidator(1)]}
+
+
+@tournament_preferences_registry.register
+class BPAssignmentTimeLimit(FloatPreference):
+    help_text = _("In BP, time in seconds after which unfinished shuffled attempts are abandoned")
+    verbose_name = _("BP assignment time limit")
+    section = draw_rules
+    name = 'bp_assignment_time_limit'
+    default = 10.0
+    field_kwargs = {'validators': [MinValueValidator(0.0)]}
+
+
+@tournament_preferences_registry.register
+class AssignmentSolver(ChoicePreference):
+    help_text = _("Which implementation to use to solve assignment problems, in BP draws, "
+                  "two-team draws with pre-allocated sides and adjudicator allocation. "
+                  "Both give optimal solutions, but may break ties differently.")
+    verbose_name = _("Assignment solver")
+    section = draw_rules
+    name = 'assignment_solver'
+    choices = (
+        ('jv', _("Shortest augmenting path (fast)")),
+        ('munkres', _("Munkres (slow)")),
+    )
+    default = 'jv'
+
+
 @tournament_preferences_registry.register
 class SkipAdjCheckins(BooleanPreference):
     help_text = _("Automatically make all adjudicators available for all rounds")
@@ -665,6 +721,15 @@ class StandingsMissedReplies(IntegerPreference):
     default = -1
 
 
+@tournament_preferences_registry.register
+class StandingsRunningTotals(BooleanPreference):
+    help_text = _("If checked, the standings pages read metrics from running totals that are updated as ballots are confirmed, rather than recalculating them from all ballots")
+    verbose_name = _("Use running totals for standings")
+    section = standings
+    name = 'standings_running_totals'
+    default = True
+
+
 @tournament_preferences_registry.register
 class TeamStandingsPrecedence(MultiValueChoicePreference):
     help_text = _("Metrics to use to rank teams (see documentation for further details)")
@@ -344,6 +344,12 @@ class Team(models.Model):
         return self.speaker_set.all()
 
     def seen(self, other, before_round=None):
+        # Draw managers attach an in-memory history index, to avoid a query
+        # for every pair of teams considered by the draw generator
+        history = getattr(self, 'pairing_history', None)
+        if before_round is None and history is not None and other in history:
+            return history.seen(self, other)
+
         queryset = self.debateteam_set.filter(debate__debateteam__team=other)
         if before_round:
             queryset = queryset.filter(debate__round__seq__lt=before_round)
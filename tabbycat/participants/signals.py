@@ -1,9 +1,13 @@
 import logging
 
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from participants.models import Institution
+from checkins.models import PersonIdentifier
+from participants.models import Adjudicator, Institution, Speaker, Team
+from tournaments.models import Tournament
+from utils.cache import invalidate_tags
+from venues.models import VenueConstraint
 
 logger = logging.getLogger(__name__)
 
@@ -15,3 +19,66 @@ def update_team_names_from_institution(sender, instance, created, **kwargs):
         logger.info("Updating names of all %d teams from institution %s" % (len(teams), instance.name))
         for team in teams:
             team.save()
+
+
+@receiver(post_save, sender=Institution)
+def invalidate_participants_pages_on_institution_change(sender, instance, **kwargs):
+    # Teams are saved above, but adjudicators also show institution names
+    tournament_ids = instance.adjudicator_set.filter(tournament__isnull=False).values_list(
+        'tournament_id', flat=True).distinct()
+    for tournament_id in tournament_ids:
+        invalidate_tags(tournament_id, 'participants')
+
+
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Adjudicator)
+@receiver(post_save, sender=Adjudicator)
+def invalidate_participants_pages(sender, instance, **kwargs):
+    # Shared adjudicators don't belong to any one tournament's pages
+    if instance.tournament_id is not None:
+        invalidate_tags(instance.tournament_id, 'participants')
+
+
+@receiver(post_delete, sender=Speaker)
+@receiver(post_save, sender=Speaker)
+def invalidate_participants_pages_on_speaker_change(sender, instance, **kwargs):
+    tournament_id = Team.objects.filter(id=instance.team_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        invalidate_tags(tournament_id, 'participants')
+
+
+@receiver(m2m_changed, sender=Team.break_categories.through)
+@receiver(m2m_changed, sender=Speaker.categories.through)
+def invalidate_participants_pages_on_category_change(sender, instance, action, **kwargs):
+    if not action.startswith('post_'):
+        return
+    # From the category side, the instance is the category, which also has a tournament
+    if isinstance(instance, Speaker):
+        invalidate_participants_pages_on_speaker_change(sender, instance)
+    else:
+        invalidate_participants_pages(sender, instance)
+
+
+@receiver(post_delete, sender=VenueConstraint)
+@receiver(post_save, sender=VenueConstraint)
+def invalidate_participants_pages_on_venue_constraint_change(sender, instance, **kwargs):
+    # Room constraints are shown on teams and adjudicators in the API
+    subject_model = instance.subject_content_type.model_class()
+    if subject_model is Institution:
+        tournament_ids = Tournament.objects.values_list('id', flat=True)
+    else:
+        tournament_ids = subject_model.objects.filter(id=instance.subject_id, tournament__isnull=False).values_list(
+            'tournament_id', flat=True)
+    for tournament_id in tournament_ids:
+        invalidate_tags(tournament_id, 'participants')
+
+
+@receiver(post_delete, sender=PersonIdentifier)
+@receiver(post_save, sender=PersonIdentifier)
+def invalidate_participants_pages_on_identifier_change(sender, instance, **kwargs):
+    # Check-in barcodes are shown on speakers and adjudicators in the API
+    tournament_id = Adjudicator.objects.filter(id=instance.person_id).values_list('tournament_id', flat=True).first() or \
+        Team.objects.filter(speaker__id=instance.person_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        invalidate_tags(tournament_id, 'participants')
@@ -83,6 +83,7 @@ class PublicParticipantsListView(PublicTournamentPageMixin, BaseParticipantsList
     public_page_preference = 'public_participants'
     admin = False
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ('participants',)
 
 
 class BaseInstitutionsListView(TournamentMixin, VueTableTemplateView):
@@ -133,6 +134,7 @@ class PublicInstitutionsListView(PublicTournamentPageMixin, BaseInstitutionsList
     public_page_preference = 'public_institutions_list'
     admin = False
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ('participants',)
 
 
 class BaseCodeNamesListView(TournamentMixin, VueTableTemplateView):
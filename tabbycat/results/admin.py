@@ -5,6 +5,7 @@ from django.db.models import OuterRef, Prefetch, Subquery
 from django.utils.translation import gettext_lazy as _, ngettext_lazy
 
 from draw.models import DebateTeam
+from standings.totals import rebuild_running_totals
 from utils.admin import ModelAdmin, TabbycatModelAdminFieldsMixin
 
 from .models import BallotSubmission, ScoreCriterion, SpeakerCriterionScore, SpeakerCriterionScoreByAdj, SpeakerScore, SpeakerScoreByAdj, TeamScore, TeamScoreByAdj
@@ -40,6 +41,7 @@ class BallotSubmissionAdmin(TabbycatModelAdminFieldsMixin, ModelAdmin):
             populate_results(bss, tournament)
             for bs in bss:
                 bs.result.save()
+            rebuild_running_totals(tournament)
 
         self.message_user(request, ngettext_lazy(
             "Resaved results for %(count)d ballot submission.",
@@ -1,6 +1,9 @@
+from channels.consumer import SyncConsumer
 from channels.generic.websocket import JsonWebsocketConsumer
+from django.contrib.auth import get_user_model
 
 from tournaments.mixins import TournamentWebsocketMixin
+from tournaments.models import Round
 from utils.mixins import LoginRequiredWebsocketMixin
 
 
@@ -10,3 +13,17 @@ class BallotResultConsumer(LoginRequiredWebsocketMixin, TournamentWebsocketMixin
 
 class BallotStatusConsumer(LoginRequiredWebsocketMixin, TournamentWebsocketMixin, JsonWebsocketConsumer):
     group_prefix = 'ballot_statuses'
+
+
+class BallotStatusWorkerConsumer(SyncConsumer):
+
+    def send_ballot_statuses(self, event):
+        from .status import send_scheduled_ballot_statuses
+        round = Round.objects.select_related('tournament').get(id=event['round'])
+        send_scheduled_ballot_statuses(round)
+
+    def merge_ballots(self, event):
+        from .merge import run_ballot_merge
+        round = Round.objects.select_related('tournament').get(id=event['round'])
+        user = get_user_model().objects.get(id=event['user'])
+        run_ballot_merge(round, user)
@@ -17,10 +17,11 @@ from participants.models import Speaker, Team
 from participants.templatetags.team_name_for_data_entry import team_name_for_data_entry
 from tournaments.utils import get_side_name
 
-from .consumers import BallotResultConsumer, BallotStatusConsumer
+from .consumers import BallotResultConsumer
 from .result import (ConsensusDebateResult, ConsensusDebateResultWithScores,
                      DebateResultByAdjudicator, DebateResultByAdjudicatorWithScores)
-from .utils import get_status_meta, side_and_position_names
+from .status import queue_ballot_status
+from .utils import side_and_position_names
 
 if TYPE_CHECKING:
     from .models import BallotSubmission
@@ -114,19 +115,7 @@ def broadcast_results(ballotsub: 'BallotSubmission', debate: Debate):
         })
 
     # 6. Notify the Results Page/Ballots Status Graph
-    group_name = BallotStatusConsumer.group_prefix + "_" + t.slug
-    meta = get_status_meta(debate)
-    async_to_sync(get_channel_layer().group_send)(group_name, {
-        "type": "send_json",
-        "data": {
-            'status': debate.result_status,
-            'icon': meta[0],
-            'class': meta[1],
-            'sort': meta[2],
-            'ballot': ballotsub.serialize(t),
-            'round': debate.round_id,
-        },
-    })
+    queue_ballot_status(debate)
 
 
 # ==============================================================================
@@ -209,16 +198,15 @@ class BaseResultForm(forms.Form):
         # 4. Save ballot and result status
         self.ballotsub.discarded = self.cleaned_data['discarded']
         self.ballotsub.confirmed = self.cleaned_data['confirmed']
+        # Save a timestamp immediately, as clients of the ballot status stream
+        # may fetch this ballot before the view finishes assigning one
+        if self.ballotsub.confirmed:
+            self.ballotsub.confirm_timestamp = timezone.now()
         self.ballotsub.save()
 
         self.debate.result_status = self.cleaned_data['debate_result_status']
         self.debate.save()
 
-        # Need to provide a timestamp immediately for BallotStatusConsumer
-        # as it will broadcast before the view finishes assigning one
-        if self.ballotsub.confirmed:
-            self.ballotsub.confirm_timestamp = timezone.now()
-
         broadcast_results(self.ballotsub, self.debate)
 
         return self.ballotsub
@@ -1,3 +1,4 @@
+from standings.totals import rebuild_running_totals
 from utils.management.base import TournamentCommand
 
 from ...models import BallotSubmission
@@ -18,3 +19,5 @@ class Command(TournamentCommand):
         for bsub in ballotsubs:
             self.stdout.write("Saving: {}".format(bsub))
             bsub.result.save()
+
+        rebuild_running_totals(tournament)
@@ -0,0 +1,211 @@
+"""Merging the ballots submitted by each adjudicator in a debate, when ballots
+are entered per adjudicator, into one ballot for the debate.
+
+`merge_debate_ballots()` merges the ballots of one debate. It's used when
+ballot confirmations are disabled and the last adjudicator in a debate submits
+their ballot. `merge_round_ballots()` merges every debate in a round that's
+waiting on a merge in one pass, loading the ballots of all of them at once. It
+runs in the "results" channel worker when the tab director asks for it from the
+results page, and leaves a report of what it did for that page to show.
+
+While a merge is running, the worker can't send throttled ballot status deltas
+(see status.py). Deltas for the round being merged still go out as its debates
+are merged, because `queue_ballot_status()` sends them straight away whenever
+the throttle interval has passed. But the last delta of the merge, and
+throttled deltas for other rounds, wait until the merge finishes.
+"""
+
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+
+from adjallocation.models import DebateAdjudicator
+from draw.models import Debate
+from motions.models import DebateTeamMotionPreference
+from motions.utils import merge_motion_vetos, merge_motions
+
+from .forms import broadcast_results
+from .models import BallotSubmission, ScoreCriterion
+from .prefetch import populate_results
+from .result import DebateResult
+from .status import WORKER_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+MERGE_REPORT_KEY = "ballot_merge_report_%d"
+MERGE_LOCK_KEY = "ballot_merge_lock_%d"
+MERGE_TIMEOUT = 60 * 60
+
+
+def get_latest_individual_ballots(debates):
+    """Returns a dict mapping the ID of each debate in `debates` to a list of
+    the latest non-discarded ballot submitted by each adjudicator in it."""
+    ballotsubs = BallotSubmission.objects.filter(
+        debate__in=debates, participant_submitter__isnull=False, discarded=False, single_adj=True,
+    ).annotate(
+        ordering=Window(Rank(), partition_by=[F('debate'), F('participant_submitter')], order_by="-version"),
+    ).filter(ordering=1).select_related('participant_submitter').order_by('id')
+
+    ballotsubs_by_debate = {debate.id: [] for debate in debates}
+    for ballotsub in ballotsubs:
+        ballotsubs_by_debate[ballotsub.debate_id].append(ballotsub)
+    return ballotsubs_by_debate
+
+
+def merge_debate_ballots(debate, ballotsubs, criteria, confirmed=True, **kwargs):
+    """Merges `ballotsubs`, the latest individual ballots of `debate`, whose
+    results must already be populated, into a new ballot for the debate. Other
+    keyword arguments are passed to the new `BallotSubmission`.
+
+    Returns a list of the conflicts found, as `ResultError`s for conflicting
+    results and `ValidationError`s for conflicting motions or vetoes. Nothing is
+    saved if the results conflict. If only the motions or vetoes conflict, the
+    merged ballot is saved, but the debate is postponed so that they can be
+    fixed by hand."""
+    merged_bs = BallotSubmission(debate=debate, **kwargs)
+    merged_result = DebateResult(merged_bs, tournament=debate.round.tournament, criteria=criteria)
+    errors = merged_result.populate_from_merge(*[b.result for b in ballotsubs])
+    if errors:
+        return errors
+
+    merged_bs.save()
+    merged_result.save()
+
+    bs_motions = BallotSubmission.objects.filter(
+        id__in=[b.id for b in ballotsubs], motion__isnull=False,
+    ).prefetch_related('debateteammotionpreference_set__debate_team')
+    try:
+        merge_motions(merged_bs, bs_motions)
+    except ValidationError as e:
+        errors.append(e)
+
+    try:
+        vetos = merge_motion_vetos(merged_bs, bs_motions)
+        DebateTeamMotionPreference.objects.bulk_create(list(vetos.values()))
+    except ValidationError as e:
+        errors.append(e)
+
+    # Confirm only once the scores are saved, so that they're counted in
+    # running totals (see standings/signals.py)
+    if confirmed:
+        merged_bs.confirmed = True
+        merged_bs.confirm_timestamp = timezone.now()
+    merged_bs.save()
+
+    if errors:
+        debate.result_status = Debate.STATUS_POSTPONED
+    elif confirmed:
+        debate.result_status = Debate.STATUS_CONFIRMED
+    else:
+        debate.result_status = Debate.STATUS_DRAFT
+    debate.save()
+    broadcast_results(merged_bs, debate)
+    return errors
+
+
+def describe_merge_error(error):
+    if isinstance(error, ValidationError):
+        return " ".join(error.messages)
+    return str(error.args[0])
+
+
+def merge_round_ballots(round, user=None):
+    """Merges the individual ballots of every debate in `round` that has them
+    from all its voting adjudicators, but no merged ballot yet. The merged
+    ballots are confirmed if ballot confirmations are disabled, and otherwise
+    left for someone to confirm.
+
+    Returns a list of dicts, one for each debate considered, with keys 'debate'
+    (the debate ID), 'matchup', 'status' (one of 'merged', 'postponed',
+    'conflict' and 'incomplete') and 'messages' (describing any conflicts)."""
+    tournament = round.tournament
+    debates = list(round.debate_set_with_prefetches(
+        filter_args=[~Exists(BallotSubmission.objects.filter(
+            debate=OuterRef('pk'), single_adj=False, discarded=False))],
+        filter_kwargs={'result_status__in': [Debate.STATUS_NONE, Debate.STATUS_DRAFT]},
+        ordering=('room_rank',), adjudicators=False, speakers=False, venues=False,
+    ).select_related('round__tournament').annotate(
+        n_voting=Count('debateadjudicator', filter=~Q(debateadjudicator__type=DebateAdjudicator.TYPE_TRAINEE)),
+    ))
+
+    ballotsubs_by_debate = get_latest_individual_ballots(debates)
+    populate_results([b for ballotsubs in ballotsubs_by_debate.values() for b in ballotsubs], tournament)
+    criteria = list(ScoreCriterion.objects.filter(tournament=tournament))
+    confirmed = tournament.pref('disable_ballot_confirms')
+
+    report = []
+    for debate in debates:
+        ballotsubs = ballotsubs_by_debate[debate.id]
+        entry = {'debate': debate.id, 'matchup': debate.matchup, 'messages': []}
+        report.append(entry)
+
+        if len(ballotsubs) == 0 or len(ballotsubs) != debate.n_voting:
+            entry['status'] = 'incomplete'
+            continue
+
+        with transaction.atomic():
+            errors = merge_debate_ballots(debate, ballotsubs, criteria, confirmed=confirmed,
+                submitter=user, submitter_type=BallotSubmission.Submitter.TABROOM,
+                confirmer=user if confirmed else None)
+
+        if errors and debate.result_status == Debate.STATUS_POSTPONED:
+            entry['status'] = 'postponed'
+        elif errors:
+            entry['status'] = 'conflict'
+        else:
+            entry['status'] = 'merged'
+        entry['messages'] = sorted({describe_merge_error(e) for e in errors})
+
+    logger.info("Merged ballots for %d of %d debates in %s", sum(e['status'] == 'merged' for e in report),
+                len(report), round.name)
+    return report
+
+
+def queue_ballot_merge(round, user):
+    """Sends `round` to the "results" worker to have its ballots merged.
+    Returns False, without doing anything, if they're already being merged."""
+    if not cache.add(MERGE_LOCK_KEY % round.id, True, MERGE_TIMEOUT):
+        return False
+    cache.delete(MERGE_REPORT_KEY % round.id)
+    async_to_sync(get_channel_layer().send)(WORKER_CHANNEL, {
+        "type": "merge_ballots",
+        "round": round.id,
+        "user": user.id,
+    })
+    return True
+
+
+def run_ballot_merge(round, user):
+    """Merges the ballots in `round` and stores the report, then releases the
+    lock taken by `queue_ballot_merge()`. The report is stored first, so that
+    the results page never finds neither a running merge nor its report."""
+    try:
+        report = merge_round_ballots(round, user)
+    except Exception:
+        logger.exception("Unexpected error merging ballots for %s", round.name)
+        report = None
+    try:
+        cache.set(MERGE_REPORT_KEY % round.id, {'report': report}, MERGE_TIMEOUT)
+    finally:
+        cache.delete(MERGE_LOCK_KEY % round.id)
+
+
+def is_ballot_merge_running(round):
+    return cache.get(MERGE_LOCK_KEY % round.id) is not None
+
+
+def pop_ballot_merge_report(round):
+    """Returns the last report stored for `round`, or None if there isn't one,
+    and removes it, so that it's only shown once. The report in the returned
+    dict is itself None if the merge failed."""
+    report = cache.get(MERGE_REPORT_KEY % round.id)
+    if report is not None:
+        cache.delete(MERGE_REPORT_KEY % round.id)
+    return report
@@ -1,6 +1,9 @@
 """Functions that prefetch data for efficiency."""
 from itertools import groupby
 
+from django.db.models import prefetch_related_objects
+
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
 from checkins.utils import get_checkins
 from draw.models import DebateTeam
@@ -75,8 +78,11 @@ def populate_results(ballotsubs, tournament=None):
     """Populates the `_result` attribute of each BallotSubmission in
     `ballotsubs` with a populated DebateResult instance.
 
-    For best performance, the ballot submissions should already have their
-    debates prefetched (using select_related).
+    This uses the same number of queries however many ballot submissions there
+    are, so callers showing results for a whole round should use this rather
+    than let each ballot submission load its own result. Debates, rounds and
+    tournaments are fetched if the ballot submissions don't already have them
+    (e.g. using select_related).
     """
 
     # If the database is correct, some checks like `result.is_voting`,
@@ -91,6 +97,7 @@ def populate_results(ballotsubs, tournament=None):
         tournament = Tournament.objects.get(round__debate__ballotsubmission=ballotsubs[0])
     positions = tournament.positions
     ballotsubs = list(ballotsubs)  # set ballotsubs in stone to avoid race conditions in later queries
+    prefetch_related_objects(ballotsubs, 'debate__round__tournament')
 
     results_by_debate_id = {}
     results_by_ballotsub_id = {}
@@ -138,14 +145,26 @@ def populate_results(ballotsubs, tournament=None):
                     result.set_score(ss.debate_team.side, ss.position, int(ss.score) if int_step and ss.score % 1 == 0 else ss.score)
                     result.set_speaker_rank(ss.debate_team.side, ss.position, ss.rank)
 
-    # Populate scoresheets (load_scoresheets)
+    # Populate debate adjudicators (debate.adjudicators), which voting results
+    # are checked against
     debateadjs = DebateAdjudicator.objects.filter(
         debate__ballotsubmission__in=ballotsubs,
-    ).exclude(
-        type=DebateAdjudicator.TYPE_TRAINEE,
     ).select_related('adjudicator__institution', 'adjudicator__tournament').distinct()
+    debateadjs_by_id = {da.id: da for da in debateadjs}
+
+    debateadjs_by_debate_id = {}
+    for da in debateadjs:
+        debateadjs_by_debate_id.setdefault(da.debate_id, []).append(da)
+    for ballotsub in ballotsubs:
+        if not hasattr(ballotsub.debate, '_adjudicators'):
+            allocation = AdjudicatorAllocation(ballotsub.debate)
+            allocation.set_from_debateadjs(debateadjs_by_debate_id.get(ballotsub.debate_id, []))
+            ballotsub.debate._adjudicators = allocation
 
+    # Populate scoresheets (load_scoresheets)
     for da in debateadjs:
+        if da.type == DebateAdjudicator.TYPE_TRAINEE:
+            continue
         for result in results_by_debate_id[da.debate_id]:
             if result.is_voting:
                 result.debateadjs[da.adjudicator] = da
@@ -154,19 +173,20 @@ def populate_results(ballotsubs, tournament=None):
     ssbas = SpeakerScoreByAdj.objects.filter(
         ballot_submission__in=ballotsubs,
         position__in=positions,
-    ).select_related('debate_adjudicator__adjudicator__institution', 'debate_team').prefetch_related('speakercriterionscorebyadj_set__criterion')
+    ).select_related('debate_team').prefetch_related('speakercriterionscorebyadj_set__criterion')
 
     for ssba in ssbas:
         result = results_by_ballotsub_id[ssba.ballot_submission_id]
         int_step = is_integer_step(tournament, ssba)
         if result.uses_speakers and result.is_voting:
+            adj = debateadjs_by_id[ssba.debate_adjudicator_id].adjudicator
             if len(ssba.speakercriterionscorebyadj_set.all()) > 0:
                 for criterion_score in ssba.speakercriterionscorebyadj_set.all():
                     score = criterion_score.score
                     score = int(criterion_score.score) if int_step and criterion_score.score % 1 == 0 else score
-                    result.set_criterion_score(ssba.debate_adjudicator.adjudicator, ssba.debate_team.side, ssba.position, criterion_score.criterion, score)
+                    result.set_criterion_score(adj, ssba.debate_team.side, ssba.position, criterion_score.criterion, score)
             else:
-                result.set_score(ssba.debate_adjudicator.adjudicator, ssba.debate_team.side,
+                result.set_score(adj, ssba.debate_team.side,
                     ssba.position, int(ssba.score) if int_step and ssba.score % 1 == 0 else ssba.score)
 
     # Populate advancing (load_advancing)
@@ -187,7 +207,7 @@ def populate_results(ballotsubs, tournament=None):
     for tsba in teamscoresbyadj:
         result = results_by_ballotsub_id[tsba.ballot_submission_id]
         if result.uses_declared_winners and tsba.win:
-            result.add_winner(tsba.debate_adjudicator.adjudicator, tsba.debate_team.side)
+            result.add_winner(debateadjs_by_id[tsba.debate_adjudicator_id].adjudicator, tsba.debate_team.side)
 
     # Finally, check that everything is in order
 
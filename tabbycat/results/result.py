@@ -49,8 +49,8 @@ from adjallocation.models import DebateAdjudicator
 from draw.types import DebateSide
 
 from .result_info import DebateResultInfo
-from .scoresheet import (HighPointWinsRequiredScoresheet, LowPointWinsAllowedScoresheet, PolyEliminationScoresheet,
-    PolyNoWinScoresheet, PolyScoresheet, ResultOnlyScoresheet, TiedPointWinsAllowedScoresheet)
+from .scoresheet import (HighPointWinsRequiredScoresheet, LowPointWinsAllowedScoresheet, mean_score, mean_total,
+    PolyEliminationScoresheet, PolyNoWinScoresheet, PolyScoresheet, ResultOnlyScoresheet, TiedPointWinsAllowedScoresheet)
 from .utils import side_and_position_names
 
 if TYPE_CHECKING:
@@ -1164,6 +1164,8 @@ class DebateResultByAdjudicatorWithScores(DebateResultWithScoresMixin, DebateRes
             return None
         if not self._decision_calculated and len(self.sides) == 2:
             self._calculate_decision()
+        if self.tournament.pref('teamscore_includes_ghosts') and not self.criteria:
+            return mean_total(self._relevant_scoresheets(), side)
         return mean(self._teamscore_score_component(adj, side) for adj in self.relevant_adjudicators())
 
     def teamscore_field_has_ghost(self, side):
@@ -1179,8 +1181,13 @@ class DebateResultByAdjudicatorWithScores(DebateResultWithScoresMixin, DebateRes
             return None
         if not self._decision_calculated and len(self.sides) == 2:
             self._calculate_decision()
+        if not self.criteria:
+            return mean_score(self._relevant_scoresheets(), side, position)
         return mean(self.scoresheets[adj].get_score(side, position) for adj in self.relevant_adjudicators())
 
+    def _relevant_scoresheets(self):
+        return [self.scoresheets[adj] for adj in self.relevant_adjudicators()]
+
     def speakercriterionscore_field_score(self, side, pos, criterion):
         # Should be decision-decorated
         if not self.is_complete():
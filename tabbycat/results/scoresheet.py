@@ -8,11 +8,77 @@ the responsiblity of the debate result classes.
 "Position", "side" and "team" take the same meanings as in result.py. However,
 since the scoresheet classes don't know about team identities, the word "team"
 should not appear in any of them.
+
+Speaker scores and ranks are stored in fixed-shape arrays (side × position), so
+that totals, completeness checks and comparisons, and averages across the
+scoresheets of a voting ballot, can be computed with array operations. The
+`scores` and `speaker_ranks` attributes are dicts keyed by side and position
+that write through to these arrays, so the arrays stay in step however the
+scores are set.
 """
 
+import numpy as np
+
 from draw.types import DebateSide
 
 
+def _to_number(value, is_int):
+    """Converts a NumPy float to the number type that callers expect: None for
+    NaN, an int if it came from integers and is integral, a float otherwise."""
+    if np.isnan(value):
+        return None
+    value = float(value)
+    if is_int and value.is_integer():
+        return int(value)
+    # Floats converted from decimals can add up to slightly different values,
+    # so round away the difference before totals are compared.
+    return round(value, 10)
+
+
+class ArrayBackedDict(dict):
+    """A dict whose values are also written to a one-dimensional NumPy array,
+    `None` being stored as NaN. `index` maps each key to its index in `array`.
+    `ints` is a boolean array of the same shape, recording which values are
+    integers."""
+
+    def __init__(self, array, ints, index, default=None):
+        super().__init__()
+        self.array = array
+        self.ints = ints
+        self.index = index
+        for key in index:
+            self[key] = default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        i = self.index[key]
+        self.array[i] = np.nan if value is None else float(value)
+        self.ints[i] = isinstance(value, int)
+
+
+def stack_scores(sheets):
+    """Returns the scores of `sheets`, which must all have the same sides and
+    positions, as an array of shape (sheets, sides, positions), and a boolean
+    array of the same shape recording which scores are integers."""
+    return np.stack([sheet.score_array for sheet in sheets]), np.stack([sheet.score_ints for sheet in sheets])
+
+
+def mean_score(sheets, side, position):
+    """Returns the average score given by `sheets` to the speaker in `side`
+    and `position`, or None if any of them is missing that score."""
+    scores, ints = stack_scores(sheets)
+    i, j = sheets[0].side_index[side], sheets[0].position_index[position]
+    return _to_number(scores[:, i, j].mean(), ints[:, i, j].all())
+
+
+def mean_total(sheets, side):
+    """Returns the average total of `side` across `sheets`, or None if any of
+    them is missing a score for that side."""
+    scores, ints = stack_scores(sheets)
+    i = sheets[0].side_index[side]
+    return _to_number(scores[:, i, :].sum(axis=1).mean(), ints[:, i, :].all())
+
+
 class BaseScoresheet:
 
     uses_declared_winners = False
@@ -59,14 +125,24 @@ class ScoresMixin:
         super().__init__(*args, **kwargs)
         self.positions = positions
         self.criteria = kwargs.get('criteria', [])
-        self.scores = {side: dict.fromkeys(self.positions, None) for side in self.sides}
-        self.speaker_ranks = {side: dict.fromkeys(self.positions, None) for side in self.sides}
+        self.side_index = {side: i for i, side in enumerate(self.sides)}
+        self.position_index = {pos: j for j, pos in enumerate(self.positions)}
+
+        shape = (len(self.side_index), len(self.position_index))
+        self.score_array = np.full(shape, np.nan)
+        self.score_ints = np.zeros(shape, dtype=bool)
+        self.rank_array = np.full(shape, np.nan)
+        self.rank_ints = np.zeros(shape, dtype=bool)
+
+        self.scores = {side: ArrayBackedDict(self.score_array[i], self.score_ints[i], self.position_index)
+                       for side, i in self.side_index.items()}
+        self.speaker_ranks = {side: ArrayBackedDict(self.rank_array[i], self.rank_ints[i], self.position_index)
+                              for side, i in self.side_index.items()}
         self.criteria_scores = {side: {pos: dict.fromkeys(self.criteria, 0) for pos in self.positions} for side in self.sides}
 
     def is_complete(self):
         if len(self.criteria) == 0:
-            scores_complete = all(self.scores[s][p] is not None for s in self.sides
-                    for p in self.positions)
+            scores_complete = not np.isnan(self.score_array).any()
         else:
             scores_complete = True
         return super().is_complete() and scores_complete
@@ -93,13 +169,27 @@ class ScoresMixin:
         return self.criteria_scores[side][position][criterion]
 
     def get_total(self, side):
-        scores = [self.get_score(side, p) for p in self.positions]
-        if None in scores:
-            return None
-        return sum(scores)
+        if len(self.criteria) > 0:
+            scores = [self.get_score(side, p) for p in self.positions]
+            if None in scores:
+                return None
+            return sum(scores)
+        i = self.side_index[side]
+        return _to_number(self.score_array[i].sum(), self.score_ints[i].all())
+
+    def get_totals(self):
+        """Returns a list of the totals of all sides, in the order of `self.sides`."""
+        if len(self.criteria) > 0:
+            return [self.get_total(side) for side in self.sides]
+        totals = self.score_array.sum(axis=1)
+        ints = self.score_ints.all(axis=1)
+        return [_to_number(total, is_int) for total, is_int in zip(totals, ints)]
 
     def identical(self, other):
-        return super().identical(other) and self.scores == other.scores and self.speaker_ranks == other.speaker_ranks
+        return super().identical(other) and list(self.side_index) == list(other.side_index) and \
+            list(self.position_index) == list(other.position_index) and \
+            np.array_equal(self.score_array, other.score_array, equal_nan=True) and \
+            np.array_equal(self.rank_array, other.rank_array, equal_nan=True)
 
 
 class DeclaredWinnersMixin:
@@ -202,21 +292,21 @@ class PolyScoresheet(ScoresMixin, BasePolyScoresheet):
     def is_valid(self):
         if not super().is_valid():
             return False
-        totals = [self.get_total(side) for side in self.sides]
+        totals = self.get_totals()
         return len(set(totals)) == len(totals)
 
     def rank(self, side):
         if not self.is_valid():
             return None
-        totals = [self.get_total(side) for side in self.sides]
+        totals = self.get_totals()
+        side_total = totals[self.side_index[side]]
         totals.sort(reverse=True)
-        side_total = self.get_total(side)
         return totals.index(side_total) + 1
 
     def ranked_sides(self):
         if not self.is_valid():
             return []
-        total_by_side = [(self.get_total(side), side) for side in self.sides]
+        total_by_side = list(zip(self.get_totals(), self.sides))
         total_by_side.sort(reverse=True)
         return [side for total, side in total_by_side]
 
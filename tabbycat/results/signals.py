@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from draw.signals import get_debate_round_ids
+from utils.cache import invalidate_tags, round_tag
+
+from .models import BallotSubmission
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def invalidate_results_pages(sender, instance, **kwargs):
+    round_id, tournament_id = get_debate_round_ids(instance)
+    if tournament_id is not None:
+        invalidate_tags(tournament_id, 'results', round_tag('results', round_id))
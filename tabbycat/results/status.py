@@ -0,0 +1,124 @@
+"""Throttled stream of ballot statuses, for the results and overview pages.
+
+Rather than sending every ballot to every connected client as it's saved,
+changes are collected for each round, and sent at most once every
+`BALLOT_STATUS_INTERVAL` seconds as one compact delta: the number of debates
+with each result status, and the statuses and ballots of the debates that
+changed since the last delta. The delta is built once for all clients, so
+clients don't need to query anything to apply it. They fetch the ballot
+statuses snapshot view only when they (re)connect, to catch up on deltas they
+missed.
+
+The first change after a quiet period is sent straight away. Changes that
+arrive while the stream is throttled are sent by the "results" channel worker
+once the interval is up.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .consumers import BallotStatusConsumer
+from .models import BallotSubmission
+from .utils import get_result_status_meta, get_result_status_stats
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "ballot_status_pending_%d"
+PENDING_LOCK_KEY = "ballot_status_pending_lock_%d"
+THROTTLE_KEY = "ballot_status_throttle_%d"
+SCHEDULED_KEY = "ballot_status_scheduled_%d"
+PENDING_LOCK_TIMEOUT = 5
+PENDING_LOCK_POLL = 0.01
+
+WORKER_CHANNEL = "results"
+
+
+@contextmanager
+def _pending_lock(round_id):
+    lock_key = PENDING_LOCK_KEY % round_id
+    deadline = time.monotonic() + PENDING_LOCK_TIMEOUT
+    while not cache.add(lock_key, True, PENDING_LOCK_TIMEOUT) and time.monotonic() < deadline:
+        time.sleep(PENDING_LOCK_POLL)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def serialize_status(result_status):
+    icon, css_class, sort, tooltip = get_result_status_meta(result_status)
+    return {'status': result_status, 'icon': icon, 'class': css_class, 'sort': sort}
+
+
+def serialize_debate_ballots(tournament, debate_ids):
+    """Returns a dict mapping each of `debate_ids` to a list of the serialized
+    ballot submissions of that debate, in order of version."""
+    ballots = {debate_id: [] for debate_id in debate_ids}
+    ballotsubs = BallotSubmission.objects.filter(debate_id__in=debate_ids).select_related(
+        'debate', 'submitter', 'participant_submitter').order_by('version')
+    for ballotsub in ballotsubs:
+        ballots[ballotsub.debate_id].append(ballotsub.serialize(tournament))
+    return ballots
+
+
+def queue_ballot_status(debate):
+    """Records that the result status of `debate` has changed (or that one of
+    its ballots has), and sends a delta to clients if the stream for its round
+    isn't throttled."""
+    round_id = debate.round_id
+    with _pending_lock(round_id):
+        pending = cache.get(PENDING_KEY % round_id, {})
+        pending[debate.id] = debate.result_status
+        cache.set(PENDING_KEY % round_id, pending, None)
+
+    interval = settings.BALLOT_STATUS_INTERVAL
+    if interval <= 0 or cache.add(THROTTLE_KEY % round_id, time.time() + interval, interval):
+        send_ballot_statuses(debate.round)
+    elif cache.add(SCHEDULED_KEY % round_id, True, interval * 2):
+        async_to_sync(get_channel_layer().send)(WORKER_CHANNEL, {
+            "type": "send_ballot_statuses",
+            "round": round_id,
+        })
+
+
+def send_ballot_statuses(round):
+    """Sends the changes recorded for `round` since the last delta to clients,
+    if there are any."""
+    with _pending_lock(round.id):
+        changed = cache.get(PENDING_KEY % round.id)
+        cache.delete(PENDING_KEY % round.id)
+    if not changed:
+        return
+
+    tournament = round.tournament
+    ballots = serialize_debate_ballots(tournament, changed.keys())
+    group_name = BallotStatusConsumer.group_prefix + "_" + tournament.slug
+    async_to_sync(get_channel_layer().group_send)(group_name, {
+        "type": "send_json",
+        "data": {
+            'round': round.id,
+            'counts': get_result_status_stats(round),
+            'changed': {debate_id: {**serialize_status(status), 'ballots': ballots[debate_id]}
+                        for debate_id, status in changed.items()},
+        },
+    })
+    logger.debug("Sent ballot statuses of %d debates in %s", len(changed), round.name)
+
+
+def send_scheduled_ballot_statuses(round):
+    """Waits until the stream for `round` is no longer throttled, then sends
+    the changes recorded since the last delta. Called by the channel worker."""
+    deadline = cache.get(THROTTLE_KEY % round.id)
+    if deadline is not None:
+        time.sleep(max(deadline - time.time(), 0))
+
+    interval = settings.BALLOT_STATUS_INTERVAL
+    cache.delete(SCHEDULED_KEY % round.id)
+    cache.set(THROTTLE_KEY % round.id, time.time() + interval, interval)
+    send_ballot_statuses(round)
@@ -0,0 +1,111 @@
+from itertools import product
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from draw.models import Debate
+from results.merge import (is_ballot_merge_running, merge_round_ballots, pop_ballot_merge_report,
+                           queue_ballot_merge, run_ballot_merge)
+from results.models import BallotSubmission
+from results.result import DebateResult
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestMergeRoundBallots(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tournament.preferences['debate_rules__ballots_per_debate_prelim'] = 'per-adj'
+        self.tournament.preferences['data_entry__individual_ballots'] = True
+        self.tournament.preferences['data_entry__disable_ballot_confirms'] = True
+        self.user = get_user_model().objects.create(username='test_admin', is_superuser=True)
+        self.debates = list(self.round.debate_set.order_by('id'))
+        self.expected = {}
+        for debate in self.debates:
+            self.split_ballot(debate)
+
+    def tearDown(self):
+        cache.clear()
+
+    def split_ballot(self, debate):
+        """Replaces the confirmed ballot of `debate` with an individual ballot
+        from each voting adjudicator, with the scores they gave in it."""
+        ballotsub = debate.confirmed_ballot
+        result = ballotsub.result
+        self.expected[debate.id] = result
+        for adj in result.scoresheets:
+            individual = BallotSubmission.objects.create(debate=debate, motion=ballotsub.motion, single_adj=True,
+                submitter_type=BallotSubmission.Submitter.PUBLIC, participant_submitter=adj)
+            individual_result = DebateResult(individual, tournament=self.tournament)
+            for side, pos in product(result.sides, result.positions):
+                individual_result.set_speaker(side, pos, result.get_speaker(side, pos))
+                individual_result.set_ghost(side, pos, result.get_ghost(side, pos))
+                individual_result.set_score(side, pos, result.get_score(adj, side, pos))
+            individual_result.save()
+        ballotsub.discarded = True
+        ballotsub.confirmed = False
+        ballotsub.save()
+        debate.result_status = Debate.STATUS_DRAFT
+        debate.save()
+
+    def get_merged_result(self, debate):
+        return BallotSubmission.objects.get(debate=debate, single_adj=False, discarded=False).result
+
+    def test_merge(self):
+        report = merge_round_ballots(self.round, self.user)
+        self.assertEqual({entry['debate'] for entry in report}, {debate.id for debate in self.debates})
+        for entry in report:
+            self.assertEqual(entry['status'], 'merged')
+
+        for debate in self.debates:
+            expected = self.expected[debate.id]
+            merged = self.get_merged_result(debate)
+            self.assertTrue(merged.ballotsub.confirmed)
+            self.assertEqual(merged.ballotsub.motion, expected.ballotsub.motion)
+            for adj in expected.scoresheets:
+                self.assertTrue(merged.scoresheets[adj].identical(expected.scoresheets[adj]))
+            debate.refresh_from_db()
+            self.assertEqual(debate.result_status, Debate.STATUS_CONFIRMED)
+
+        # Nothing is left to merge the second time
+        self.assertEqual(merge_round_ballots(self.round, self.user), [])
+
+    def test_background_merge(self):
+        with mock.patch('results.merge.get_channel_layer') as get_channel_layer:
+            get_channel_layer.return_value.send = mock.AsyncMock()
+            self.assertTrue(queue_ballot_merge(self.round, self.user))
+            self.assertFalse(queue_ballot_merge(self.round, self.user))
+        self.assertTrue(is_ballot_merge_running(self.round))
+
+        run_ballot_merge(self.round, self.user)
+        self.assertFalse(is_ballot_merge_running(self.round))
+        self.assertEqual(len(pop_ballot_merge_report(self.round)['report']), len(self.debates))
+        self.assertIsNone(pop_ballot_merge_report(self.round))
+
+    def test_conflict(self):
+        debate = next(d for d in self.debates if len(self.expected[d.id].scoresheets) > 1)
+        individual = BallotSubmission.objects.filter(debate=debate, single_adj=True).first()
+        result = individual.result
+        side, pos = result.sides[0], result.positions[0]
+        result.set_speaker(side, pos, result.get_speaker(side, pos + 1))
+        result.save()
+
+        report = {entry['debate']: entry for entry in merge_round_ballots(self.round, self.user)}
+        self.assertEqual(report[debate.id]['status'], 'conflict')
+        self.assertEqual(report[debate.id]['messages'], ["Inconsistent speaker order"])
+        self.assertFalse(BallotSubmission.objects.filter(debate=debate, single_adj=False, discarded=False).exists())
+        for other in self.debates:
+            if other != debate:
+                self.assertEqual(report[other.id]['status'], 'merged')
+
+    def test_incomplete(self):
+        debate = self.debates[0]
+        BallotSubmission.objects.filter(debate=debate, single_adj=True).first().delete()
+        report = {entry['debate']: entry for entry in merge_round_ballots(self.round, self.user)}
+        self.assertEqual(report[debate.id]['status'], 'incomplete')
+        self.assertFalse(BallotSubmission.objects.filter(debate=debate, single_adj=False, discarded=False).exists())
@@ -0,0 +1,34 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from results.models import BallotSubmission
+from results.prefetch import populate_results
+from results.result import DebateResult
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestPopulateResults(CompletedTournamentTestMixin, TestCase):
+
+    def get_ballotsubs(self):
+        return BallotSubmission.objects.filter(debate__round__tournament=self.tournament,
+            confirmed=True).order_by('id')
+
+    def count_queries(self, n):
+        ballotsubs = list(self.get_ballotsubs()[:n])
+        with CaptureQueriesContext(connection) as context:
+            populate_results(ballotsubs, self.tournament)
+        return len(context.captured_queries)
+
+    def test_same_as_loaded(self):
+        ballotsubs = list(self.get_ballotsubs())
+        populate_results(ballotsubs, self.tournament)
+        for ballotsub in ballotsubs:
+            with self.subTest(ballotsub=ballotsub):
+                loaded = DebateResult(BallotSubmission.objects.get(id=ballotsub.id))
+                self.assertIs(type(ballotsub.result), type(loaded))
+                self.assertTrue(ballotsub.result.identical(loaded))
+
+    def test_fixed_queries(self):
+        self.count_queries(1)  # create preferences
+        self.assertEqual(self.count_queries(2), self.count_queries(self.get_ballotsubs().count()))
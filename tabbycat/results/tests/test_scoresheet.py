@@ -1,9 +1,10 @@
 import unittest
+from decimal import Decimal
 
 from draw.types import DebateSide
 
 from ..scoresheet import (HighPointWinsRequiredScoresheet, LowPointWinsAllowedScoresheet,
-    PolyScoresheet, ResultOnlyScoresheet, TiedPointWinsAllowedScoresheet)
+    mean_score, mean_total, PolyScoresheet, ResultOnlyScoresheet, TiedPointWinsAllowedScoresheet)
 
 
 def on_all_testdata(test_fn):
@@ -194,3 +195,50 @@ class TestPolyScoresheets(unittest.TestCase):
             for position, score in zip(self.positions, scores_for_side):
                 self.assertEqual(scoresheet.get_score(side, position), score)
         self.assertEqual(scoresheet.is_valid(), len(testdata['ranks']) > 0)
+
+
+class TestArrayBackedScoresheets(unittest.TestCase):
+
+    sides = [DebateSide.AFF, DebateSide.NEG]
+    positions = [1, 2, 3, 4]
+
+    def make_scoresheet(self, scores):
+        scoresheet = HighPointWinsRequiredScoresheet(self.positions)
+        for side, scores_for_side in zip(self.sides, scores):
+            for position, score in zip(self.positions, scores_for_side):
+                scoresheet.set_score(side, position, score)
+        return scoresheet
+
+    def test_dict_writes_through(self):
+        scoresheet = self.make_scoresheet([[75, 76, 74, 38], [76, 73, 75, 37]])
+        self.assertTrue(scoresheet.is_complete())
+        scoresheet.scores[DebateSide.AFF][2] = None
+        self.assertFalse(scoresheet.is_complete())
+        self.assertIsNone(scoresheet.get_total(DebateSide.AFF))
+        scoresheet.scores[DebateSide.AFF][2] = 80
+        self.assertEqual(scoresheet.get_total(DebateSide.AFF), 267)
+        self.assertEqual(scoresheet.winners(), {DebateSide.AFF})
+
+    def test_total_types(self):
+        scoresheet = self.make_scoresheet([[75, 76, 74, 38], [Decimal('76.1'), 73, 75, Decimal('37.2')]])
+        self.assertIsInstance(scoresheet.get_total(DebateSide.AFF), int)
+        self.assertEqual(scoresheet.get_total(DebateSide.NEG), 261.3)
+
+    def test_identical(self):
+        scores = [[75, 76, None, 38], [76, 73, 75, 37.5]]
+        self.assertTrue(self.make_scoresheet(scores).identical(self.make_scoresheet(scores)))
+        other = self.make_scoresheet(scores)
+        other.scores[DebateSide.NEG][4] = 37
+        self.assertFalse(self.make_scoresheet(scores).identical(other))
+
+    def test_means(self):
+        sheets = [
+            self.make_scoresheet([[75, 76, 74, 38], [76, 73, 75, 37]]),
+            self.make_scoresheet([[76, 76, 74, 38], [76, 73, 75, 37.5]]),
+        ]
+        self.assertEqual(mean_score(sheets, DebateSide.AFF, 1), 75.5)
+        self.assertEqual(mean_score(sheets, DebateSide.AFF, 2), 76)
+        self.assertIsInstance(mean_score(sheets, DebateSide.AFF, 2), int)
+        self.assertEqual(mean_total(sheets, DebateSide.NEG), 261.25)
+        sheets[1].scores[DebateSide.NEG][3] = None
+        self.assertIsNone(mean_total(sheets, DebateSide.NEG))
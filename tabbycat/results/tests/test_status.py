@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings, TestCase
+
+from draw.models import Debate
+from results.status import queue_ballot_status, send_scheduled_ballot_statuses
+from utils.misc import reverse_tournament
+from utils.tests import CompletedTournamentTestMixin
+
+
+@override_settings(BALLOT_STATUS_INTERVAL=60)
+class TestBallotStatusStream(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.debates = list(self.round.debate_set.order_by('id'))
+        self.channel_layer = mock.Mock(group_send=mock.AsyncMock(), send=mock.AsyncMock())
+        patcher = mock.patch('results.status.get_channel_layer', return_value=self.channel_layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def sent_deltas(self):
+        return [call.args[1]['data'] for call in self.channel_layer.group_send.call_args_list]
+
+    def test_throttled(self):
+        d1, d2, d3 = self.debates[:3]
+        d1.result_status = Debate.STATUS_DRAFT
+        queue_ballot_status(d1)
+        self.assertEqual(len(self.sent_deltas()), 1)
+        self.assertEqual(list(self.sent_deltas()[0]['changed']), [d1.id])
+
+        # Further changes within the interval are held back for the worker
+        d2.result_status = Debate.STATUS_POSTPONED
+        queue_ballot_status(d2)
+        queue_ballot_status(d3)
+        queue_ballot_status(d2)
+        self.assertEqual(len(self.sent_deltas()), 1)
+        self.channel_layer.send.assert_called_once_with("results", {
+            "type": "send_ballot_statuses", "round": self.round.id})
+
+        with mock.patch('results.status.time.sleep') as sleep:
+            send_scheduled_ballot_statuses(self.round)
+        sleep.assert_called_once()
+        delta = self.sent_deltas()[1]
+        self.assertEqual(delta['round'], self.round.id)
+        self.assertEqual(set(delta['changed']), {d2.id, d3.id})
+        self.assertEqual(delta['changed'][d2.id]['status'], Debate.STATUS_POSTPONED)
+        self.assertEqual([b['ballot_id'] for b in delta['changed'][d3.id]['ballots']],
+                         list(d3.ballotsubmission_set.order_by('version').values_list('id', flat=True)))
+        self.assertEqual(sum(delta['counts'].values()), len(self.debates))
+
+    def test_nothing_pending(self):
+        queue_ballot_status(self.debates[0])
+        with mock.patch('results.status.time.sleep'):
+            send_scheduled_ballot_statuses(self.round)
+        self.assertEqual(len(self.sent_deltas()), 1)
+
+
+class TestBallotStatusesView(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def get_statuses(self, **params):
+        return self.client.get(reverse_tournament('results-ballot-statuses', self.tournament), params)
+
+    def test_snapshot(self):
+        user = get_user_model().objects.create(username='test_admin', is_superuser=True)
+        self.client.force_login(user)
+        debates = list(self.round.debate_set.order_by('id')[:2])
+
+        response = self.get_statuses(round=self.round.id, debates=",".join(str(d.id) for d in debates))
+        self.assertEqual(response.status_code, 200)
+        snapshot = response.json()
+        self.assertEqual(snapshot['round'], self.round.id)
+        self.assertEqual(sum(snapshot['counts'].values()), self.round.debate_set.count())
+        self.assertEqual(set(snapshot['debates']), {str(d.id) for d in debates})
+        for debate in debates:
+            ballots = snapshot['debates'][str(debate.id)]['ballots']
+            self.assertEqual([b['ballot_id'] for b in ballots],
+                             list(debate.ballotsubmission_set.order_by('version').values_list('id', flat=True)))
+
+        self.assertEqual(len(self.get_statuses(round=self.round.id).json()['debates']),
+                         self.round.debate_set.count())
+        self.assertEqual(self.get_statuses(round=0).status_code, 404)
+        self.assertEqual(self.get_statuses(round=self.round.id, debates="a,b").status_code, 400)
+
+    def test_unauthenticated(self):
+        self.assertEqual(self.get_statuses(round=self.round.id).status_code, 302)
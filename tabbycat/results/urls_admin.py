@@ -8,7 +8,14 @@ urlpatterns = [
         views.AdminResultsEntryForRoundView.as_view(),
         name='results-round-list'),
 
+    path('statuses/',
+        views.AdminBallotStatusesView.as_view(),
+        name='results-ballot-statuses'),
+
     # Inline Actions
+    path('round/<int:round_seq>/merge/',
+        views.MergeRoundBallotsView.as_view(),
+        name='results-merge-round'),
     path('round/<int:round_seq>/postpone/<int:debate_id>/',
         views.PostponeDebateView.as_view(),
         name='results-postpone-debate'),
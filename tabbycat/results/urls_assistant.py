@@ -7,6 +7,9 @@ urlpatterns = [
     path('',
         views.AssistantResultsEntryView.as_view(),
         name='results-assistant-round-list'),
+    path('statuses/',
+        views.AssistantBallotStatusesView.as_view(),
+        name='results-assistant-ballot-statuses'),
 
     # Ballots
     path('ballots/<int:pk>/edit/',
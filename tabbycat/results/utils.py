@@ -14,12 +14,18 @@ logger = logging.getLogger(__name__)
 
 
 def get_status_meta(debate):
+    return get_result_status_meta(debate.result_status)
+
+
+def get_result_status_meta(result_status):
+    """Returns a tuple (icon, class, sort, tooltip) for displaying a result
+    status."""
     return {
         Debate.STATUS_NONE: ("x", "text-danger", 0, _("No Ballot")),
         Debate.STATUS_POSTPONED: ("pause", "", 4, _("Debate was Postponed")),
         Debate.STATUS_DRAFT: ("circle", "text-info", 2, _("Ballot is Unconfirmed")),
         Debate.STATUS_CONFIRMED: ("check", "text-success", 3, _("Ballot is Confirmed")),
-    }[debate.result_status]
+    }[result_status]
 
 
 def readable_ballotsub_result(debateresult):
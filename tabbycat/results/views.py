@@ -6,15 +6,15 @@ from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import ProgrammingError
-from django.db.models import Count, Max, Q, Window
-from django.db.models.functions import Coalesce, Rank
-from django.http import HttpResponseRedirect
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
 from django.utils.html import escape
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy
-from django.views.generic import FormView, TemplateView
+from django.views.generic import FormView, TemplateView, View
 
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
@@ -22,7 +22,7 @@ from adjallocation.models import DebateAdjudicator
 from draw.models import Debate
 from draw.prefetch import populate_opponents
 from draw.types import DebateSide
-from motions.models import DebateTeamMotionPreference, RoundMotion
+from motions.models import RoundMotion
 from motions.utils import merge_motion_vetos, merge_motions
 from notifications.models import BulkNotification
 from options.utils import use_team_code_names, use_team_code_names_data_entry
@@ -32,20 +32,22 @@ from tournaments.mixins import (CurrentRoundMixin, PersonalizablePublicTournamen
                                 RoundMixin, SingleObjectByRandomisedUrlMixin, SingleObjectFromTournamentMixin,
                                 TournamentMixin)
 from tournaments.models import Round
-from users.permissions import Permission
+from users.permissions import has_permission, Permission
 from utils.misc import get_ip_address, reverse_round, reverse_tournament
 from utils.mixins import AdministratorMixin, AssistantMixin
 from utils.tables import TabbycatTableBuilder
 from utils.views import PostOnlyRedirectView, VueTableTemplateView
 
-from .consumers import BallotStatusConsumer
-from .forms import (broadcast_results, PerAdjudicatorBallotSetForm, PerAdjudicatorEliminationBallotSetForm,
-                    SingleBallotSetForm, SingleEliminationBallotSetForm)
+from .forms import (PerAdjudicatorBallotSetForm, PerAdjudicatorEliminationBallotSetForm, SingleBallotSetForm,
+                    SingleEliminationBallotSetForm)
+from .merge import (get_latest_individual_ballots, is_ballot_merge_running, merge_debate_ballots,
+                    pop_ballot_merge_report, queue_ballot_merge)
 from .models import BallotSubmission, ScoreCriterion, TeamScore
 from .prefetch import populate_confirmed_ballots, populate_results
 from .result import DebateResult, get_class_name
+from .status import queue_ballot_status, serialize_debate_ballots, serialize_status
 from .tables import ResultsTableBuilder
-from .utils import get_status_meta, populate_identical_ballotsub_lists
+from .utils import get_result_status_stats, populate_identical_ballotsub_lists
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +57,7 @@ class PublicResultsIndexView(PublicTournamentPageMixin, TemplateView):
     template_name = 'public_results_index.html'
     public_page_preference = 'public_results'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ('results',)
 
     def get_context_data(self, **kwargs):
         kwargs["rounds"] = self.tournament.round_set.filter(
@@ -102,6 +105,8 @@ class BaseResultsEntryForRoundView(RoundMixin, VueTableTemplateView):
         return iron_speeches
 
     def get_context_data(self, **kwargs):
+        kwargs["ballot_statuses_url"] = "%s?round=%d" % (
+            reverse_tournament(self.ballot_statuses_url_name, self.tournament), self.round.id)
         kwargs["incomplete_ballots"] = self._get_draw().filter(
             Q(result_status=Debate.STATUS_NONE) | Q(result_status=Debate.STATUS_DRAFT)).exists()
         kwargs["iron_speeches"] = self.get_irons_list()
@@ -110,11 +115,13 @@ class BaseResultsEntryForRoundView(RoundMixin, VueTableTemplateView):
 
 class AssistantResultsEntryView(AssistantMixin, CurrentRoundMixin, BaseResultsEntryForRoundView):
     template_name = 'assistant_results.html'
+    ballot_statuses_url_name = 'results-assistant-ballot-statuses'
 
 
 class AdminResultsEntryForRoundView(AdministratorMixin, BaseResultsEntryForRoundView):
     template_name = 'admin_results.html'
     view_permission = Permission.VIEW_RESULTS
+    ballot_statuses_url_name = 'results-ballot-statuses'
 
     def get_context_data(self, **kwargs):
         # Stopgap to warn user about potential database inconsistency, when
@@ -152,9 +159,56 @@ class AdminResultsEntryForRoundView(AdministratorMixin, BaseResultsEntryForRound
             logger.error("Multiple confirmed ballots for a single debate found")
         kwargs["debates_with_multiple_confirmed_ballots_found"] = multiple_confirmed_ballots_found
 
+        if self.tournament.pref('individual_ballots'):
+            kwargs["ballot_merge"] = pop_ballot_merge_report(self.round)
+            kwargs["ballot_merge_running"] = is_ballot_merge_running(self.round)
+
         return super().get_context_data(**kwargs)
 
 
+class BaseBallotStatusesView(TournamentMixin, View):
+    """Returns the result statuses and ballots of the debates in a round, as
+    JSON, for clients of the ballot status stream to catch up from. The round
+    is given by its ID in the `round` parameter. If a comma-separated list of
+    debate IDs is given in the `debates` parameter, only those debates are
+    included."""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            round = self.tournament.round_set.get(id=int(request.GET['round']))
+        except (KeyError, ValueError, Round.DoesNotExist):
+            raise Http404("No such round")
+
+        debates = round.debate_set.all()
+        if request.GET.get('debates'):
+            try:
+                debate_ids = [int(debate_id) for debate_id in request.GET['debates'].split(',')]
+            except ValueError:
+                return HttpResponseBadRequest("Debate IDs must be integers")
+            debates = debates.filter(id__in=debate_ids)
+
+        statuses = dict(debates.values_list('id', 'result_status'))
+        ballots = serialize_debate_ballots(self.tournament, statuses.keys())
+        return JsonResponse({
+            'round': round.id,
+            'counts': get_result_status_stats(round),
+            'debates': {debate_id: {**serialize_status(status), 'ballots': ballots[debate_id]}
+                        for debate_id, status in statuses.items()},
+        })
+
+
+class AdminBallotStatusesView(AdministratorMixin, BaseBallotStatusesView):
+    view_permission = Permission.VIEW_BALLOTSUBMISSIONS
+
+    def test_func(self):
+        # Also used by the ballot status graph on the dashboard
+        return super().test_func() or has_permission(self.request.user, Permission.VIEW_BALLOTSUBMISSION_GRAPH, self.tournament)
+
+
+class AssistantBallotStatusesView(AssistantMixin, BaseBallotStatusesView):
+    pass
+
+
 class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableTemplateView):
 
     template_name = "public_results_for_round.html"
@@ -163,6 +217,7 @@ class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableT
     page_emoji = '💥'
     default_view = 'team'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ('results', 'draw', 'participants')
 
     def get_table(self):
         view_type = self.request.session.get('results_view', self.default_view)
@@ -646,49 +701,15 @@ class BasePublicNewBallotSetView(PersonalizablePublicTournamentPageMixin, RoundM
 
     def postprocess_result(self):
         if self.ballotsub.single_adj and self.tournament.pref('disable_ballot_confirms'):
-            merged_bs = BallotSubmission(
-                debate=self.debate,
-                submitter=None,
-                submitter_type=BallotSubmission.Submitter.AUTOMATION,
-                ip_address=get_ip_address(self.request),
-                confirmed=True,
-                confirm_timestamp=timezone.now(),
-            )
-            bses = BallotSubmission.objects.filter(
-                debate=self.debate, participant_submitter__isnull=False, discarded=False, single_adj=True,
-            ).select_related('participant_submitter').annotate(ordering=Window(Rank(), partition_by="participant_submitter", order_by="-version")).filter(ordering=1)
+            bses = get_latest_individual_ballots([self.debate])[self.debate.id]
             if len(bses) != DebateAdjudicator.objects.filter(debate=self.debate).exclude(type=DebateAdjudicator.TYPE_TRAINEE).count():
                 return
             populate_results(bses, self.tournament)
 
-            # Handle result conflicts
             criteria = ScoreCriterion.objects.filter(tournament=self.tournament)
-            merged_result = DebateResult(merged_bs, tournament=self.tournament, criteria=criteria)
-            errors = merged_result.populate_from_merge(*[b.result for b in bses])
-
-            if len(errors) == 0:
-                has_errors = False
-                merged_bs.save()
-                merged_result.save()
-
-                bs_motions = BallotSubmission.objects.filter(
-                    id__in=[b.id for b in bses], motion__isnull=False,
-                ).prefetch_related('debateteammotionpreference_set__debate_team')
-                try:
-                    merge_motions(merged_bs, bs_motions)
-                    merged_bs.save()
-                except ValidationError:
-                    has_errors = True
-
-                try:
-                    vetos = merge_motion_vetos(merged_bs, bs_motions)
-                    DebateTeamMotionPreference.objects.bulk_create(list(vetos.values()))
-                except ValidationError:
-                    has_errors = True
-
-                self.debate.result_status = Debate.STATUS_POSTPONED if has_errors else Debate.STATUS_CONFIRMED
-                self.debate.save()
-                broadcast_results(merged_bs, self.debate)
+            merge_debate_ballots(self.debate, bses, criteria,
+                submitter=None, submitter_type=BallotSubmission.Submitter.AUTOMATION,
+                ip_address=get_ip_address(self.request))
 
 
 class OldPublicNewBallotSetByIdUrlView(SingleObjectFromTournamentMixin, BasePublicNewBallotSetView):
@@ -900,20 +921,26 @@ class PostponeDebateView(AdministratorMixin, RoundMixin, PostOnlyRedirectView):
         debate.save()
 
         # Notify the Results Page
-        group_name = BallotStatusConsumer.group_prefix + "_" + debate.round.tournament.slug
-        meta = get_status_meta(debate)
-        async_to_sync(get_channel_layer().group_send)(group_name, {
-            "type": "send_json",
-            "data": {
-                'status': debate.result_status,
-                'icon': meta[0],
-                'class': meta[1],
-                'sort': meta[2],
-                'ballot': None,
-                'round': debate.round_id,
-            },
-        })
+        queue_ballot_status(debate)
+
+        return super().post(request, *args, **kwargs)
+
 
+class MergeRoundBallotsView(AdministratorMixin, RoundMixin, PostOnlyRedirectView):
+    """Queues the individual ballots of every debate in the round to be merged
+    by the "results" worker."""
+
+    round_redirect_pattern_name = 'results-round-list'
+    edit_permission = Permission.ADD_BALLOTSUBMISSIONS
+
+    def post(self, request, *args, **kwargs):
+        if queue_ballot_merge(self.round, request.user):
+            messages.success(request, _("The ballots for %(round)s are being merged. The ballot statuses below "
+                "will update as each debate is merged; reload this page once they're done to see a report.") % {
+                'round': self.round.name})
+        else:
+            messages.warning(request, _("The ballots for %(round)s are already being merged.") % {
+                'round': self.round.name})
         return super().post(request, *args, **kwargs)
 
 
@@ -950,9 +977,7 @@ class BaseMergeLatestBallotsView(BaseNewBallotSetView):
         super().populate_objects()
         self.round = self.debate.round
 
-        bses = BallotSubmission.objects.filter(
-            debate=self.debate, participant_submitter__isnull=False, discarded=False, single_adj=True,
-        ).annotate(ordering=Window(Rank(), partition_by="participant_submitter", order_by="-version")).filter(ordering=1).select_related('participant_submitter')
+        bses = get_latest_individual_ballots([self.debate])[self.debate.id]
         populate_results(bses, self.tournament)
         self.merged_ballots = bses
 
@@ -208,6 +208,9 @@ TEMPLATES = [
 PUBLIC_FAST_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_FAST_CACHE_TIMEOUT', 60 * 1))
 PUBLIC_SLOW_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_SLOW_CACHE_TIMEOUT', 60 * 3.5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
+STANDINGS_CACHE_TIMEOUT = int(os.environ.get('STANDINGS_CACHE_TIMEOUT', 60 * 60 * 24))
+TAGGED_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAGGED_PAGES_CACHE_TIMEOUT', 60 * 60 * 24))
+ALLOCATION_INDEX_CACHE_TIMEOUT = int(os.environ.get('ALLOCATION_INDEX_CACHE_TIMEOUT', 60 * 60 * 24))
 
 # Default non-heroku cache is to use local memory
 CACHES = {
@@ -331,6 +334,9 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Seconds between updates to the ballot status stream (see results/status.py)
+BALLOT_STATUS_INTERVAL = float(os.environ.get('BALLOT_STATUS_INTERVAL', 2))
+
 # ==============================================================================
 # Dynamic preferences
 # ==============================================================================
@@ -354,7 +360,7 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'drf_link_header_pagination.LinkHeaderLimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetLimitOffsetPagination',
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
     'TEST_REQUEST_RENDERER_CLASSES': [
@@ -3,8 +3,10 @@
 import logging
 import random
 
+from django.db.models import FilteredRelation, Q
 from django.utils.translation import gettext as _
 
+from . import snapshots
 from .metrics import metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
 
 logger = logging.getLogger(__name__)
@@ -254,6 +256,39 @@ class Standings:
 
         self.ranked = True
 
+    def get_snapshot(self):
+        """Returns a picklable representation of these (sorted) standings,
+        which refers to instances only by ID. See `from_snapshot()`."""
+        assert self.ranked, "sort() must be called before taking a snapshot"
+        return {
+            'metric_specs': self._metric_specs,
+            'metric_ascending': self.metric_ascending,
+            'ranking_specs': self._ranking_specs,
+            'standings': [(info.instance_id, info.metrics, info.rankings) for info in self._standings],
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot, instances, rank_filter=None):
+        """Recreates standings from a snapshot returned by `get_snapshot()`.
+        `instances` must include every instance in the snapshot; any others
+        are left out, as they would have been filtered out originally."""
+        instances_by_id = {instance.id: instance for instance in instances}
+        standings = cls([instances_by_id[id] for id, _, _ in snapshot['standings']], rank_filter=rank_filter)
+
+        for spec in snapshot['metric_specs']:
+            standings.record_added_metric(*spec, snapshot['metric_ascending'][spec[0]])
+        for spec in snapshot['ranking_specs']:
+            standings.record_added_ranking(*spec)
+
+        standings._standings = []
+        for id, metrics, rankings in snapshot['standings']:
+            info = standings.infos[instances_by_id[id]]
+            info.metrics.update(metrics)
+            info.rankings.update(rankings)
+            standings._standings.append(info)
+        standings.ranked = True
+        return standings
+
     def filter(self, include_filter):
         self.infos = {instance: info for instance, info in self.infos.items() if include_filter(info)}
 
@@ -273,6 +308,7 @@ class BaseStandingsGenerator:
         "tiebreak": "random",
         "rank_filter": (None, None),  # (Field name, Min value)
         "include_filter": None,  # not currently used by other code,
+        "running_totals": False,  # read metrics from running totals where possible
     }
 
     TIEBREAK_FUNCTIONS = {
@@ -286,6 +322,11 @@ class BaseStandingsGenerator:
     metric_annotator_classes = {}
     ranking_annotator_classes = {}
 
+    # Subclasses that support running totals (see totals.py) must set these
+    running_totals_model = None
+    running_totals_field = None
+    update_running_totals = None
+
     def __init__(self, metrics, rankings, extra_metrics=(), **options):
 
         # Set up options dictionary
@@ -337,8 +378,12 @@ class BaseStandingsGenerator:
 
         self._annotate_metrics(queryset_for_metrics, self.distinct_queryset_metric_annotators, standings, round)
 
-        for annotator in self.queryset_metric_annotators:
-            queryset_for_metrics = annotator.get_annotated_queryset(queryset_for_metrics, round)
+        totals_round = self.get_running_totals_round(round)
+        if totals_round is not None:
+            queryset_for_metrics = self.annotate_running_totals(queryset_for_metrics, totals_round)
+        else:
+            for annotator in self.queryset_metric_annotators:
+                queryset_for_metrics = annotator.get_annotated_queryset(queryset_for_metrics, round)
 
         if len(self.precedence) > 0 and set(self.precedence) <= {a.key for a in self.queryset_metric_annotators}:
             # If there is a precedence and all used metrics are combinable aggregation-based,
@@ -362,6 +407,38 @@ class BaseStandingsGenerator:
 
         return standings
 
+    def generate_cached(self, queryset, tournament, round=None):
+        """Like `generate()`, but stores a snapshot of the standings in the
+        cache, and returns standings restored from it if it is already there
+        and no results in `tournament` have changed since. The instances are
+        always taken from `queryset`, so attributes loaded using
+        `select_related()` and `prefetch_related()` are available as usual."""
+
+        if self.options["include_filter"] is not None:
+            # Arbitrary callables can't be part of a cache key
+            return self.generate(queryset, round)
+
+        instances = list(queryset)  # also fills the queryset's own cache for generate()
+        key = snapshots.get_snapshot_key(tournament.id,
+            self.__class__.__name__,
+            getattr(round, 'id', None),
+            self.precedence,
+            [annotator.key for annotator in self.metric_annotators],
+            [annotator.key for annotator in self.ranking_annotators],
+            sorted((k, v) for k, v in self.options.items() if k != "include_filter"),
+            sorted(instance.id for instance in instances),
+        )
+
+        snapshot = snapshots.get_snapshot(key)
+        rank_filter = self.get_rank_filter() if self.options["rank_filter"][0] is not None else None
+        if snapshot is not None:
+            logger.debug("Using cached standings snapshot %s", key)
+            return Standings.from_snapshot(snapshot, instances, rank_filter=rank_filter)
+
+        standings = self.generate(queryset, round)
+        snapshots.set_snapshot(key, standings.get_snapshot())
+        return standings
+
     def generate_from_queryset(self, queryset, standings, round):
         """Generates standings if rankings can be calculated through the
         aggregations present from the queryset (no repeated metrics)"""
@@ -369,12 +446,6 @@ class BaseStandingsGenerator:
         for annotator in self.ranking_annotators:
             queryset = annotator.get_annotated_queryset(queryset, self.queryset_metric_annotators, *self.options["rank_filter"])
 
-        # Can use window functions to rank standings if all are from queryset
-        for annotator in self.ranking_annotators:
-            logger.debug("Running ranking queryset annotator: %s", annotator.name)
-            annotator.run_queryset(queryset, standings)
-        logger.debug("Ranking queryset annotators done.")
-
         # Order by rank and tie-breaker if available.
         tiebreak_func = None
         ordering_keys = [a.key for a in self.ranking_annotators]
@@ -385,6 +456,14 @@ class BaseStandingsGenerator:
             ordering_keys.append(self._qs_tiebreak_field)
         queryset = queryset.order_by(*ordering_keys)
 
+        # Can use window functions to rank standings if all are from queryset.
+        # Metric and ranking annotations are all in this one query, which is
+        # evaluated once and then shared by all annotators below.
+        for annotator in self.ranking_annotators:
+            logger.debug("Running ranking queryset annotator: %s", annotator.name)
+            annotator.run_queryset(queryset, standings)
+        logger.debug("Ranking queryset annotators done.")
+
         standings.sort_from_rankings(tiebreak_func)
 
         # Add metrics that aren't used for ranking (done afterwards for "draw strength by rank")
@@ -392,6 +471,38 @@ class BaseStandingsGenerator:
 
         return standings
 
+    def get_running_totals_round(self, round):
+        """Returns the preliminary round whose running totals hold the metrics
+        as at `round`, or None if running totals can't be used, in which case
+        metrics are aggregated from scores as usual. Running totals are only
+        used if the option is on and every combinable metric is stored in
+        them, since they can't be mixed with aggregations in one query."""
+        if not self.options["running_totals"] or self.running_totals_model is None or round is None:
+            return None
+        if not all(annotator.running_total for annotator in self.queryset_metric_annotators):
+            return None
+        return round.tournament.prelim_rounds(until=round).order_by('seq').last()
+
+    def annotate_running_totals(self, queryset, totals_round):
+        """Annotates `queryset` with all combinable metrics, read from the
+        running totals for `totals_round`. Running totals that don't yet exist
+        (for example, for a new round) are calculated first."""
+        field = self.running_totals_field
+        ids = set(queryset.values_list('id', flat=True))
+        existing = self.running_totals_model.objects.filter(
+            round=totals_round, **{field + '_id__in': ids}).values_list(field + '_id', flat=True)
+        missing = ids.difference(existing)
+        if missing:
+            logger.info("Calculating %d missing running totals for %s", len(missing), totals_round.name)
+            self.update_running_totals(totals_round.tournament, missing)
+
+        relation = self.running_totals_model._meta.model_name
+        queryset = queryset.annotate(running_totals=FilteredRelation(relation,
+                condition=Q(**{relation + '__round': totals_round})))
+        for annotator in self.queryset_metric_annotators:
+            queryset = annotator.get_running_total_annotated_queryset(queryset, 'running_totals')
+        return queryset
+
     @staticmethod
     def _check_annotators(annotators, error_str):
         """Checks the given list of annotators to ensure there are no conflicts.
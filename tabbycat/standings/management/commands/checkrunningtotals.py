@@ -0,0 +1,81 @@
+from django.core.management.base import CommandError
+
+from participants.models import Speaker
+from utils.management.base import TournamentCommand
+
+from ...snapshots import bump_results_version
+from ...speakers import SpeakerStandingsGenerator
+from ...teams import TeamStandingsGenerator
+from ...totals import metrics_match, rebuild_running_totals
+
+
+class Command(TournamentCommand):
+
+    help = "Checks the running totals used for standings against the full " \
+        "aggregation of confirmed ballots, and lists any discrepancies."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("--fix", action="store_true",
+            help="Recalculate the running totals of any teams or speakers with discrepancies")
+        parser.add_argument("--rebuild", action="store_true",
+            help="Recalculate all running totals without checking them first")
+
+    def handle_tournament(self, tournament, **options):
+        if options["rebuild"]:
+            rebuild_running_totals(tournament)
+            self.stdout.write("Rebuilt running totals for tournament \"{:s}\"".format(tournament.name))
+            return
+
+        checks = [
+            (TeamStandingsGenerator, tournament.team_set.all()),
+            (SpeakerStandingsGenerator, Speaker.objects.filter(team__tournament=tournament)),
+        ]
+
+        nerrors = 0
+        for generator_class, queryset in checks:
+            inconsistent = self.check_running_totals(tournament, generator_class, queryset)
+            if inconsistent and options["fix"]:
+                generator_class.update_running_totals(tournament, inconsistent)
+                self.stdout.write("Recalculated running totals for {:d} {:s}".format(
+                        len(inconsistent), queryset.model._meta.verbose_name_plural))
+            nerrors += len(inconsistent)
+
+        if nerrors > 0 and options["fix"]:
+            bump_results_version(tournament.id)
+
+        if nerrors == 0:
+            self.stdout.write(self.style.SUCCESS("Running totals for tournament \"{:s}\" are consistent".format(tournament.name)))
+        elif not options["fix"]:
+            raise CommandError("Running totals for tournament \"{:s}\" are inconsistent for {:d} instances; "
+                "use --fix to recalculate them".format(tournament.name, nerrors))
+
+    def check_running_totals(self, tournament, generator_class, queryset):
+        """Compares running totals with standings generated from scores, for
+        every preliminary round, and returns the IDs of instances for which
+        they don't match."""
+        model = generator_class.running_totals_model
+        field = generator_class.running_totals_field
+        keys = [key for key, annotator in generator_class.metric_annotator_classes.items()
+                if getattr(annotator, 'running_total', False)]
+        generator = generator_class((), (), extra_metrics=keys)
+
+        inconsistent = set()
+        for rd in tournament.prelim_rounds().order_by('seq'):
+            standings = generator.generate(queryset, round=rd)
+            totals = {getattr(t, field + '_id'): t for t in model.objects.filter(round=rd)}
+
+            for info in standings.infoview():
+                total = totals.get(info.instance_id)
+                if total is None:
+                    self.stdout.write("{:s} has no running total for {:s}".format(str(info.instance), rd.name))
+                    inconsistent.add(info.instance_id)
+                    continue
+                for key in keys:
+                    expected, actual = info.metrics[key], getattr(total, key)
+                    if not metrics_match(expected, actual):
+                        self.stdout.write("{:s} in {:s}: {:s} is {!r} in running totals, but should be {!r}".format(
+                                str(info.instance), rd.name, key, actual, expected))
+                        inconsistent.add(info.instance_id)
+
+        return inconsistent
@@ -100,6 +100,7 @@ class RepeatedMetricAnnotator(BaseMetricAnnotator):
 class QuerySetMetricAnnotator(BaseMetricAnnotator):
     """Base class for annotators that metrics based on conditional aggregations."""
     combinable = True
+    running_total = False  # if True, this metric is also stored in running totals (see totals.py)
 
     def get_annotation(self, round):
         raise NotImplementedError("Subclasses of QuerySetMetricAnnotator must implement get_annotation().")
@@ -111,6 +112,12 @@ class QuerySetMetricAnnotator(BaseMetricAnnotator):
         self.queryset_annotated = True
         return queryset.annotate(**{self.key: annotation})
 
+    def get_running_total_annotated_queryset(self, queryset, relation):
+        """Returns a QuerySet annotated with the metric given, read from the
+        running totals joined to the queryset as `relation`."""
+        self.queryset_annotated = True
+        return queryset.annotate(**{self.key: F(relation + "__" + self.key)})
+
     def get_ranking_annotation(self, min_field, min_rounds):
         if min_rounds is None:
             return F(self.key)
@@ -0,0 +1,213 @@
+# Generated by Django 5.0.4 on 2026-10-16 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import utils.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("participants", "0025_alter_tournamentinstitution_teams_allocated_coach"),
+        ("tournaments", "0013_scheduleevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpeakerRunningTotal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="total"
+                    ),
+                ),
+                (
+                    "average",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="average"
+                    ),
+                ),
+                (
+                    "stdev",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="standard deviation"
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="number of speeches given"
+                    ),
+                ),
+                (
+                    "srank",
+                    models.IntegerField(
+                        blank=True, null=True, verbose_name="speech ranks"
+                    ),
+                ),
+                (
+                    "replies_sum",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="total reply score"
+                    ),
+                ),
+                (
+                    "replies_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="average reply score"
+                    ),
+                ),
+                (
+                    "replies_stddev",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="reply score standard deviation"
+                    ),
+                ),
+                (
+                    "replies_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="replies given"
+                    ),
+                ),
+                (
+                    "round",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tournaments.round",
+                        verbose_name="round",
+                    ),
+                ),
+                (
+                    "speaker",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="participants.speaker",
+                        verbose_name="speaker",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "speaker running total",
+                "verbose_name_plural": "speaker running totals",
+            },
+        ),
+        migrations.CreateModel(
+            name="TeamRunningTotal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "points",
+                    models.IntegerField(
+                        blank=True, null=True, verbose_name="points"
+                    ),
+                ),
+                ("wins", models.PositiveIntegerField(default=0, verbose_name="wins")),
+                (
+                    "speaks_sum",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="total speaker score"
+                    ),
+                ),
+                (
+                    "speaks_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="average total speaker score"
+                    ),
+                ),
+                (
+                    "speaks_stddev",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="speaker score standard deviation"
+                    ),
+                ),
+                (
+                    "margin_sum",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="sum of margins"
+                    ),
+                ),
+                (
+                    "margin_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="average margin"
+                    ),
+                ),
+                (
+                    "firsts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="number of firsts"
+                    ),
+                ),
+                (
+                    "seconds",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="number of seconds"
+                    ),
+                ),
+                (
+                    "thirds",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="number of thirds"
+                    ),
+                ),
+                (
+                    "num_iron",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="number of times ironed"
+                    ),
+                ),
+                (
+                    "round",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tournaments.round",
+                        verbose_name="round",
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="participants.team",
+                        verbose_name="team",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "team running total",
+                "verbose_name_plural": "team running totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="speakerrunningtotal",
+            constraint=utils.models.UniqueConstraint(
+                fields=("speaker", "round"), name="standin_speakerrunningtotal_speaker__round_uniq"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="teamrunningtotal",
+            constraint=utils.models.UniqueConstraint(
+                fields=("team", "round"), name="standin_teamrunningtotal_team__round_uniq"
+            ),
+        ),
+    ]
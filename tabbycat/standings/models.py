@@ -0,0 +1,88 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from utils.models import UniqueConstraint
+
+
+class TeamRunningTotal(models.Model):
+    """Stores the values of a team's standings metrics as at the end of a
+    preliminary round, counting only confirmed ballots. Field names match the
+    keys of the corresponding metric annotators in teams.py. These are kept up
+    to date by the functions in totals.py, and are entirely redundant with
+    TeamScore; they exist so that standings can be read directly, rather than
+    aggregated from every TeamScore in the tournament."""
+
+    team = models.ForeignKey('participants.Team', models.CASCADE,
+        verbose_name=_("team"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    points = models.IntegerField(null=True, blank=True,
+        verbose_name=_("points"))
+    wins = models.PositiveIntegerField(default=0,
+        verbose_name=_("wins"))
+    speaks_sum = models.FloatField(null=True, blank=True,
+        verbose_name=_("total speaker score"))
+    speaks_avg = models.FloatField(null=True, blank=True,
+        verbose_name=_("average total speaker score"))
+    speaks_stddev = models.FloatField(null=True, blank=True,
+        verbose_name=_("speaker score standard deviation"))
+    margin_sum = models.FloatField(null=True, blank=True,
+        verbose_name=_("sum of margins"))
+    margin_avg = models.FloatField(null=True, blank=True,
+        verbose_name=_("average margin"))
+    firsts = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of firsts"))
+    seconds = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of seconds"))
+    thirds = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of thirds"))
+    num_iron = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of times ironed"))
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=['team', 'round'])]
+        verbose_name = _("team running total")
+        verbose_name_plural = _("team running totals")
+
+    def __str__(self):
+        return "[{0.id}] {0.team!s} after {0.round!s}".format(self)
+
+
+class SpeakerRunningTotal(models.Model):
+    """Stores the values of a speaker's standings metrics as at the end of a
+    preliminary round, counting only confirmed ballots. Field names match the
+    keys of the corresponding metric annotators in speakers.py. See
+    `TeamRunningTotal`."""
+
+    speaker = models.ForeignKey('participants.Speaker', models.CASCADE,
+        verbose_name=_("speaker"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    total = models.FloatField(null=True, blank=True,
+        verbose_name=_("total"))
+    average = models.FloatField(null=True, blank=True,
+        verbose_name=_("average"))
+    stdev = models.FloatField(null=True, blank=True,
+        verbose_name=_("standard deviation"))
+    count = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of speeches given"))
+    srank = models.IntegerField(null=True, blank=True,
+        verbose_name=_("speech ranks"))
+    replies_sum = models.FloatField(null=True, blank=True,
+        verbose_name=_("total reply score"))
+    replies_avg = models.FloatField(null=True, blank=True,
+        verbose_name=_("average reply score"))
+    replies_stddev = models.FloatField(null=True, blank=True,
+        verbose_name=_("reply score standard deviation"))
+    replies_count = models.PositiveIntegerField(default=0,
+        verbose_name=_("replies given"))
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=['speaker', 'round'])]
+        verbose_name = _("speaker running total")
+        verbose_name_plural = _("speaker running totals")
+
+    def __str__(self):
+        return "[{0.id}] {0.speaker!s} after {0.round!s}".format(self)
@@ -0,0 +1,118 @@
+"""Opponent adjacency arrays for metrics that depend on who teams have faced.
+
+Draw strength and who-beat-whom metrics need, for each team, its opponents in
+every preliminary debate so far. Rather than looking these up team by team,
+`OpponentArray` loads every team's debates in a single query and arranges them
+into a padded (team × debate slot) array of opponent indices, so that these
+metrics reduce to NumPy gathers and sums over rows.
+"""
+
+import logging
+
+import numpy as np
+from django.db.models import Q, Sum
+
+from draw.models import DebateTeam
+from tournaments.models import Round
+
+logger = logging.getLogger(__name__)
+
+
+class OpponentArray:
+    """Arranges the opponents of each team into an array.
+
+    `opponents[i, s]` is the index of the `s`th opponent of the team with index
+    `i`, counting every opponent in every debate (so a team that faced the same
+    opponent twice has them twice). Rows are padded with `len(team_ids)`, which
+    indexes the zero that `gather_sum()` appends to its values.
+    `points[i, s]` is the number of points the team with index `i` earned in
+    the debate against that opponent, or 0 if the ballot isn't confirmed.
+
+    `rows` is an iterable of (debate_id, team_id, points) tuples, one per
+    DebateTeam. Teams in `rows` that aren't in `team_ids` are added to the
+    end, so that every opponent has an index.
+    """
+
+    def __init__(self, team_ids, rows):
+        rows = np.array([(d, t, p or 0) for d, t, p in rows], dtype=np.int64).reshape(-1, 3)
+
+        self.team_ids = list(team_ids)
+        known = set(self.team_ids)
+        self.team_ids.extend(dict.fromkeys(t for t in rows[:, 1].tolist() if t not in known))
+        self.index = {team_id: i for i, team_id in enumerate(self.team_ids)}
+        nteams = len(self.team_ids)
+
+        # Group rows by debate into a (debate × member) array
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+        _, debate_idx, debate_sizes = np.unique(rows[:, 0], return_inverse=True, return_counts=True)
+        starts = np.concatenate(([0], np.cumsum(debate_sizes)[:-1]))
+        member_idx = np.arange(len(rows)) - starts[debate_idx]
+        team_idx = np.fromiter((self.index[t] for t in rows[:, 1].tolist()), dtype=np.int64, count=len(rows))
+        width = int(debate_sizes.max()) if len(rows) else 0
+        members = np.full((len(debate_sizes), width), -1, dtype=np.int64)
+        members[debate_idx, member_idx] = team_idx
+        member_points = np.zeros((len(debate_sizes), width), dtype=np.int64)
+        member_points[debate_idx, member_idx] = rows[:, 2]
+
+        # Every ordered pair of distinct members of a debate is a (team, opponent) edge
+        sources, targets, points = [], [], []
+        for a in range(width):
+            for b in range(width):
+                if a == b:
+                    continue
+                valid = (members[:, a] >= 0) & (members[:, b] >= 0)
+                sources.append(members[valid, a])
+                targets.append(members[valid, b])
+                points.append(member_points[valid, a])
+        sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+        targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+        points = np.concatenate(points) if points else np.zeros(0, dtype=np.int64)
+
+        # Lay edges out in rows by source team
+        order = np.argsort(sources, kind='stable')
+        sources, targets, points = sources[order], targets[order], points[order]
+        degrees = np.bincount(sources, minlength=nteams)
+        slot = np.arange(len(sources)) - np.concatenate(([0], np.cumsum(degrees)[:-1]))[sources]
+        self.opponents = np.full((nteams, int(degrees.max()) if nteams else 0), nteams, dtype=np.int64)
+        self.opponents[sources, slot] = targets
+        self.points = np.zeros(self.opponents.shape, dtype=np.int64)
+        self.points[sources, slot] = points
+
+    @classmethod
+    def for_tournament(cls, tournament, team_ids, round=None):
+        """Loads the opponents of every team in `tournament`, in preliminary
+        rounds up to and including `round` (or all preliminary rounds)."""
+        round_filter = Q(debate__round__tournament=tournament, debate__round__stage=Round.Stage.PRELIMINARY)
+        if round is not None:
+            round_filter &= Q(debate__round__seq__lte=round.seq)
+        rows = DebateTeam.objects.filter(round_filter).values_list('debate_id', 'team_id').annotate(
+            points=Sum('teamscore__points', filter=Q(teamscore__ballot_submission__confirmed=True)))
+        logger.info("Loaded opponents for draw strength and who-beat-whom")
+        return cls(team_ids, rows)
+
+    @classmethod
+    def for_standings(cls, standings, tournament, round=None):
+        """Returns the opponent array for the teams in `standings`, building it
+        the first time, so that every metric in the same standings shares it.
+        Teams in the standings come first in `team_ids`, in `infoview()` order."""
+        cached = getattr(standings, '_opponent_array', None)
+        if cached is not None and cached[0] == getattr(round, 'id', None):
+            return cached[1]
+        opponents = cls.for_tournament(tournament, [info.instance_id for info in standings.infoview()], round)
+        standings._opponent_array = (getattr(round, 'id', None), opponents)
+        return opponents
+
+    def gather_sum(self, values):
+        """Returns an array whose `i`th element is the sum of `values` over the
+        opponents of the team with index `i`. `values` must be indexed like
+        `team_ids`."""
+        values = np.append(np.asarray(values), 0)
+        return values[self.opponents].sum(axis=1)
+
+    def points_against(self, teams, opponents):
+        """Returns an array whose `k`th element is the number of points the
+        team with index `teams[k]` earned in debates against the team with
+        index `opponents[k]`."""
+        teams, opponents = np.asarray(teams, dtype=np.int64), np.asarray(opponents, dtype=np.int64)
+        met = self.opponents[teams] == opponents[:, np.newaxis]
+        return (self.points[teams] * met).sum(axis=1)
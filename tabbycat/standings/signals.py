@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from draw.models import Debate
+from options.models import TournamentPreferenceModel
+from results.models import BallotSubmission
+from tournaments.models import Round, Tournament
+
+from .snapshots import bump_results_version
+from .totals import (get_running_totals_ids, invalidate_running_totals, rebuild_running_totals_on_commit,
+                     update_running_totals, update_running_totals_for_debate)
+
+# Round fields on which running totals depend
+RUNNING_TOTALS_ROUND_FIELDS = ('weight', 'stage', 'seq')
+
+# Preferences, as (section, name), that affect how scores count in running totals
+RUNNING_TOTALS_PREFERENCES = {
+    ('debate_rules', 'substantive_speakers'),
+    ('debate_rules', 'reply_scores_enabled'),
+}
+
+
+@receiver(post_save, sender=BallotSubmission)
+def update_running_totals_on_save(sender, instance, created, raw=False, **kwargs):
+    # Fixtures are loaded before their scores, so leave running totals to be
+    # filled in when standings are next generated. (Loading the tournament
+    # invalidates its standings.) A new unconfirmed ballot doesn't affect any
+    # confirmed results.
+    if raw or (created and not instance.confirmed):
+        return
+    # Scores are often saved after the ballot submission, in the same
+    # transaction, so wait until it commits.
+    debate_id = instance.debate_id
+
+    def update():
+        debate = Debate.objects.filter(id=debate_id).select_related('round__tournament').first()
+        if debate is not None:  # otherwise, it was deleted, see below
+            update_running_totals_for_debate(debate)
+
+    transaction.on_commit(update)
+
+
+@receiver(pre_delete, sender=BallotSubmission)
+def collect_running_totals_on_delete(sender, instance, **kwargs):
+    # If the ballot is being deleted with its debate (e.g. when a draw or round
+    # is deleted), the debate's teams can't be found after the deletion, so
+    # collect them now.
+    if instance.confirmed:
+        instance._running_totals_ids = get_running_totals_ids(instance.debate)
+
+
+@receiver(post_delete, sender=BallotSubmission)
+def update_running_totals_on_delete(sender, instance, **kwargs):
+    ids = getattr(instance, '_running_totals_ids', None)
+    if ids is None:
+        return
+    transaction.on_commit(lambda: update_running_totals(*ids))
+
+
+@receiver(pre_save, sender=Round)
+def collect_running_totals_round_change(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    old = Round.objects.filter(pk=instance.pk).values(*RUNNING_TOTALS_ROUND_FIELDS).first()
+    instance._running_totals_changed = old is not None and \
+        any(old[field] != getattr(instance, field) for field in RUNNING_TOTALS_ROUND_FIELDS)
+
+
+@receiver(post_save, sender=Round)
+def rebuild_running_totals_on_round_change(sender, instance, **kwargs):
+    if getattr(instance, '_running_totals_changed', False):
+        rebuild_running_totals_on_commit(instance.tournament_id)
+
+
+@receiver(post_save, sender=TournamentPreferenceModel)
+def invalidate_running_totals_on_preference_change(sender, instance, raw=False, **kwargs):
+    if not raw and (instance.section, instance.name) in RUNNING_TOTALS_PREFERENCES:
+        invalidate_running_totals(instance.instance_id)
+
+
+@receiver(post_save, sender=Tournament)
+def invalidate_standings_on_tournament_change(sender, instance, **kwargs):
+    bump_results_version(instance.id)
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+@receiver(post_save, sender=TournamentPreferenceModel)
+def invalidate_standings_on_change(sender, instance, **kwargs):
+    # Round weights and stages, and many preferences, affect standings
+    bump_results_version(instance.tournament_id if sender is Round else instance.instance_id)
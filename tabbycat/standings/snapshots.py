@@ -0,0 +1,64 @@
+"""Functions to cache snapshots of generated standings.
+
+A snapshot holds everything a `Standings` object computes (metrics, rankings
+and ordering), keyed by instance ID, so that it can be stored in the cache and
+restored onto fresh instances without running any annotators. Snapshot keys
+include a results version for the tournament, which is changed whenever
+anything that might affect standings changes (see signals.py). Old snapshots
+are never deleted explicitly; they just stop being looked up, and expire after
+`STANDINGS_CACHE_TIMEOUT`.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+RESULTS_VERSION_KEY = "%s_results_version"
+SNAPSHOT_KEY = "%s_standings_%s_%s"
+
+
+def get_results_version(tournament_id):
+    """Returns the current results version for the tournament, setting one if
+    there isn't one in the cache."""
+    key = RESULTS_VERSION_KEY % tournament_id
+    version = cache.get(key)
+    if version is None:
+        # Use a fresh token rather than restarting a counter, so that snapshots
+        # from before an eviction can't be mistaken for current ones.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_results_version(tournament_id):
+    """Changes the results version for the tournament, so that all existing
+    standings snapshots for it are ignored. As with `invalidate_tags()`, it's
+    changed again when the current transaction (if any) commits."""
+    def bump():
+        cache.set(RESULTS_VERSION_KEY % tournament_id, time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+    logger.debug("Bumped results version for tournament %d", tournament_id)
+
+
+def get_snapshot_key(tournament_id, *parts):
+    """Returns the cache key for a standings snapshot. `parts` should identify
+    everything other than results that affects the standings, and must have a
+    deterministic `repr()`."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return SNAPSHOT_KEY % (tournament_id, get_results_version(tournament_id), digest)
+
+
+def get_snapshot(key):
+    return cache.get(key)
+
+
+def set_snapshot(key, snapshot):
+    cache.set(key, snapshot, settings.STANDINGS_CACHE_TIMEOUT)
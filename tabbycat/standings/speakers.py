@@ -10,7 +10,9 @@ from tournaments.models import Round
 
 from .base import BaseStandingsGenerator
 from .metrics import QuerySetMetricAnnotator
+from .models import SpeakerRunningTotal
 from .ranking import BasicRankAnnotator
+from .totals import update_speaker_running_totals
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +72,7 @@ class TotalSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     name = _("total")
     abbr = _("Total")
     function = Sum
+    running_total = True
 
 
 class AverageSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -78,6 +81,7 @@ class AverageSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     name = _("average")
     abbr = _("Avg")
     function = Avg
+    running_total = True
 
 
 class SpeakerTeamPointsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
@@ -163,6 +167,7 @@ class StandardDeviationSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnn
     abbr = _("Stdev")
     function = StdDev
     ascending = True
+    running_total = True
 
 
 class NumberOfSpeechesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -171,6 +176,7 @@ class NumberOfSpeechesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     name = _("number of speeches given")
     abbr = _("Num")
     function = Count
+    running_total = True
 
 
 class TotalReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -181,6 +187,7 @@ class TotalReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Sum
     replies = True
     listed = False
+    running_total = True
 
 
 class AverageReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -191,6 +198,7 @@ class AverageReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Avg
     replies = True
     listed = False
+    running_total = True
 
 
 class StandardDeviationReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -202,6 +210,7 @@ class StandardDeviationReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnot
     replies = True
     listed = False
     ascending = True
+    running_total = True
 
 
 class NumberOfRepliesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -212,6 +221,7 @@ class NumberOfRepliesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Count
     replies = True
     listed = False
+    running_total = True
 
 
 class TrimmedMeanSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -257,6 +267,7 @@ class SpeakerScoreRankingsMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Sum
     ascending = True
     field = 'speakerscore__rank'
+    running_total = True
 
 
 # ==============================================================================
@@ -304,3 +315,7 @@ class SpeakerStandingsGenerator(BaseStandingsGenerator):
     ranking_annotator_classes = {
         "rank"     : BasicRankAnnotator,
     }
+
+    running_totals_model = SpeakerRunningTotal
+    running_totals_field = 'speaker'
+    update_running_totals = staticmethod(update_speaker_running_totals)
@@ -2,17 +2,19 @@
 
 import logging
 
-from django.contrib.postgres.aggregates import ArrayAgg
+import numpy as np
 from django.db.models import Avg, Count, F, FloatField, PositiveIntegerField, Q, StdDev, Sum
 from django.db.models.functions import Cast, NullIf
 from django.utils.translation import gettext_lazy as _
 
-from results.models import TeamScore
 from tournaments.models import Round
 
 from .base import BaseStandingsGenerator
 from .metrics import BaseMetricAnnotator, metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .models import TeamRunningTotal
+from .opponents import OpponentArray
 from .ranking import BasicRankAnnotator, RankFromInstitutionAnnotator, SubrankAnnotator
+from .totals import update_team_running_totals
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +63,7 @@ class PointsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "points"
     name = _("points")
     abbr = _("Pts")
+    running_total = True
 
     function = Sum
     field = "points"
@@ -75,6 +78,7 @@ class WinsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "wins"
     name = _("wins")
     abbr = _("Wins")
+    running_total = True
 
     function = Count
     field = "win"
@@ -86,6 +90,7 @@ class TotalSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "speaks_sum"
     name = _("total speaker score")
     abbr = _("Spk")
+    running_total = True
 
     function = Sum
     field = "score"
@@ -96,6 +101,7 @@ class AverageSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "speaks_avg"
     name = _("average total speaker score")
     abbr = _("ATSS")
+    running_total = True
 
     function = Avg
     field = "score"
@@ -107,6 +113,7 @@ class SpeakerScoreStandardDeviationMetricAnnotator(TeamScoreQuerySetMetricAnnota
     name = _("speaker score standard deviation")
     abbr = _("SSD")
     ascending = True
+    running_total = True
 
     function = StdDev
     field = "score"
@@ -117,6 +124,7 @@ class SumMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "margin_sum"
     name = _("sum of margins")
     abbr = _("Marg")
+    running_total = True
 
     function = Sum
     field = "margin"
@@ -127,6 +135,7 @@ class AverageMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "margin_avg"
     name = _("average margin")
     abbr = _("AWM")
+    running_total = True
 
     function = Avg
     field = "margin"
@@ -176,33 +185,31 @@ class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
     opponent_annotator = None
 
     def annotate(self, queryset, standings, round=None):
-        if not queryset.exists():
+        if not queryset:  # evaluates the queryset, for reuse below
             return
 
-        logger.info("Running opponents query for draw strength:")
+        tournament = queryset[0].tournament
+        opponents = OpponentArray.for_standings(standings, tournament, round)
 
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
+        # If the opponent metric is already in the combined query, reuse it, and
+        # only aggregate for opponents that aren't in these standings
+        key = self.opponent_annotator.key
+        if hasattr(queryset[0], key):
+            opp_metrics = {team.id: getattr(team, key) for team in queryset}
+        else:
+            opp_metrics = {}
+        missing = [team_id for team_id in opponents.team_ids if team_id not in opp_metrics]
+        if missing:
+            opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
+                    tournament.team_set.filter(id__in=missing), round)
+            opp_metrics.update((team.id, getattr(team, key)) for team in opp_metric_queryset)
 
-        opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
-                queryset[0].tournament.team_set.all(), round)
-        opp_metric_queryset_teams = {team.id: team for team in opp_metric_queryset}
+        # opp_metric is None when no debates have happened
+        values = [opp_metrics.get(team_id) or 0 for team_id in opponents.team_ids]
+        draw_strengths = opponents.gather_sum(values).tolist()
 
         for team in queryset:
-            draw_strength = 0
-            for opponent_id in opponents_by_team[team.id]:
-                opp_metric = getattr(opp_metric_queryset_teams[opponent_id], self.opponent_annotator.key)
-                if opp_metric is not None: # opp_metric is None when no debates have happened
-                    draw_strength += opp_metric
-            standings.add_metric(team, self.key, draw_strength)
+            standings.add_metric(team, self.key, draw_strengths[opponents.index[team.id]])
 
 
 class DrawStrengthByRankMetricAnnotator(BaseMetricAnnotator):
@@ -214,27 +221,17 @@ class DrawStrengthByRankMetricAnnotator(BaseMetricAnnotator):
     extra_only = True  # Cannot rank based on ranking
 
     def annotate(self, queryset, standings, round=None):
-        if not queryset.exists():
+        if not queryset:  # evaluates the queryset, for reuse below
             return
 
-        logger.info("Running opponents query for rank draw strength:")
-
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
-        teams_by_id = {team.id: team for team in teams_with_opponents}
+        opponents = OpponentArray.for_standings(standings, queryset[0].tournament, round)
+        ranks = np.zeros(len(opponents.team_ids), dtype=np.int64)
+        for info in standings.infoview():
+            ranks[opponents.index[info.instance_id]] = info.get_ranking('rank') or 0
+        draw_strengths = opponents.gather_sum(ranks).tolist()
 
         for team in queryset:
-            ranks = [standings.infos[teams_by_id[opponent_id]].rankings['rank'][0] for opponent_id in opponents_by_team[team.id]]
-            ranks_without_none = [rank for rank in ranks if rank is not None]
-            standings.add_metric(team, self.key, sum(ranks_without_none))
+            standings.add_metric(team, self.key, draw_strengths[opponents.index[team.id]])
 
 
 class DrawStrengthByWinsMetricAnnotator(BaseDrawStrengthMetricAnnotator):
@@ -325,6 +322,7 @@ class NumberOfFirstsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "firsts"
     name = _("number of firsts")
     abbr = _("1sts")
+    running_total = True
 
     function = Count
     field = "points"
@@ -335,6 +333,7 @@ class NumberOfSecondsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "seconds"
     name = _("number of seconds")
     abbr = _("2nds")
+    running_total = True
 
     function = Count
     field = "points"
@@ -345,6 +344,7 @@ class NumberOfThirdsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "thirds"
     name = _("number of thirds")
     abbr = _("3rds")
+    running_total = True
 
     function = Count
     field = "points"
@@ -357,6 +357,7 @@ class IronsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     name = _("number of times ironed")
     abbr = _("Irons")
     ascending = True
+    running_total = True
 
     function = Count
     field = "has_ghost"
@@ -372,38 +373,31 @@ class WhoBeatWhomMetricAnnotator(RepeatedMetricAnnotator):
     abbr_prefix = _("WBW")
     choice_name = _("who-beat-whom")
 
-    def get_team_scores(self, key, equal_teams, tsi, round):
-        equal_teams.remove(tsi)
-        other = equal_teams[0]
-        ts = TeamScore.objects.filter(
-            ballot_submission__confirmed=True,
-            debate_team__team=tsi.team,
-            debate_team__debate__debateteam__team=other.team,
-            debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
-        )
-
-        if round is not None:
-            ts = ts.filter(debate_team__debate__round__seq__lte=round.seq)
-
-        ts = ts.aggregate(Sum('points'))
-        logger.info("who beat whom, %s %s vs %s %s: %s",
-            tsi.team.short_name, key(tsi), other.team.short_name, key(other),
-            ts["points__sum"])
-        return ts
-
     def annotate(self, queryset, standings, round=None):
         key = metricgetter(self.keys)
 
-        def who_beat_whom(tsi):
-            equal_teams = [x for x in standings.infoview() if key(x) == key(tsi)]
-            if len(equal_teams) != 2:
-                return "n/a"  # fail fast if attempt to compare with an int
-
-            ts = self.get_team_scores(key, equal_teams, tsi, round)
-            return ts["points__sum"] or 0
+        # Group teams that are equal on all earlier metrics; who-beat-whom
+        # only applies to groups of exactly two
+        groups = {}
+        for tsi in standings.infoview():
+            groups.setdefault(key(tsi), []).append(tsi)
+        pairs = [group for group in groups.values() if len(group) == 2]
+
+        if pairs:
+            tournament = pairs[0][0].team.tournament
+            opponents = OpponentArray.for_standings(standings, tournament, round)
+            teams = [opponents.index[tsi.instance_id] for pair in pairs for tsi in pair]
+            others = [opponents.index[tsi.instance_id] for pair in pairs for tsi in reversed(pair)]
+            points = dict(zip(teams, opponents.points_against(teams, others).tolist()))
+        else:
+            points = {}
 
         for tsi in standings.infoview():
-            wbw = who_beat_whom(tsi)
+            if len(groups[key(tsi)]) != 2:
+                wbw = "n/a"  # fail fast if attempt to compare with an int
+            else:
+                wbw = points[opponents.index[tsi.instance_id]]
+                logger.info("who beat whom, %s %s: %s", tsi.team.short_name, key(tsi), wbw)
             tsi.add_metric(self.key, wbw)
 
 
@@ -457,3 +451,7 @@ class TeamStandingsGenerator(BaseStandingsGenerator):
         "subrank"         : SubrankAnnotator,
         "institution_rank": RankFromInstitutionAnnotator,
     }
+
+    running_totals_model = TeamRunningTotal
+    running_totals_field = 'team'
+    update_running_totals = staticmethod(update_team_running_totals)
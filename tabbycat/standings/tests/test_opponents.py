@@ -0,0 +1,148 @@
+import logging
+import random
+import time
+import unittest
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import F, Q
+from django.test import tag, TestCase
+
+from tournaments.models import Round
+from utils.tests import CompletedTournamentTestMixin
+
+from ..base import Standings
+from ..opponents import OpponentArray
+from ..teams import DrawStrengthBySpeakerScoreMetricAnnotator, DrawStrengthByWinsMetricAnnotator
+
+logger = logging.getLogger(__name__)
+
+
+def make_rows(rng, nteams, nrounds, teams_per_debate):
+    """Returns rows of (debate_id, team_id, points) for random draws."""
+    rows = []
+    team_ids = list(range(1, nteams + 1))
+    for r in range(nrounds):
+        rng.shuffle(team_ids)
+        for d in range(nteams // teams_per_debate):
+            debate_id = r * nteams + d
+            teams = team_ids[d*teams_per_debate:(d+1)*teams_per_debate]
+            for points, team_id in enumerate(teams):
+                rows.append((debate_id, team_id, points if rng.random() > 0.1 else None))
+    return rows
+
+
+def naive_draw_strengths(rows, values):
+    """Sums `values` over opponents the way the annotators used to."""
+    debates = defaultdict(list)
+    for debate_id, team_id, _ in rows:
+        debates[debate_id].append(team_id)
+    opponents_by_team = defaultdict(list)
+    for teams in debates.values():
+        for team in teams:
+            opponents_by_team[team].extend(t for t in teams if t != team)
+    return {team: sum(values[opp] for opp in opponents) for team, opponents in opponents_by_team.items()}
+
+
+class TestOpponentArray(unittest.TestCase):
+
+    rows = [
+        (1, 10, 1), (1, 20, 0),
+        (2, 10, 0), (2, 30, 1),
+        (3, 20, None), (3, 30, None),
+        (4, 10, 1), (4, 20, 0),
+    ]
+
+    def test_gather_sum(self):
+        opponents = OpponentArray([10, 20, 30, 40], self.rows)
+        self.assertEqual(opponents.gather_sum([1, 2, 4, 8]).tolist(), [2 + 4 + 2, 1 + 4 + 1, 1 + 2, 0])
+
+    def test_points_against(self):
+        opponents = OpponentArray([10, 20, 30], self.rows)
+        self.assertEqual(opponents.points_against([0, 1, 0, 2], [1, 0, 2, 1]).tolist(), [2, 0, 0, 0])
+
+    def test_extra_teams(self):
+        opponents = OpponentArray([30], self.rows)
+        self.assertEqual(opponents.team_ids[0], 30)
+        self.assertCountEqual(opponents.team_ids, [10, 20, 30])
+
+    def test_empty(self):
+        opponents = OpponentArray([10, 20], [])
+        self.assertEqual(opponents.gather_sum([3, 4]).tolist(), [0, 0])
+
+    def test_matches_naive(self):
+        rng = random.Random(1045)
+        for teams_per_debate in [2, 4]:
+            rows = make_rows(rng, 48, 6, teams_per_debate)
+            values = {team_id: rng.randint(0, 20) for team_id in range(1, 49)}
+            opponents = OpponentArray(values.keys(), rows)
+            draw_strengths = opponents.gather_sum([values[t] for t in opponents.team_ids]).tolist()
+            expected = naive_draw_strengths(rows, values)
+            for team_id, i in opponents.index.items():
+                self.assertEqual(draw_strengths[i], expected[team_id])
+
+
+class LegacyDrawStrengthMixin:
+    """The draw strength annotation as it was before opponent arrays, for
+    comparison in benchmarks."""
+
+    def annotate(self, queryset, standings, round=None):
+        if not queryset.exists():
+            return
+
+        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
+        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
+        if round is not None:
+            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
+        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id', filter=opponents_filter)
+        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
+        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
+
+        opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
+                queryset[0].tournament.team_set.all(), round)
+        opp_metric_queryset_teams = {team.id: team for team in opp_metric_queryset}
+
+        for team in queryset:
+            draw_strength = 0
+            for opponent_id in opponents_by_team[team.id]:
+                opp_metric = getattr(opp_metric_queryset_teams[opponent_id], self.opponent_annotator.key)
+                if opp_metric is not None:
+                    draw_strength += opp_metric
+            standings.add_metric(team, self.key, draw_strength)
+
+
+class LegacyDrawStrengthByWinsMetricAnnotator(LegacyDrawStrengthMixin, DrawStrengthByWinsMetricAnnotator):
+    pass
+
+
+class LegacyDrawStrengthBySpeakerScoreMetricAnnotator(LegacyDrawStrengthMixin, DrawStrengthBySpeakerScoreMetricAnnotator):
+    pass
+
+
+@tag('benchmark')
+class BenchmarkDrawStrengthAnnotators(CompletedTournamentTestMixin, TestCase):
+    """Compares the time taken by the draw strength annotators with that taken
+    by the annotators they replaced, on the demonstration tournament, and
+    checks that they agree. Run with `manage.py test --tag=benchmark`."""
+
+    def run_annotator(self, annotator_class, round):
+        teams = self.tournament.team_set.all()
+        standings = Standings(teams)
+        start = time.perf_counter()
+        annotator_class().run(teams, standings, round)
+        elapsed = time.perf_counter() - start
+        return elapsed, {info.instance_id: info.metrics[annotator_class.key] for info in standings.infoview()}
+
+    def test_benchmark(self):
+        rounds = [None] + list(self.tournament.round_set.filter(stage=Round.Stage.PRELIMINARY))
+        for legacy_class, annotator_class in [
+            (LegacyDrawStrengthByWinsMetricAnnotator, DrawStrengthByWinsMetricAnnotator),
+            (LegacyDrawStrengthBySpeakerScoreMetricAnnotator, DrawStrengthBySpeakerScoreMetricAnnotator),
+        ]:
+            for round in rounds:
+                with self.subTest(annotator=annotator_class.key, round=round):
+                    legacy_elapsed, expected = self.run_annotator(legacy_class, round)
+                    elapsed, metrics = self.run_annotator(annotator_class, round)
+                    logger.info("%s, %s: previous %.4f s, opponent array %.4f s",
+                        annotator_class.key, round, legacy_elapsed, elapsed)
+                    self.assertEqual(metrics, expected)
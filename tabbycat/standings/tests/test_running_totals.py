@@ -0,0 +1,180 @@
+import logging
+import unittest
+from collections import namedtuple
+
+from django.test import TestCase
+
+from adjallocation.models import DebateAdjudicator
+from draw.models import Debate, DebateTeam
+from draw.types import DebateSide
+from participants.models import Adjudicator, Speaker, Team
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+from standings.models import SpeakerRunningTotal, TeamRunningTotal
+from standings.speakers import SpeakerStandingsGenerator
+from standings.teams import TeamStandingsGenerator
+from standings.totals import rebuild_running_totals, speaker_metrics, team_metrics
+from tournaments.forms import RoundWeightForm
+from tournaments.models import Round, Tournament
+from utils.tests import suppress_logs
+
+MockTeamScore = namedtuple('MockTeamScore', ['points', 'weight', 'win', 'score', 'margin', 'has_ghost'])
+MockSpeakerScore = namedtuple('MockSpeakerScore', ['score', 'position', 'rank'])
+
+
+class TestRunningTotalMetrics(unittest.TestCase):
+
+    def test_team_metrics(self):
+        scores = [
+            MockTeamScore(points=1, weight=1, win=True, score=200, margin=10, has_ghost=False),
+            MockTeamScore(points=1, weight=2, win=True, score=190, margin=4, has_ghost=True),
+            MockTeamScore(points=0, weight=1, win=False, score=None, margin=None, has_ghost=None),
+        ]
+        metrics = team_metrics(scores)
+        self.assertEqual(metrics['points'], 3)
+        self.assertEqual(metrics['wins'], 2)
+        self.assertEqual(metrics['speaks_sum'], 390)
+        self.assertEqual(metrics['speaks_avg'], 195)
+        self.assertEqual(metrics['speaks_stddev'], 5)
+        self.assertEqual(metrics['margin_sum'], 14)
+        self.assertEqual(metrics['margin_avg'], 7)
+        self.assertEqual(metrics['thirds'], 2)
+        self.assertEqual(metrics['num_iron'], 1)
+
+    def test_team_metrics_empty(self):
+        metrics = team_metrics([])
+        for key in ['points', 'speaks_sum', 'speaks_avg', 'speaks_stddev', 'margin_sum', 'margin_avg']:
+            self.assertIsNone(metrics[key])
+        for key in ['wins', 'firsts', 'seconds', 'thirds', 'num_iron']:
+            self.assertEqual(metrics[key], 0)
+
+    def test_speaker_metrics(self):
+        scores = [
+            MockSpeakerScore(score=75, position=1, rank=2),
+            MockSpeakerScore(score=77, position=2, rank=None),
+            MockSpeakerScore(score=38, position=4, rank=1),
+        ]
+        metrics = speaker_metrics(scores, 3, 4)
+        self.assertEqual(metrics['total'], 152)
+        self.assertEqual(metrics['average'], 76)
+        self.assertEqual(metrics['stdev'], 1)
+        self.assertEqual(metrics['count'], 2)
+        self.assertEqual(metrics['srank'], 2)
+        self.assertEqual(metrics['replies_sum'], 38)
+        self.assertEqual(metrics['replies_count'], 1)
+
+        metrics = speaker_metrics(scores, 3, None)
+        self.assertIsNone(metrics['replies_avg'])
+        self.assertEqual(metrics['replies_count'], 0)
+
+
+class TestRunningTotals(TestCase):
+    """Checks that standings generated from running totals match those
+    generated from scores, and that running totals follow confirmations."""
+
+    team_metrics = ('points', 'wins', 'speaks_sum', 'speaks_avg', 'speaks_stddev', 'margin_sum')
+    speaker_metrics = ('total', 'average', 'stdev', 'count')
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="runningtotalstest", name="Running totals test")
+        self.team1 = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
+        self.team2 = Team.objects.create(tournament=self.tournament, reference="2", use_institution_prefix=False)
+        speaker1 = Speaker.objects.create(team=self.team1, name="Speaker 1")
+        speaker2 = Speaker.objects.create(team=self.team2, name="Speaker 2")
+        adj = Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator")
+        self.ballotsubs = []
+        for i in [1, 2, 3]:
+            rd = Round.objects.create(tournament=self.tournament, seq=i)
+            debate = Debate.objects.create(round=rd)
+            dt1 = DebateTeam.objects.create(debate=debate, team=self.team1, side=DebateSide.AFF)
+            dt2 = DebateTeam.objects.create(debate=debate, team=self.team2, side=DebateSide.NEG)
+            DebateAdjudicator.objects.create(debate=debate, adjudicator=adj, type=DebateAdjudicator.TYPE_CHAIR)
+            ballotsub = BallotSubmission.objects.create(debate=debate, confirmed=True)
+            TeamScore.objects.create(debate_team=dt1, ballot_submission=ballotsub,
+                margin=+2*i, points=1, score=100+i, win=True, votes_given=1, votes_possible=1)
+            TeamScore.objects.create(debate_team=dt2, ballot_submission=ballotsub,
+                margin=-2*i, points=0, score=100-i, win=False, votes_given=0, votes_possible=1)
+            SpeakerScore.objects.create(debate_team=dt1, ballot_submission=ballotsub,
+                speaker=speaker1, position=1, score=100+i)
+            SpeakerScore.objects.create(debate_team=dt2, ballot_submission=ballotsub,
+                speaker=speaker2, position=1, score=100-i)
+            self.ballotsubs.append(ballotsub)
+
+        # Scores were created after ballots were confirmed, so rebuild
+        rebuild_running_totals(self.tournament)
+
+    def tearDown(self):
+        DebateTeam.objects.filter(team__tournament=self.tournament).delete()
+        self.tournament.delete()
+
+    def assertStandingsMatch(self, generator_class, metrics, queryset):  # noqa: N802
+        for rd in self.tournament.round_set.all():
+            with suppress_logs('standings.metrics', logging.INFO), suppress_logs('standings.base', logging.INFO):
+                expected = generator_class(metrics, ('rank',)).generate(queryset, round=rd)
+                actual = generator_class(metrics, ('rank',), running_totals=True).generate(queryset, round=rd)
+            self.assertEqual(expected.get_instance_list(), actual.get_instance_list())
+            for instance in queryset:
+                with self.subTest(round=rd.seq, instance=str(instance)):
+                    self.assertEqual(expected.get_standing(instance).metrics, actual.get_standing(instance).metrics)
+                    self.assertEqual(expected.get_standing(instance).rankings, actual.get_standing(instance).rankings)
+
+    def assertAllStandingsMatch(self):  # noqa: N802
+        self.assertStandingsMatch(TeamStandingsGenerator, self.team_metrics, self.tournament.team_set.all())
+        self.assertStandingsMatch(SpeakerStandingsGenerator, self.speaker_metrics,
+                Speaker.objects.filter(team__tournament=self.tournament))
+
+    def test_running_totals(self):
+        self.assertEqual(TeamRunningTotal.objects.count(), 6)
+        self.assertEqual(SpeakerRunningTotal.objects.count(), 6)
+        self.assertAllStandingsMatch()
+
+    def test_unconfirm(self):
+        ballotsub = self.ballotsubs[1]
+        ballotsub.confirmed = False
+        with self.captureOnCommitCallbacks(execute=True):
+            ballotsub.save()
+        self.assertEqual(TeamRunningTotal.objects.get(team=self.team1, round__seq=3).wins, 2)
+        self.assertAllStandingsMatch()
+
+        ballotsub.confirmed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            ballotsub.save()
+        self.assertEqual(TeamRunningTotal.objects.get(team=self.team1, round__seq=3).wins, 3)
+        self.assertAllStandingsMatch()
+
+    def test_delete_debate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ballotsubs[1].debate.delete()
+        self.assertEqual(TeamRunningTotal.objects.get(team=self.team1, round__seq=3).wins, 2)
+        self.assertAllStandingsMatch()
+
+    def test_round_weight_form(self):
+        data = {'round_weight_%d' % rd.id: rd.seq for rd in self.tournament.round_set.all()}
+        form = RoundWeightForm(self.tournament, data=data)
+        self.assertTrue(form.is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        self.assertEqual(TeamRunningTotal.objects.get(team=self.team1, round__seq=3).points, 1 + 2 + 3)
+        self.assertAllStandingsMatch()
+
+    def test_round_weight_save(self):
+        rd = self.tournament.round_set.get(seq=1)
+        rd.weight = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            rd.save()
+        self.assertEqual(TeamRunningTotal.objects.get(team=self.team1, round__seq=3).points, 2 + 1 + 1)
+        self.assertAllStandingsMatch()
+
+    def test_preference_change(self):
+        self.tournament.preferences['debate_rules__substantive_speakers'] = 1
+        self.assertFalse(SpeakerRunningTotal.objects.filter(speaker__team__tournament=self.tournament).exists())
+        self.assertAllStandingsMatch()
+
+    def test_missing_running_totals(self):
+        TeamRunningTotal.objects.filter(round__seq=2).delete()
+        self.assertAllStandingsMatch()
+        self.assertEqual(TeamRunningTotal.objects.count(), 6)
+
+    def test_unsupported_metric(self):
+        # Trimmed mean isn't in running totals, so falls back to aggregation
+        generator = SpeakerStandingsGenerator(('trimmed_mean',), ('rank',), running_totals=True)
+        self.assertIsNone(generator.get_running_totals_round(self.tournament.round_set.last()))
@@ -0,0 +1,85 @@
+import logging
+
+from django.test import TestCase
+
+from draw.models import Debate, DebateTeam
+from draw.types import DebateSide
+from participants.models import Team
+from results.models import BallotSubmission, TeamScore
+from standings.teams import TeamStandingsGenerator
+from tournaments.forms import RoundWeightForm
+from tournaments.models import Round, Tournament
+from utils.tests import suppress_logs
+
+
+class TestStandingsSnapshots(TestCase):
+
+    metrics = ('wins', 'speaks_sum')
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="snapshotstest", name="Snapshots test")
+        self.team1 = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
+        self.team2 = Team.objects.create(tournament=self.tournament, reference="2", use_institution_prefix=False)
+        self.round = Round.objects.create(tournament=self.tournament, seq=1)
+        debate = Debate.objects.create(round=self.round)
+        dt1 = DebateTeam.objects.create(debate=debate, team=self.team1, side=DebateSide.AFF)
+        dt2 = DebateTeam.objects.create(debate=debate, team=self.team2, side=DebateSide.NEG)
+        self.ballotsub = BallotSubmission.objects.create(debate=debate, confirmed=False)
+        TeamScore.objects.create(debate_team=dt1, ballot_submission=self.ballotsub,
+            margin=-2, points=0, score=99, win=False, votes_given=0, votes_possible=1)
+        TeamScore.objects.create(debate_team=dt2, ballot_submission=self.ballotsub,
+            margin=2, points=1, score=101, win=True, votes_given=1, votes_possible=1)
+
+    def tearDown(self):
+        DebateTeam.objects.filter(team__tournament=self.tournament).delete()
+        self.tournament.delete()
+
+    def generate(self, extra_metrics=()):
+        generator = TeamStandingsGenerator(self.metrics, ('rank',), extra_metrics, tiebreak="random")
+        with suppress_logs('standings.metrics', logging.INFO):
+            return generator.generate_cached(self.tournament.team_set.all(), self.tournament, round=self.round)
+
+    def assertStandingsEqual(self, first, second):  # noqa: N802
+        self.assertEqual(first.get_instance_list(), second.get_instance_list())
+        self.assertEqual(list(first.metrics_info()), list(second.metrics_info()))
+        self.assertEqual(list(first.rankings_info()), list(second.rankings_info()))
+        for info1, info2 in zip(first, second):
+            self.assertEqual(info1.metrics, info2.metrics)
+            self.assertEqual(info1.rankings, info2.rankings)
+
+    def test_cached(self):
+        first = self.generate()
+        with self.assertNumQueries(1):  # just the teams
+            second = self.generate()
+        self.assertStandingsEqual(first, second)
+
+    def test_different_metrics(self):
+        self.generate()
+        standings = self.generate(extra_metrics=('margin_sum',))
+        self.assertIn('margin_sum', standings.metric_keys)
+
+    def test_confirmation_invalidates(self):
+        standings = self.generate()
+        self.assertEqual(standings.get_standing(self.team2).metrics['wins'], 0)
+
+        self.ballotsub.confirmed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ballotsub.save()
+        standings = self.generate()
+        self.assertEqual(standings.get_standing(self.team2).metrics['wins'], 1)
+        self.assertEqual(standings.get_instance_list(), [self.team2, self.team1])
+
+    def test_round_weight_form_invalidates(self):
+        self.ballotsub.confirmed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ballotsub.save()
+        standings = self.generate(extra_metrics=('points',))
+        self.assertEqual(standings.get_standing(self.team2).metrics['points'], 1)
+
+        # The form saves weights with bulk_update(), which sends no signals
+        form = RoundWeightForm(self.tournament, data={'round_weight_%d' % self.round.id: 3})
+        self.assertTrue(form.is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        standings = self.generate(extra_metrics=('points',))
+        self.assertEqual(standings.get_standing(self.team2).metrics['points'], 3)
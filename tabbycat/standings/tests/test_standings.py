@@ -93,6 +93,13 @@ class TestTrivialStandings(TestCase):
         self.assertEqual(standings.get_standing(self.team1).rankings['subrank'], (1, True))
         self.assertEqual(standings.get_standing(self.team2).rankings['subrank'], (1, True))
 
+    def test_single_query(self):
+        # Teams, then one combined query for all metrics and rankings
+        generator = TeamStandingsGenerator(('points', 'speaks_sum', 'margin_sum'), ('rank', 'subrank'),
+            extra_metrics=('speaks_avg', 'firsts'))
+        with self.assertNumQueries(2):
+            self.get_standings(generator)
+
     def test_no_rankings(self):
         self._base_metric_test({'points': [2, 0]})
 
@@ -0,0 +1,242 @@
+"""Functions to maintain running totals of team and speaker metrics.
+
+For each team (and speaker) and each preliminary round, a `TeamRunningTotal`
+(`SpeakerRunningTotal`) instance stores the values of the standings metrics as
+at the end of that round. Standings generators can then read these directly
+(see `BaseStandingsGenerator.annotate_running_totals()`), rather than aggregate
+every TeamScore (SpeakerScore) in the tournament on every request.
+
+Running totals are recalculated for the teams and speakers in a debate whenever
+a ballot submission in that debate is saved or deleted, once the transaction
+commits (see signals.py). This touches only a handful of rows, so it's cheap to
+do on every confirmation. Changing the weight, stage or sequence number of a
+round recalculates all running totals in the tournament, and changing a
+preference that affects how scores are counted deletes them. Running totals
+that don't exist yet, for example for a new round, are filled in when standings
+generators first find them missing. The `checkrunningtotals` management command
+compares the running totals against the full aggregation.
+
+Since running totals change only when results do, recalculating them for a
+debate or tournament also invalidates cached standings (see snapshots.py).
+"""
+
+import logging
+import math
+from collections import defaultdict
+from statistics import pstdev
+
+from django.db import transaction
+from django.db.models import F
+
+from participants.models import Speaker, Team
+from results.models import SpeakerScore, TeamScore
+from tournaments.models import Round, Tournament
+
+from .models import SpeakerRunningTotal, TeamRunningTotal
+from .snapshots import bump_results_version
+
+logger = logging.getLogger(__name__)
+
+
+def _sum(values):
+    return sum(values) if values else None
+
+
+def _avg(values):
+    return sum(values) / len(values) if values else None
+
+
+def _stddev(values):
+    # The population standard deviation, to match PostgreSQL's stddev_pop()
+    return pstdev(values) if values else None
+
+
+def team_metrics(scores):
+    """Returns a dict of the running total fields for a team, given a list of
+    its TeamScores (or named tuples with the same fields, plus `weight`, the
+    weight of the round). None values are excluded, as they are in SQL."""
+    speaks = [s.score for s in scores if s.score is not None]
+    margins = [s.margin for s in scores if s.margin is not None]
+    return {
+        'points': _sum([s.points * s.weight for s in scores if s.points is not None]),
+        'wins': sum(1 for s in scores if s.win),
+        'speaks_sum': _sum(speaks),
+        'speaks_avg': _avg(speaks),
+        'speaks_stddev': _stddev(speaks),
+        'margin_sum': _sum(margins),
+        'margin_avg': _avg(margins),
+        'firsts': sum(1 for s in scores if s.points == 3),
+        'seconds': sum(1 for s in scores if s.points == 2),
+        'thirds': sum(1 for s in scores if s.points == 1),
+        'num_iron': sum(1 for s in scores if s.has_ghost),
+    }
+
+
+def speaker_metrics(scores, last_substantive_position, reply_position):
+    """Returns a dict of the running total fields for a speaker, given a list
+    of their non-ghost SpeakerScores."""
+    substantive = [s for s in scores if s.position <= last_substantive_position]
+    speaks = [s.score for s in substantive]
+    replies = [s.score for s in scores if s.position == reply_position]
+    return {
+        'total': _sum(speaks),
+        'average': _avg(speaks),
+        'stdev': _stddev(speaks),
+        'count': len(speaks),
+        'srank': _sum([s.rank for s in substantive if s.rank is not None]),
+        'replies_sum': _sum(replies),
+        'replies_avg': _avg(replies),
+        'replies_stddev': _stddev(replies),
+        'replies_count': len(replies),
+    }
+
+
+def _save_running_totals(model, field, ids, rounds, totals):
+    """Writes `totals`, a list of `model` instances, replacing any existing
+    running totals for the given instance IDs."""
+    update_fields = [f.name for f in model._meta.concrete_fields if f.name not in ('id', field, 'round')]
+    with transaction.atomic():
+        model.objects.filter(**{field + '_id__in': ids}).exclude(round__in=rounds).delete()
+        model.objects.bulk_create(totals, update_conflicts=True,
+            unique_fields=[field, 'round'], update_fields=update_fields)
+
+
+def _cumulative_totals(model, field, ids, rounds, scores_by_id, metrics):
+    """Yields `model` instances for every instance ID and round, computed by
+    `metrics` from all scores in rounds up to and including that round."""
+    for id in ids:
+        scores = scores_by_id[id]
+        for rd in rounds:
+            included = [s for s in scores if s.seq <= rd.seq]
+            yield model(**{field + '_id': id, 'round': rd}, **metrics(included))
+
+
+def update_team_running_totals(tournament, team_ids):
+    """Recalculates the running totals for the given teams, for all preliminary
+    rounds in `tournament`."""
+    team_ids = list(team_ids)
+    rounds = list(tournament.prelim_rounds().order_by('seq'))
+
+    scores = TeamScore.objects.filter(
+        ballot_submission__confirmed=True,
+        debate_team__team_id__in=team_ids,
+        debate_team__debate__round__in=rounds,
+    ).annotate(
+        team=F('debate_team__team_id'),
+        seq=F('debate_team__debate__round__seq'),
+        weight=F('debate_team__debate__round__weight'),
+    ).values_list('team', 'seq', 'weight', 'points', 'win', 'score', 'margin', 'has_ghost', named=True)
+
+    scores_by_team = defaultdict(list)
+    for score in scores:
+        scores_by_team[score.team].append(score)
+
+    totals = list(_cumulative_totals(TeamRunningTotal, 'team', team_ids, rounds, scores_by_team, team_metrics))
+    _save_running_totals(TeamRunningTotal, 'team', team_ids, rounds, totals)
+    logger.debug("Updated %d team running totals", len(totals))
+
+
+def update_speaker_running_totals(tournament, speaker_ids):
+    """Recalculates the running totals for the given speakers, for all
+    preliminary rounds in `tournament`."""
+    speaker_ids = list(speaker_ids)
+    rounds = list(tournament.prelim_rounds().order_by('seq'))
+
+    scores = SpeakerScore.objects.filter(
+        ballot_submission__confirmed=True,
+        speaker_id__in=speaker_ids,
+        debate_team__debate__round__in=rounds,
+        ghost=False,
+    ).annotate(
+        seq=F('debate_team__debate__round__seq'),
+    ).values_list('speaker_id', 'seq', 'score', 'position', 'rank', named=True)
+
+    scores_by_speaker = defaultdict(list)
+    for score in scores:
+        scores_by_speaker[score.speaker_id].append(score)
+
+    last_substantive_position = tournament.last_substantive_position
+    reply_position = tournament.reply_position
+
+    def metrics(scores):
+        return speaker_metrics(scores, last_substantive_position, reply_position)
+
+    totals = list(_cumulative_totals(SpeakerRunningTotal, 'speaker', speaker_ids, rounds, scores_by_speaker, metrics))
+    _save_running_totals(SpeakerRunningTotal, 'speaker', speaker_ids, rounds, totals)
+    logger.debug("Updated %d speaker running totals", len(totals))
+
+
+def get_running_totals_ids(debate):
+    """Returns the tournament ID and the team and speaker IDs whose running
+    totals depend on `debate`, or None if the debate isn't in a preliminary
+    round. Speakers include anyone who has a score in any ballot submission for
+    the debate, not just current team members."""
+    round = debate.round
+    if round.stage != Round.Stage.PRELIMINARY:
+        return None
+
+    team_ids = list(debate.debateteam_set.values_list('team_id', flat=True))
+    speaker_ids = set(Speaker.objects.filter(team_id__in=team_ids).values_list('id', flat=True))
+    speaker_ids.update(SpeakerScore.objects.filter(ballot_submission__debate=debate).values_list('speaker_id', flat=True))
+    return round.tournament_id, team_ids, speaker_ids
+
+
+def update_running_totals(tournament_id, team_ids, speaker_ids):
+    """Recalculates the running totals for the given teams and speakers, for
+    all preliminary rounds in the tournament. Teams, speakers and tournaments
+    that no longer exist are skipped, so this can be called after a deletion
+    with IDs collected beforehand."""
+    tournament = Tournament.objects.filter(id=tournament_id).first()
+    if tournament is None:
+        return
+
+    team_ids = Team.objects.filter(id__in=team_ids).values_list('id', flat=True)
+    speaker_ids = Speaker.objects.filter(id__in=speaker_ids).values_list('id', flat=True)
+    update_team_running_totals(tournament, team_ids)
+    update_speaker_running_totals(tournament, speaker_ids)
+    bump_results_version(tournament.id)
+
+
+def update_running_totals_for_debate(debate):
+    """Recalculates the running totals for the teams and speakers in `debate`."""
+    ids = get_running_totals_ids(debate)
+    if ids is not None:
+        update_running_totals(*ids)
+
+
+def rebuild_running_totals(tournament):
+    """Recalculates all running totals in `tournament`."""
+    update_team_running_totals(tournament, tournament.team_set.values_list('id', flat=True))
+    update_speaker_running_totals(tournament, Speaker.objects.filter(
+            team__tournament=tournament).values_list('id', flat=True))
+    bump_results_version(tournament.id)
+
+
+def rebuild_running_totals_on_commit(tournament_id):
+    """Recalculates all running totals in the tournament once the current
+    transaction commits. Running totals are stored already weighted and summed
+    over earlier rounds, so changing a round's weight, stage or sequence number
+    affects all of them."""
+    def rebuild():
+        tournament = Tournament.objects.filter(id=tournament_id).first()
+        if tournament is not None:
+            rebuild_running_totals(tournament)
+
+    transaction.on_commit(rebuild)
+
+
+def invalidate_running_totals(tournament_id):
+    """Deletes all running totals in the tournament, to be recalculated when
+    standings are next generated. This is for changes to preferences that
+    affect how scores are counted, of which there may be several in a row."""
+    TeamRunningTotal.objects.filter(team__tournament_id=tournament_id).delete()
+    SpeakerRunningTotal.objects.filter(speaker__team__tournament_id=tournament_id).delete()
+    bump_results_version(tournament_id)
+
+
+def metrics_match(a, b):
+    """Returns True if the two metric values are equal, allowing for
+    differences in floating-point rounding between Python and SQL."""
+    if a is None or b is None:
+        return a is None and b is None
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
@@ -137,6 +137,7 @@ class BaseStandingsView(RoundMixin, VueTableTemplateView):
 class PublicTabMixin(PublicTournamentPageMixin):
     """Mixin for views that should only be allowed when the tab is released publicly."""
     cache_timeout = settings.TAB_PAGES_CACHE_TIMEOUT
+    cache_tags = ('results', 'participants')
 
     def get_page_subtitle(self):
         return None
@@ -219,8 +220,9 @@ class BaseSpeakerStandingsView(BaseStandingsView):
 
         metrics, extra_metrics = self.get_metrics()
         rank_filter = self.get_rank_filter()
-        generator = SpeakerStandingsGenerator(metrics, self.rankings, extra_metrics, rank_filter=rank_filter)
-        standings = generator.generate(speakers, round=self.round)
+        generator = SpeakerStandingsGenerator(metrics, self.rankings, extra_metrics, rank_filter=rank_filter,
+            running_totals=self.tournament.pref('standings_running_totals'))
+        standings = generator.generate_cached(speakers, self.tournament, round=self.round)
 
         rounds = self.get_rounds()
         self.add_round_results(standings, rounds)
@@ -439,8 +441,9 @@ class BaseTeamStandingsView(BaseStandingsView):
                 to_attr='break_categories_nongeneral'))
         metrics = self.tournament.pref('team_standings_precedence')
         extra_metrics = self.tournament.pref('team_standings_extra_metrics')
-        generator = TeamStandingsGenerator(metrics, self.rankings, extra_metrics)
-        standings = generator.generate(teams, round=self.round)
+        generator = TeamStandingsGenerator(metrics, self.rankings, extra_metrics,
+            running_totals=self.tournament.pref('standings_running_totals'))
+        standings = generator.generate_cached(teams, self.tournament, round=self.round)
         self.limit_rank_display(standings)
 
         rounds = self.get_rounds()
@@ -563,6 +566,7 @@ class PublicCurrentTeamStandingsView(PublicTournamentPageMixin, VueTableTemplate
     page_title = gettext_lazy("Current Team Standings")
     page_emoji = '🌟'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ('results', 'participants')
 
     def get_rounds(self):
         if not hasattr(self, '_rounds'):
@@ -645,6 +649,7 @@ class PublicAdjudicatorsTabView(PublicTabMixin, BaseFeedbackOverview):
     public_page_preference = 'adjudicators_tab_released'
     page_title = gettext_lazy('Feedback Overview')
     page_emoji = '🙅'
+    cache_tags = None  # feedback isn't tagged
     for_public = False
     sort_key = 'name'
     sort_order = 'asc'
@@ -6,9 +6,19 @@ Vue.use(Vuex)
 
 const debug = process.env.NODE_ENV !== 'production'
 
+// Changes are sent over the websocket in batches, so that a burst of edits
+// (e.g. a few quick drags) is saved and broadcast to other editors together.
+// Pending changes are keyed by attribute, then by debate/panel ID, so later
+// changes to the same debate/panel replace earlier ones. The save counter is
+// only updated once they are sent, and any still pending when the page is
+// closed are sent then.
+const sendWindow = 200 // milliseconds
+let pendingChanges = {}
+let pendingTimer = null
+
 // The Vuex data store that contains the list of debates that are mutated
 // and updated through websockets
-export default new Vuex.Store({
+const store = new Vuex.Store({
   state: {
     debatesOrPanels: {}, // Keyed by primary key
     allocatableItems: {}, // Keyed by primary key
@@ -292,19 +302,39 @@ export default new Vuex.Store({
   },
   // Note actions are async
   actions: {
-    updateDebatesOrPanelsAttribute ({ commit }, updatedDebatesOrPanels) {
+    updateDebatesOrPanelsAttribute ({ commit, dispatch }, updatedDebatesOrPanels) {
       // Mutate debate/panel state to reflect the sent attributes via data like:
       // { attributeKey: [{ id: debateID, attributeKey: attributeValue ], ... }
       Object.entries(updatedDebatesOrPanels).forEach(([attribute, changes]) => {
         commit('setDebateOrPanelAttributes', changes)
       })
-      // Send the result over the websocket, like:
+      // Queue the result to be sent over the websocket, like:
       // "importance": [{ "id": 71, "importance": "0"} ], "componentID": 1407 }
-      updatedDebatesOrPanels['componentID'] = this.state.wsPseudoComponentID
-      this.state.wsBridge.send(updatedDebatesOrPanels)
-      commit('updateSaveCounter')
+      Object.entries(updatedDebatesOrPanels).forEach(([attribute, changes]) => {
+        pendingChanges[attribute] = pendingChanges[attribute] || {}
+        changes.forEach((change) => {
+          pendingChanges[attribute][change.id] = change
+        })
+      })
+      if (pendingTimer === null) {
+        pendingTimer = setTimeout(() => dispatch('sendPendingChanges'), sendWindow)
+      }
       // TODO: error handling; locking; checking if the result matches sent data
     },
+    sendPendingChanges ({ commit, state }) {
+      clearTimeout(pendingTimer)
+      pendingTimer = null
+      if (Object.keys(pendingChanges).length === 0) {
+        return
+      }
+      const message = { componentID: state.wsPseudoComponentID }
+      Object.entries(pendingChanges).forEach(([attribute, changes]) => {
+        message[attribute] = Object.values(changes)
+      })
+      pendingChanges = {}
+      state.wsBridge.send(message)
+      commit('updateSaveCounter')
+    },
     updateAllocatableItemModified ({ commit }, unallocatedItemIDs) {
       // To preserve the 'drag order' on the unallocated item we need to set the
       // modified attribute to be the current date time
@@ -332,3 +362,8 @@ export default new Vuex.Store({
   },
   strict: debug,
 })
+
+// Don't lose changes made just before the page is closed
+window.addEventListener('beforeunload', () => store.dispatch('sendPendingChanges'))
+
+export default store
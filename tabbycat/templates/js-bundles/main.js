@@ -19,6 +19,7 @@ import TournamentOverviewContainer from '../../tournaments/templates/TournamentO
 // Allocations
 import EditDebateAdjudicatorsContainer from '../../adjallocation/templates/EditDebateAdjudicatorsContainer.vue'
 import EditPanelAdjudicatorsContainer from '../../adjallocation/templates/EditPanelAdjudicatorsContainer.vue'
+import DrawGenerationProgress from '../../draw/templates/DrawGenerationProgress.vue'
 import EditDebateTeamsContainer from '../../draw/templates/EditDebateTeamsContainer.vue'
 import EditDebateVenuesContainer from '../../venues/templates/EditDebateVenuesContainer.vue'
 import store from '../../templates/allocations/DragAndDropStore'
@@ -189,6 +190,8 @@ vueComponents.EditDebateAdjudicatorsContainer = EditDebateAdjudicatorsContainer
 vueComponents.EditPanelAdjudicatorsContainer = EditPanelAdjudicatorsContainer
 vueComponents.EditDebateTeamsContainer = EditDebateTeamsContainer
 vueComponents.EditDebateVenuesContainer = EditDebateVenuesContainer
+// Draw Generation
+vueComponents.DrawGenerationProgress = DrawGenerationProgress
 // Ballots New
 vueComponents.BallotEntryContainer = BallotEntryContainer
 
@@ -12,11 +12,14 @@ from breakqual.models import BreakCategory
 from breakqual.utils import auto_make_break_rounds
 from options.preferences import TournamentStaff
 from options.presets import all_presets, data_entry_presets_for_form, presets_for_form, PrivateURLs, public_presets_for_form, PublicForms, PublicInformation
+from standings.snapshots import bump_results_version
+from standings.totals import rebuild_running_totals_on_commit
 from users.groups import all_groups
 from users.models import Group
+from utils.cache import invalidate_tags, TOURNAMENT_TAG
 
 from .models import Round, Tournament
-from .signals import update_tournament_cache
+from .signals import update_round_cache, update_tournament_cache
 from .utils import auto_make_rounds
 
 
@@ -290,4 +293,13 @@ class RoundWeightForm(Form):
             round.weight = self.cleaned_data['round_weight_%d' % round.id]
         Round.objects.bulk_update(rounds, ['weight'])
 
+        # bulk_update() doesn't send signals, so do what the Round receivers
+        # would. Running totals are weighted, and standings snapshots and
+        # public pages show weighted points.
+        for round in rounds:
+            update_round_cache(Round, round)
+        rebuild_running_totals_on_commit(self.tournament.id)
+        bump_results_version(self.tournament.id)
+        invalidate_tags(self.tournament.id, TOURNAMENT_TAG)
+
         return rounds
@@ -4,7 +4,9 @@ from django.core.cache import cache
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from options.models import TournamentPreferenceModel
 from tournaments.models import Round, Tournament
+from utils.cache import invalidate_tags, TOURNAMENT_TAG
 
 logger = logging.getLogger(__name__)
 
@@ -28,3 +30,17 @@ def update_round_cache(sender, instance, **kwargs):
         logger.debug("Cleared %s tournament cache because the current round is %s" %
                 (instance.tournament.slug, instance if current_round_id == instance.id else current_round_id))
         update_tournament_cache(sender, instance.tournament, **kwargs)
+
+
+@receiver(post_save, sender=Tournament)
+def invalidate_pages_on_tournament_change(sender, instance, **kwargs):
+    invalidate_tags(instance.id, TOURNAMENT_TAG)
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+@receiver(post_save, sender=TournamentPreferenceModel)
+def invalidate_pages_on_change(sender, instance, **kwargs):
+    # Releasing draws and motions, and changing preferences, can affect any
+    # public page in the tournament
+    invalidate_tags(instance.tournament_id if sender is Round else instance.instance_id, TOURNAMENT_TAG)
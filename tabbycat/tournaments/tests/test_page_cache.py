@@ -0,0 +1,108 @@
+import hashlib
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import override_settings, RequestFactory, TestCase
+from django.views.generic import View
+
+from tournaments.models import Round, Tournament
+from utils.cache import get_tagged_key_prefix, invalidate_tags, PAGE_LOCK_KEY
+from utils.mixins import CacheMixin
+
+
+class CountingView(CacheMixin, View):
+    cache_timeout = 60
+    cache_tags = ('results',)
+    tournament = None
+    renders = 0
+
+    def get(self, request, *args, **kwargs):
+        CountingView.renders += 1
+        return HttpResponse("page %d" % CountingView.renders)
+
+
+class TestTaggedPageCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        CountingView.renders = 0
+        self.tournament = Tournament.objects.create(slug="pagecachetest")
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.tournament.delete()
+        cache.clear()
+
+    def get(self, view_class=CountingView):
+        view = view_class.as_view(tournament=self.tournament)
+        return view(self.factory.get('/pagecachetest/results/'))
+
+    def test_cached(self):
+        first = self.get()
+        second = self.get()
+        self.assertEqual(CountingView.renders, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('max-age=60', second['Cache-Control'])
+
+    def test_invalidate_own_tag(self):
+        self.get()
+        invalidate_tags(self.tournament.id, 'results')
+        self.assertEqual(self.get().content, b"page 2")
+
+    def test_other_tag_keeps_page(self):
+        self.get()
+        invalidate_tags(self.tournament.id, 'draw')
+        self.assertEqual(self.get().content, b"page 1")
+
+    def test_round_change_invalidates(self):
+        self.get()
+        Round.objects.create(tournament=self.tournament, seq=1)
+        self.assertEqual(self.get().content, b"page 2")
+
+    def test_preference_change_invalidates(self):
+        self.get()
+        self.tournament.preferences['public_features__public_results'] = True
+        self.assertEqual(self.get().content, b"page 2")
+
+    def test_untagged(self):
+        class UntaggedView(CountingView):
+            cache_tags = None
+        self.get(UntaggedView)
+        invalidate_tags(self.tournament.id, 'results')
+        self.assertEqual(self.get(UntaggedView).content, b"page 1")
+
+    @override_settings(PUBLIC_FAST_CACHE_TIMEOUT=30)
+    def test_untagged_short_timeout(self):
+        class UntaggedView(CountingView):
+            cache_timeout = 7200
+            cache_tags = None
+        self.assertIn('max-age=30', self.get(UntaggedView)['Cache-Control'])
+
+    def test_zero_timeout(self):
+        class UncachedView(CountingView):
+            cache_timeout = 0
+        self.get(UncachedView)
+        self.get(UncachedView)
+        self.assertEqual(CountingView.renders, 2)
+
+    def test_single_flight(self):
+        """A request that finds another worker rendering the page should wait
+        for that page, rather than render it again."""
+        self.get()
+        invalidate_tags(self.tournament.id, 'results')
+
+        key_prefix = get_tagged_key_prefix(self.tournament.id, CountingView.cache_tags)
+        uri = self.factory.get('/pagecachetest/results/').build_absolute_uri()
+        lock_key = PAGE_LOCK_KEY % hashlib.sha1((key_prefix + uri).encode()).hexdigest()
+        cache.add(lock_key, True)
+
+        def other_worker_finishes(seconds):
+            cache.delete(lock_key)
+            self.get()
+
+        with mock.patch('utils.cache.time.sleep', side_effect=other_worker_finishes) as sleep:
+            response = self.get()
+        sleep.assert_called_once()
+        self.assertEqual(CountingView.renders, 2)
+        self.assertEqual(response.content, b"page 2")
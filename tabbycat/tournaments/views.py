@@ -107,6 +107,8 @@ class BaseTournamentDashboardHomeView(TournamentMixin, WarnAboutDatabaseUseMixin
             kwargs["initial_graph_data"] = json.dumps(stats)
         else:
             kwargs["initial_graph_data"] = json.dumps([])
+        kwargs["ballot_statuses_url"] = "%s?round=%d" % (
+            reverse_tournament(self.ballot_statuses_url_name, t), t.current_round.id)
 
         kwargs["overview_permissions"] = json.dumps({
             "graph": graph_perm,
@@ -119,10 +121,12 @@ class BaseTournamentDashboardHomeView(TournamentMixin, WarnAboutDatabaseUseMixin
 
 class TournamentAssistantHomeView(AssistantMixin, BaseTournamentDashboardHomeView):
     template_name = 'assistant_tournament_index.html'
+    ballot_statuses_url_name = 'results-assistant-ballot-statuses'
 
 
 class TournamentAdminHomeView(AdministratorMixin, BaseTournamentDashboardHomeView):
     template_name = 'tournament_index.html'
+    ballot_statuses_url_name = 'results-ballot-statuses'
     view_permission = True
 
 
@@ -0,0 +1,159 @@
+"""Functions for caching public pages, with invalidation by tag.
+
+Each tournament has a version token for each tag (a kind of resource, like
+"draw" or "results"). Views that declare their tags are cached under a key
+that includes the current token of each of their tags, as well as the
+"tournament" tag, which every tagged page depends on. Invalidating a tag just
+replaces its token, so the next request looks up a new key and the old page is
+left to expire. This lets tagged pages be cached for a long time, while still
+being refreshed as soon as anything they show changes (see the `signals.py`
+modules of each app).
+
+Whether or not a page is tagged, only one worker regenerates it at a time;
+other requests for the same page wait for that worker to finish, rather than
+all regenerating it at once.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_cache_key, has_vary_header, learn_cache_key, patch_response_headers
+
+logger = logging.getLogger(__name__)
+
+TAG_VERSION_KEY = "%s_page_tag_%s"
+PAGE_LOCK_KEY = "page_lock_%s"
+PAGE_LOCK_TIMEOUT = 30  # seconds after which a lock is presumed abandoned
+PAGE_LOCK_WAIT = 5      # seconds to wait for another worker before rendering anyway
+PAGE_LOCK_POLL = 0.1
+
+TOURNAMENT_TAG = 'tournament'
+
+
+def get_tag_versions(tournament_id, tags):
+    """Returns a list of the current version tokens of `tags` for the
+    tournament, setting tokens for any that aren't in the cache."""
+    keys = [TAG_VERSION_KEY % (tournament_id, tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Use a fresh token rather than restarting a counter, so that pages
+            # from before an eviction can't be mistaken for current ones.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(tournament_id, *tags):
+    """Changes the version tokens of `tags` for the tournament, so that all
+    cached pages with any of those tags are regenerated.
+
+    If this is called in a transaction, the tokens are changed again when it
+    commits, since pages rendered by other requests in the meantime would have
+    been cached under the new tokens without the transaction's changes."""
+    def invalidate():
+        version = time.time_ns()
+        cache.set_many({TAG_VERSION_KEY % (tournament_id, tag): version for tag in tags}, None)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+    logger.debug("Invalidated page cache tags %s for tournament %d", ", ".join(tags), tournament_id)
+
+
+def round_tag(tag, round_id):
+    """Returns the tag for the resources of kind `tag` in a single round, for
+    pages that show only one round and shouldn't be invalidated by changes to
+    others. Whatever invalidates a round tag should also invalidate `tag`."""
+    return "%s_round_%d" % (tag, round_id)
+
+
+def get_tagged_version(tournament_id, tags):
+    """Returns a digest of the version tokens of `tags` (and the "tournament"
+    tag) for the tournament, which changes whenever any of those tags is
+    invalidated."""
+    tags = [TOURNAMENT_TAG] + sorted(set(tags) - {TOURNAMENT_TAG})
+    versions = get_tag_versions(tournament_id, tags)
+    return hashlib.sha1(repr(list(zip(tags, versions))).encode()).hexdigest()
+
+
+def get_tagged_key_prefix(tournament_id, tags):
+    """Returns a cache key prefix for a page with `tags` in the tournament,
+    that changes whenever any of those tags is invalidated."""
+    return "%s_%s" % (tournament_id, get_tagged_version(tournament_id, tags))
+
+
+def _should_store(request, response):
+    # These are the same conditions as Django's UpdateCacheMiddleware
+    if response.streaming or response.status_code not in (200, 304):
+        return False
+    if not request.COOKIES and response.cookies and has_vary_header(response, "Cookie"):
+        return False
+    if "private" in response.get("Cache-Control", ()):
+        return False
+    return True
+
+
+def get_cached_page(request, key_prefix):
+    cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+    if cache_key is None:
+        return None
+    return cache.get(cache_key)
+
+
+def cached_page_response(request, render, timeout, key_prefix='', max_age=None):
+    """Returns the cached page for `request` if there is one, otherwise calls
+    `render()` and caches its response for `timeout` seconds. While one
+    request is rendering a page, other requests for the same page wait for it
+    to be cached, for up to `PAGE_LOCK_WAIT` seconds.
+
+    Cache keys vary on the same headers as with Django's `cache_page`.
+    Responses get `Cache-Control: max-age` headers of `max_age` (defaulting to
+    `timeout`), so that browsers don't hold on to them as long as the server
+    does."""
+
+    if request.method not in ('GET', 'HEAD') or timeout <= 0:
+        return render()
+
+    response = get_cached_page(request, key_prefix)
+    if response is not None:
+        return response
+
+    lock_key = PAGE_LOCK_KEY % hashlib.sha1((key_prefix + request.build_absolute_uri()).encode()).hexdigest()
+    locked = cache.add(lock_key, True, PAGE_LOCK_TIMEOUT)
+
+    if not locked:
+        deadline = time.monotonic() + PAGE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(PAGE_LOCK_POLL)
+            response = get_cached_page(request, key_prefix)
+            if response is not None:
+                return response
+            if cache.get(lock_key) is None:
+                break
+        logger.info("Rendering %s without waiting any longer for another worker", request.path)
+
+    def store(response):
+        try:
+            if request.method == 'GET' and _should_store(request, response):
+                patch_response_headers(response, timeout if max_age is None else max_age)
+                cache_key = learn_cache_key(request, response, timeout, key_prefix, cache=cache)
+                cache.set(cache_key, response, timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+    try:
+        response = render()
+    except Exception:
+        if locked:
+            cache.delete(lock_key)
+        raise
+
+    if hasattr(response, 'render') and callable(response.render):
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+    return response
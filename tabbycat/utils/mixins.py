@@ -5,12 +5,12 @@ from typing import Optional, TYPE_CHECKING
 from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.db import connection
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.views.generic.base import ContextMixin
 
 from users.permissions import has_permission
 
+from .cache import cached_page_response, get_tagged_key_prefix
+
 if TYPE_CHECKING:
     from users.permissions import permission_type
 
@@ -163,10 +163,31 @@ class WarnAboutLegacySendgridConfigVarsMixin(ContextMixin):
 
 
 class CacheMixin:
-    """Mixin for views that cache the page and need to update quickly."""
+    """Mixin for views that cache the page and need to update quickly.
+
+    Views that set `cache_tags` to the kinds of resources they show (see
+    utils/cache.py) are cached for `TAGGED_PAGES_CACHE_TIMEOUT`, and refreshed
+    as soon as any of those resources changes in the tournament; browsers are
+    told to cache them for at most `cache_timeout`. Other views aren't
+    refreshed when anything changes, so they're cached for no longer than
+    `PUBLIC_FAST_CACHE_TIMEOUT`, whatever their `cache_timeout`."""
 
     cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
+    cache_tags = None
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def dispatch(self, request, *args, **kwargs):
+        tags = self.get_cache_tags()
+        if tags is None:
+            timeout = max_age = min(self.cache_timeout, settings.PUBLIC_FAST_CACHE_TIMEOUT)
+            key_prefix = settings.CACHE_MIDDLEWARE_KEY_PREFIX
+        else:
+            timeout = settings.TAGGED_PAGES_CACHE_TIMEOUT if self.cache_timeout > 0 else 0
+            max_age = self.cache_timeout
+            key_prefix = get_tagged_key_prefix(self.tournament.id, tags)
 
-    @method_decorator(cache_page(cache_timeout))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+        def render():
+            return super(CacheMixin, self).dispatch(request, *args, **kwargs)
+        return cached_page_response(request, render, timeout, key_prefix, max_age=max_age)